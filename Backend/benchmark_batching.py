@@ -0,0 +1,106 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from local_infer import BatchedGenerator
+
+# ==================================================
+# CONFIG
+# ==================================================
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "New-Template")
+TINY_MODEL = "hf-internal-testing/tiny-random-LlamaForCausalLM"   # same architecture as SQLCoder, runs on CPU
+REPORT_FILE = "batching_report.json"
+
+REQUESTS = 64
+CONCURRENCY = 16
+BATCH_SIZES = [1, 4, 8, 16]
+WINDOW_MS = 10
+MAX_NEW_TOKENS = 32
+
+PROMPT = "### Task\nGenerate a SQL query to answer the question.\nQuestion: {question}\nSQL:"
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))] if values else None
+
+
+def load_prompts(n):
+    sys.path.append(TEMPLATE_DIR)
+    from generate_training_data import QUESTIONS_FILE, load_questions
+    questions = load_questions(os.path.join(TEMPLATE_DIR, QUESTIONS_FILE))
+    return [PROMPT.format(question=questions[i % len(questions)]) for i in range(n)]
+
+
+def run(generator, prompts, concurrency):
+    """Sends `prompts` from `concurrency` caller threads; returns (completions, latencies ms, wall s)."""
+    def call(prompt):
+        start = time.perf_counter()
+        text = generator.generate(prompt)
+        return text, (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        done = list(pool.map(call, prompts))
+    return [t for t, _ in done], [ms for _, ms in done], time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and latency of micro-batched local generation.")
+    parser.add_argument("--model", default=TINY_MODEL)
+    parser.add_argument("--adapter", default="", help="Optional LoRA adapter folder.")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--requests", type=int, default=REQUESTS)
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=BATCH_SIZES)
+    parser.add_argument("--window-ms", type=float, default=WINDOW_MS)
+    parser.add_argument("--max-new-tokens", type=int, default=MAX_NEW_TOKENS)
+    parser.add_argument("--report", default=REPORT_FILE)
+    args = parser.parse_args()
+
+    model, tokenizer = BatchedGenerator.load(args.model, args.adapter, False, args.device)
+    prompts = load_prompts(args.requests)
+    print(f"📋 {len(prompts)} prompts from {args.concurrency} callers, {args.max_new_tokens} new tokens, "
+          f"window {args.window_ms:g} ms\n")
+    print(f"   {'batch':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'mean batch':>10} {'same as 1':>9}")
+
+    rows, reference = [], None
+    for size in args.batch_sizes:
+        generator = BatchedGenerator(max_batch_size=size, batch_window_ms=args.window_ms if size > 1 else 0,
+                                     max_new_tokens=args.max_new_tokens, model=model, tokenizer=tokenizer)
+        run(generator, prompts[:size], size)  # warm-up
+        with generator.lock:
+            generator.batches = generator.requests = 0
+        texts, latencies, wall = run(generator, prompts, args.concurrency)
+        stats = generator.stats()
+        generator.close()
+        # Greedy decoding: batching with left padding should not change the SQL
+        reference = reference or texts
+        row = {
+            "max_batch_size": size,
+            "throughput_rps": round(len(texts) / wall, 2),
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "mean_batch_size": stats["mean_batch_size"],
+            "same_as_first": sum(a == b for a, b in zip(texts, reference)),
+        }
+        rows.append(row)
+        print(f"   {size:>5} {row['throughput_rps']:8.2f} {row['p50_ms']:8.1f} {row['p95_ms']:8.1f} "
+              f"{row['mean_batch_size']:10.2f} {row['same_as_first']:>5}/{len(texts)}")
+
+    base = rows[0]["throughput_rps"]
+    best = max(rows, key=lambda r: r["throughput_rps"])
+    print(f"\n🏆 max_batch_size={best['max_batch_size']}: {best['throughput_rps'] / base:.1f}x the "
+          f"throughput of batch size {rows[0]['max_batch_size']}")
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"model": args.model, "device": args.device, "requests": args.requests,
+                   "concurrency": args.concurrency, "window_ms": args.window_ms,
+                   "max_new_tokens": args.max_new_tokens, "results": rows}, f, indent=4)
+    print(f"🧾 Report: {os.path.abspath(args.report)}")
+
+
+if __name__ == "__main__":
+    main()
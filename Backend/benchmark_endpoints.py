@@ -0,0 +1,274 @@
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+
+import pandas as pd
+
+# ==================================================
+# CONFIG
+# ==================================================
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+UNIFIED_DIR = os.path.join(BACKEND_DIR, "..", "Pre-Process", "unified_outputs")
+REPORT_FILE = "endpoint_benchmark.json"
+BASELINE_FILE = "endpoint_baseline.json"
+SCHEMA_FILE = "database_schema.json"   # in New-Template/; the stand-in's schema
+
+ENDPOINTS = ["/generate-select-sql", "/generate-other-sql", "/execute-sql"]
+CONCURRENCY = [1, 4, 16]
+REQUESTS_PER_LEVEL = 64
+LLM_LATENCY_MS = 200    # stub LLM think time per generation call
+
+# A run regresses when p95 latency grows, or throughput drops, by more than
+# THRESHOLD against the baseline; latency changes under MIN_MS are noise
+THRESHOLD = 0.20
+MIN_MS = 5
+
+# Same as upload_unified_data.py (lookups first, then facts)
+UPLOAD_SEQUENCE = [
+    ("regions.csv", "regions"), ("tru.csv", "tru"), ("religions.csv", "religions"),
+    ("languages.csv", "languages"), ("age_groups.csv", "age_groups"),
+    ("population_stats.csv", "population_stats"), ("healthcare_stats.csv", "healthcare_stats"),
+    ("education_stats.csv", "education_stats"), ("religion_stats.csv", "religion_stats"),
+    ("occupation_stats.csv", "occupation_stats"), ("language_stats.csv", "language_stats"),
+    ("crops.csv", "crop_stats"),
+]
+
+
+# ==================================================
+# STAND-IN DATABASE
+# ==================================================
+def build_standin(path, unified_dir=UNIFIED_DIR):
+    """Loads unified_outputs/ into a DuckDB file, as upload_unified_data.py does into Postgres."""
+    import duckdb
+    conn = duckdb.connect(path)
+    for filename, table in UPLOAD_SEQUENCE:
+        csv_path = os.path.join(unified_dir, filename)
+        if not os.path.exists(csv_path):
+            print(f"⏭️  Skipping {filename} (File not found)")
+            continue
+        df = pd.read_csv(csv_path)
+        df.columns = df.columns.str.lower()
+        conn.register("upload", df)
+        conn.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM upload")
+        conn.unregister("upload")
+    conn.close()
+    return f"duckdb:///{path}"
+
+
+# ==================================================
+# STUB LLM
+# ==================================================
+class StubLLM:
+    """
+    ChatGroq replacement: answers with the curated SQL for a known question
+    (else SELECT 1) after sleeping `latency_ms`. It blocks like the real
+    client's invoke() does, so the endpoint sees the same scheduling.
+    `calls` counts LLM invocations.
+    """
+
+    def __init__(self, answers, latency_ms):
+        self.answers = answers
+        self.latency_ms = latency_ms
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, **kwargs):
+        from langchain_core.runnables import RunnableLambda
+        return RunnableLambda(self.respond)
+
+    def respond(self, prompt_value):
+        from langchain_core.messages import AIMessage
+        with self.lock:
+            self.calls += 1
+        match = re.search(r"(?:Question|Instruction): (.*)", prompt_value.to_string())
+        time.sleep(self.latency_ms / 1000)
+        return AIMessage(content=self.answers.get(match.group(1).strip() if match else "", "SELECT 1"))
+
+
+def load_backend(database_url=None, llm_latency_ms=LLM_LATENCY_MS, routing=False):
+    """
+    Imports Backend/main.py against `database_url` (default: a fresh DuckDB
+    stand-in) with a StubLLM and request logs in a scratch directory. Template
+    routing is off unless `routing`: every benchmark question is curated, so
+    it would answer them all without the prompt, LLM and validation path.
+    Returns (main module, curated pairs, stub).
+    """
+    workdir = tempfile.mkdtemp(prefix="endpoint_bench_")
+    if database_url:
+        os.environ["DATABASE_URL"] = database_url
+    else:
+        print(f"🦆 Building DuckDB stand-in from {os.path.abspath(UNIFIED_DIR)}")
+        os.environ["DATABASE_URL"] = build_standin(os.path.join(workdir, "census.duckdb"))
+    os.environ.setdefault("GROQ_API_KEY", "stub")  # never used: the LLM is stubbed
+
+    sys.path.insert(0, BACKEND_DIR)
+    import main as backend
+    # Request logs go to the scratch directory, not Backend/
+    for name in [n for n in vars(backend) if n.endswith("LOG_FILE")]:
+        setattr(backend, name, os.path.join(workdir, getattr(backend, name)))
+    if not database_url:
+        # The DuckDB dialect can't be introspected through SQLAlchemy's inspector;
+        # database_schema.json describes the same tables
+        backend.load_schema_cache = lambda engine: backend.SchemaCache(
+            backend.SchemaCache.from_file(os.path.join(backend.TEMPLATE_DIR, SCHEMA_FILE)).schema_json,
+            fragment=backend.get_fragment(backend.BACKEND_SCHEMA_FORMAT))
+
+    if not routing:
+        backend.template_router = None
+    pairs = backend.load_curated_pairs(backend.TEMPLATE_DIR)
+    stub = backend.ChatGroq = StubLLM(dict(pairs), llm_latency_ms)
+    return backend, pairs, stub
+
+
+# ==================================================
+# LOAD GENERATION
+# ==================================================
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))] if values else None
+
+
+async def drive(client, endpoint, payloads, concurrency):
+    """Sends every payload with at most `concurrency` in flight; returns latencies (ms), errors, wall time."""
+    queue = list(reversed(payloads))
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        while queue:
+            payload = queue.pop()
+            start = time.perf_counter()
+            resp = await client.post(endpoint, json=payload)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if resp.status_code != 200 or (endpoint == "/execute-sql" and resp.json()["status"] != "success"):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def payloads_for(endpoint, pairs, n):
+    rows = [pairs[i % len(pairs)] for i in range(n)]
+    if endpoint == "/execute-sql":
+        return [{"sql_query": s, "question": q} for q, s in rows]
+    return [{"question": q} for q, _ in rows]
+
+
+async def run_suite(app, pairs, endpoints, levels, n):
+    import httpx
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        for endpoint in endpoints:
+            # Warm-up: schema cache, connection pool, first-call imports
+            await drive(client, endpoint, payloads_for(endpoint, pairs, 1), 1)
+            for level in levels:
+                latencies, errors, wall = await drive(client, endpoint, payloads_for(endpoint, pairs, n), level)
+                row = {
+                    "endpoint": endpoint,
+                    "concurrency": level,
+                    "requests": len(latencies),
+                    "errors": errors,
+                    "throughput_rps": round(len(latencies) / wall, 2),
+                    "mean_ms": round(sum(latencies) / len(latencies), 2),
+                    "p50_ms": round(percentile(latencies, 50), 2),
+                    "p95_ms": round(percentile(latencies, 95), 2),
+                    "p99_ms": round(percentile(latencies, 99), 2),
+                }
+                results.append(row)
+                print(f"   {endpoint:<22} c={level:<3} {row['throughput_rps']:8.2f} req/s  "
+                      f"p50 {row['p50_ms']:8.1f}  p95 {row['p95_ms']:8.1f}  p99 {row['p99_ms']:8.1f} ms"
+                      f"{f'  ({errors} errors)' if errors else ''}")
+    return results
+
+
+# ==================================================
+# REGRESSION GATE
+# ==================================================
+def compare_to_baseline(results, baseline, threshold=THRESHOLD, min_ms=MIN_MS):
+    """Regressions of `results` against a previous report: slower p95, lower throughput or new errors."""
+    previous = {(r["endpoint"], r["concurrency"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        base = previous.get((r["endpoint"], r["concurrency"]))
+        if base is None:
+            continue
+        label = f"{r['endpoint']} c={r['concurrency']}"
+        if r["p95_ms"] > base["p95_ms"] * (1 + threshold) and r["p95_ms"] - base["p95_ms"] >= min_ms:
+            regressions.append(f"{label}: p95 {base['p95_ms']:.1f} -> {r['p95_ms']:.1f} ms")
+        if r["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(f"{label}: throughput {base['throughput_rps']:.2f} -> {r['throughput_rps']:.2f} req/s")
+        if r["errors"] > base["errors"]:
+            regressions.append(f"{label}: errors {base['errors']} -> {r['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency and throughput of the API endpoints under fixed concurrency.")
+    parser.add_argument("--database-url", default=None,
+                        help="Benchmark against this database (e.g. a local Postgres). Default: a DuckDB stand-in "
+                             "built from Pre-Process/unified_outputs/.")
+    parser.add_argument("--endpoints", nargs="+", default=ENDPOINTS, choices=ENDPOINTS)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=CONCURRENCY)
+    parser.add_argument("--requests", type=int, default=REQUESTS_PER_LEVEL, help="Requests per endpoint and level.")
+    parser.add_argument("--llm-latency-ms", type=float, default=LLM_LATENCY_MS)
+    parser.add_argument("--routing", action="store_true",
+                        help="Keep curated-template routing on (measures the template path, not the LLM path).")
+    parser.add_argument("--report", default=REPORT_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="Allowed relative p95/throughput regression against the baseline.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline.")
+    args = parser.parse_args()
+
+    backend, pairs, _ = load_backend(args.database_url, args.llm_latency_ms, args.routing)
+    print(f"📋 {len(pairs)} curated pairs, stub LLM {args.llm_latency_ms:g} ms, "
+          f"{args.requests} requests per level, concurrency {args.concurrency}, "
+          f"template routing {'on' if args.routing else 'off'}")
+
+    results = asyncio.run(run_suite(backend.app, pairs, args.endpoints, args.concurrency, args.requests))
+    report = {
+        "database": "stand-in" if not args.database_url else "external",
+        "llm_latency_ms": args.llm_latency_ms,
+        "routing": args.routing,
+        "requests_per_level": args.requests,
+        "results": results,
+    }
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+    print(f"🧾 Report: {os.path.abspath(args.report)}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"📌 Baseline updated: {os.path.abspath(args.baseline)}")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"ℹ️  No baseline at {args.baseline}; run with --update-baseline to store one.")
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("routing", False) != args.routing:
+        print(f"⚠️  Baseline was recorded with template routing {'on' if baseline.get('routing') else 'off'}; "
+              f"the two modes take different paths, so nothing is compared.")
+        return
+    if baseline.get("llm_latency_ms") != args.llm_latency_ms:
+        print("⚠️  Baseline was recorded with a different stub LLM latency; comparing anyway.")
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for r in regressions:
+            print(f"   {r}")
+        sys.exit(1)
+    print(f"✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import sys
+import time
+import asyncio
+import argparse
+
+from benchmark_endpoints import load_backend
+
+# ==================================================
+# CONFIG
+# ==================================================
+REQUESTS = 20
+LLM_LATENCY_MS = 500    # long enough for every request to arrive while the first is in flight
+
+
+async def fire(app, payloads, endpoint="/generate-select-sql"):
+    import httpx
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check", timeout=None) as client:
+        return await asyncio.gather(*(client.post(endpoint, json=p) for p in payloads))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="N concurrent identical questions must cost exactly one LLM call.")
+    parser.add_argument("--requests", type=int, default=REQUESTS)
+    parser.add_argument("--llm-latency-ms", type=float, default=LLM_LATENCY_MS)
+    args = parser.parse_args()
+
+    backend, pairs, stub = load_backend(llm_latency_ms=args.llm_latency_ms)  # template routing off
+    question = pairs[0][0]
+    # Same question as a dashboard and a class of students would type it
+    variants = [question, question.upper(), f"  {question.rstrip('?')} ?", question.lower() + "  "]
+    payloads = [{"question": variants[i % len(variants)]} for i in range(args.requests)]
+
+    # Warm-up on another question: schema cache, thread pool
+    asyncio.run(fire(backend.app, [{"question": pairs[1][0]}]))
+    stub.calls = 0
+    before = backend.generation_flight.stats()
+
+    start = time.perf_counter()
+    responses = asyncio.run(fire(backend.app, payloads))
+    wall_ms = (time.perf_counter() - start) * 1000
+    after = backend.generation_flight.stats()
+
+    sql = {r.json()["sql_query"] for r in responses if r.status_code == 200}
+    ok = sum(r.status_code == 200 for r in responses)
+    coalesced = after["coalesced"] - before["coalesced"]
+    print(f"📋 {args.requests} concurrent requests for: {question}")
+    print(f"   {ok} ok, {len(sql)} distinct SQL, {stub.calls} LLM call(s), {coalesced} coalesced, {wall_ms:.0f} ms "
+          f"(LLM latency {args.llm_latency_ms:g} ms)")
+    print(f"   /coalescing-stats: {after}")
+    passed = ok == args.requests and len(sql) == 1 and stub.calls == 1 and coalesced == args.requests - 1
+    print("✅ Coalesced into a single LLM call" if passed else "❌ Requests were not coalesced")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+
+# ==================================================
+# CONFIG
+# ==================================================
+LOCAL_MODEL = os.getenv("CENQUERY_LOCAL_MODEL", "defog/llama-3-sqlcoder-8b")
+LORA_ADAPTER = os.getenv("CENQUERY_LORA_ADAPTER", "")            # optional PEFT adapter folder
+MAX_BATCH_SIZE = int(os.getenv("CENQUERY_BATCH_SIZE", "8"))
+BATCH_WINDOW_MS = float(os.getenv("CENQUERY_BATCH_WINDOW_MS", "10"))  # wait this long for a batch to fill
+MAX_NEW_TOKENS = int(os.getenv("CENQUERY_MAX_NEW_TOKENS", "256"))
+LOAD_IN_4BIT = os.getenv("CENQUERY_LOAD_IN_4BIT", "0") == "1"
+
+
+# ==================================================
+# MICRO-BATCHED GENERATION
+# ==================================================
+class BatchedGenerator:
+    """
+    Self-hosted SQLCoder (optionally with a LoRA adapter) behind a micro-batcher.
+    Callers block in `generate(prompt)`; one worker thread takes the first queued
+    prompt, waits up to `batch_window_ms` for up to `max_batch_size - 1` more,
+    left-pads them into one tensor and runs a single greedy `generate()` for
+    all of them, then hands each caller its own completion.
+    """
+
+    def __init__(self, model_path=LOCAL_MODEL, adapter_path=LORA_ADAPTER, max_batch_size=MAX_BATCH_SIZE,
+                 batch_window_ms=BATCH_WINDOW_MS, max_new_tokens=MAX_NEW_TOKENS, load_in_4bit=LOAD_IN_4BIT,
+                 device=None, model=None, tokenizer=None):
+        self.max_batch_size = max(1, max_batch_size)
+        self.batch_window_ms = batch_window_ms
+        self.max_new_tokens = max_new_tokens
+        if model is None:
+            model, tokenizer = self.load(model_path, adapter_path, load_in_4bit, device)
+        self.model, self.tokenizer = model, tokenizer
+        # Prompts of different lengths line up at the end so generation continues each one
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.batches = self.requests = 0
+        self.generate_s = 0.0
+        self.worker = threading.Thread(target=self._run, name="batched-generator", daemon=True)
+        self.worker.start()
+
+    @staticmethod
+    def load(model_path, adapter_path, load_in_4bit, device):
+        import torch
+        from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
+
+        device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        kwargs = {}
+        if load_in_4bit and device == "cuda":
+            kwargs["quantization_config"] = BitsAndBytesConfig(
+                load_in_4bit=True, bnb_4bit_use_double_quant=True,
+                bnb_4bit_quant_type="nf4", bnb_4bit_compute_dtype=torch.float16)
+            kwargs["device_map"] = "auto"
+        print(f"Loading {model_path} on {device.upper()}...")
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+        model = AutoModelForCausalLM.from_pretrained(model_path, **kwargs)
+        if adapter_path:
+            from peft import PeftModel
+            model = PeftModel.from_pretrained(model, adapter_path)
+            print(f"   LoRA adapter: {adapter_path}")
+        if "device_map" not in kwargs:
+            model = model.to(device)
+        model.eval()
+        print("✅ Model loaded successfully.")
+        return model, tokenizer
+
+    # --- Callers ---
+    def submit(self, prompt) -> Future:
+        future = Future()
+        self.queue.put((prompt, future))
+        return future
+
+    def generate(self, prompt, timeout=None) -> str:
+        return self.submit(prompt).result(timeout)
+
+    def as_runnable(self):
+        """Drop-in for the backend's `prompt | llm` chain: returns a message with .content."""
+        from langchain_core.messages import AIMessage
+        from langchain_core.runnables import RunnableLambda
+        return RunnableLambda(lambda prompt_value: AIMessage(content=self.generate(prompt_value.to_string())))
+
+    def stats(self):
+        with self.lock:
+            return {"batches": self.batches, "requests": self.requests,
+                    "mean_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+                    "generate_s": round(self.generate_s, 3), "queued": self.queue.qsize(),
+                    "max_batch_size": self.max_batch_size, "batch_window_ms": self.batch_window_ms}
+
+    def close(self):
+        self.queue.put(None)
+        self.worker.join()
+
+    # --- Worker ---
+    def _collect(self):
+        """Blocks for the first request, then gathers more until the batch is full or the window closes."""
+        first = self.queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.batch_window_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.put(None)  # stop after this batch
+                break
+            batch.append(item)
+        return batch
+
+    def _generate_batch(self, prompts):
+        import torch
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.model.device)
+        with torch.no_grad():
+            outputs = self.model.generate(**inputs, max_new_tokens=self.max_new_tokens, do_sample=False,
+                                          pad_token_id=self.tokenizer.pad_token_id)
+        # Only decode new tokens (left padding puts every prompt's end at the same column)
+        new_tokens = outputs[:, inputs["input_ids"].shape[1]:]
+        return [t.strip() for t in self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)]
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            prompts = [p for p, _ in batch]
+            start = time.perf_counter()
+            try:
+                completions = self._generate_batch(prompts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            finally:
+                with self.lock:
+                    self.batches += 1
+                    self.requests += len(batch)
+                    self.generate_s += time.perf_counter() - start
+            for (_, future), text in zip(batch, completions):
+                future.set_result(text)
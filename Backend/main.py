@@ -1,8 +1,13 @@
 import os
+import sys
 import csv
 import time
+import hashlib
+import threading
+from concurrent.futures import Future
 import pandas as pd
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, FileResponse
 from pydantic import BaseModel, Field
 from sqlalchemy import create_engine, text, inspect
 from langchain_core.prompts import PromptTemplate
@@ -11,18 +16,40 @@ from dotenv import load_dotenv
 from typing import List, Dict, Any, Union
 from fastapi.middleware.cors import CORSMiddleware
 
+# Prompt-building helpers are shared with the training-data generator
+TEMPLATE_DIR = os.getenv("CENQUERY_TEMPLATE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "New-Template"))
+sys.path.append(TEMPLATE_DIR)
+from schema_cache import SchemaCache, SCHEMA_FORMAT, get_fragment
+from schema_linker import SchemaLinker
+from prompt_builder import PromptBuilder
+from template_router import TemplateRouter, THRESHOLD, load_curated_pairs, normalize_question
+from sql_validator import validate_query, repair_query
+from telemetry import Registry, CONTENT_TYPE, ROW_BUCKETS, BYTE_BUCKETS
+import profiling
+
 # --- Configuration ---
 load_dotenv()
 
 GENERATION_LOG_FILE = "generation_log.csv"
 LOG_FILE = "metrics_log.csv"
+PROMPT_LOG_FILE = "prompt_log.csv"  # prompt size vs LLM latency; see New-Template/prompt_builder.py
+ROUTE_LOG_FILE = "route_log.csv"    # which path answered each SELECT question and the time it saved
+VALIDATION_LOG_FILE = "validation_log.csv"  # static check of generated SELECTs: outcome, fixes, time
+# Curated queries answer SELECT questions that match at this confidence (New-Template/template_router.py);
+# above 1 disables the template path
+TEMPLATE_THRESHOLD = float(os.getenv("CENQUERY_TEMPLATE_THRESHOLD", str(THRESHOLD)))
+# Schema serializer for the prompt (New-Template/schema_cache.py SCHEMA_FORMATS)
+BACKEND_SCHEMA_FORMAT = SCHEMA_FORMAT or "columns"
 # Use the DATABASE_URL from environment variables
 DATABASE_URL = os.getenv("DATABASE_URL", "")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable not set. Please add it to your .env file.")
 
+# "groq" (hosted) or "local" (self-hosted SQLCoder, micro-batched; see local_infer.py)
+LLM_BACKEND = os.getenv("CENQUERY_LLM_BACKEND", "groq")
+
 # Check for Groq API key
-if not os.getenv("GROQ_API_KEY"):
+if LLM_BACKEND == "groq" and not os.getenv("GROQ_API_KEY"):
     raise ValueError("GROQ_API_KEY environment variable not set. Please add it to your .env file.")
 
 # --- FastAPI App Initialization ---
@@ -60,6 +87,77 @@ except Exception as e:
     # Exit if DB connection fails
     exit()
 
+# --- Local Model ---
+# Concurrent generation requests (each in its own threadpool worker) are
+# collected into micro-batches and generated together.
+local_generator = None
+if LLM_BACKEND == "local":
+    from local_infer import BatchedGenerator
+    local_generator = BatchedGenerator()
+
+# --- Metrics ---
+# Scraped from /metrics in the Prometheus text format. Each worker thread
+# records into its own shard, so observing a value on the request path takes
+# no lock; the shards are summed at scrape time.
+metrics = Registry()
+REQUESTS = metrics.counter("cenquery_requests_total", "HTTP requests by route and status code.", ["endpoint", "status"])
+REQUEST_SECONDS = metrics.histogram("cenquery_request_seconds", "HTTP request latency by route.", ["endpoint"])
+RESPONSE_BYTES = metrics.histogram("cenquery_response_bytes", "Response payload size by route.", ["endpoint"], BYTE_BUCKETS)
+STAGE_SECONDS = metrics.histogram("cenquery_stage_seconds", "Time spent per request stage: schema_load, "
+                                  "prompt_build, llm, validate, execute, serialize.", ["stage"])
+RESULT_ROWS = metrics.histogram("cenquery_result_rows", "Rows returned by /execute-sql SELECTs.", buckets=ROW_BUCKETS)
+
+def pool_gauge(method):
+    """Reads a SQLAlchemy pool statistic at scrape time; pools without it (NullPool, SQLite) report nothing."""
+    return lambda: getattr(engine.pool, method)()
+
+for _name, _method, _help in [("size", "size", "Configured connection pool size."),
+                              ("checked_in", "checkedin", "Idle connections in the pool."),
+                              ("checked_out", "checkedout", "Connections currently in use."),
+                              ("overflow", "overflow", "Connections opened beyond the pool size.")]:
+    metrics.gauge(f"cenquery_db_pool_{_name}", _help, pool_gauge(_method))
+
+def _endpoint(request):
+    route = request.scope.get("route")
+    return route.path if route is not None else "unmatched"  # raw paths would explode the label set
+
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        # Unhandled errors become a 500 further out; count them here too
+        REQUESTS.inc(_endpoint(request), "500")
+        REQUEST_SECONDS.observe(time.perf_counter() - start, _endpoint(request))
+        raise
+    endpoint = _endpoint(request)
+    REQUESTS.inc(endpoint, str(response.status_code))
+    REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint)
+    size = response.headers.get("content-length")
+    if size is not None:
+        RESPONSE_BYTES.observe(int(size), endpoint)
+    return response
+
+# --- Profiling ---
+# A slow question can be profiled on demand (X-Profile: sample|cprofile plus
+# X-Admin-Token) or a CENQUERY_PROFILE_SAMPLE_RATE fraction of API requests is
+# profiled unasked; see profiling.py. The profile id comes back in X-Profile-Id
+# and the file is served from /profiles/{id}.
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    mode, trigger = profiling.requested_mode(request.url.path, request.headers, request.query_params)
+    profile = profiling.begin(mode, request.url.path, trigger) if mode else None
+    if profile is None:
+        return await call_next(request)
+    try:
+        response = await call_next(request)
+    finally:
+        path = profiling.end(profile)
+    if path:
+        response.headers["X-Profile-Id"] = profile.id
+    return response
+
 # --- Pydantic Models ---
 class GenerateSQLRequest(BaseModel):
     question: str = Field(..., description="The natural language instruction to convert to SQL.")
@@ -97,48 +195,336 @@ def log_metrics(question: str | None, sql_query: str, latency: float, status: st
             writer.writerow(["question", "sql_query", "latency_ms", "status"])
         writer.writerow([question or "N/A", sql_query, latency, status])
 
+def log_prompt(question: str, plan: dict, llm_latency: float):
+    """Logs the prompt's token count, what the budget dropped, and the LLM call latency."""
+    file_exists = os.path.isfile(PROMPT_LOG_FILE)
+    with open(PROMPT_LOG_FILE, "a", newline="") as f:
+        writer = csv.writer(f)
+        if not file_exists:
+            writer.writerow(["question", "prompt_tokens", "budget", "tables", "columns",
+                             "dropped_tables", "dropped_columns", "llm_latency_ms"])
+        writer.writerow([question, plan["tokens"], plan["budget"], plan["tables"], plan["columns"],
+                         len(plan["dropped_tables"]), plan["dropped_columns"], llm_latency])
+
 # --- Core Logic ---
-def get_schema(engine):
-    """Retrieves the schema for all tables in the public schema for PostgreSQL."""
+# Inspecting every table on each request is slow; the schema is read once and
+# rendered through a SchemaCache until a DDL statement invalidates it.
+# With CENQUERY_SCHEMA_TOP_K set, wide tables are pruned to the question's
+# top-k columns, the same way the training prompts were built, and with
+# CENQUERY_PROMPT_TOKEN_BUDGET the least relevant columns are dropped until the
+# prompt fits.
+# The cache and its builder are published and read as one tuple: requests
+# take a local reference, so a concurrent first load or DDL invalidation
+# can't leave them seeing one without the other.
+schema_state: tuple[SchemaCache, PromptBuilder] | None = None
+
+def load_schema_cache(engine) -> SchemaCache:
+    """Reads the public schema into the database_schema.json layout used by SchemaCache."""
+    inspector = inspect(engine)
+    schema_json = {}
+    for table_name in inspector.get_table_names(schema='public'):
+        columns = inspector.get_columns(table_name, schema='public')
+        pk = inspector.get_pk_constraint(table_name, schema='public').get('constrained_columns') or []
+        fks = inspector.get_foreign_keys(table_name, schema='public')
+        schema_json[table_name] = {
+            "columns": [{"name": col['name'], "type": str(col['type']), "constraints": []} for col in columns],
+            "primary_key": pk,
+            "foreign_keys": [{"column": c, "references": f"{fk['referred_table']}({r})"}
+                             for fk in fks for c, r in zip(fk['constrained_columns'], fk['referred_columns'])],
+        }
+    return SchemaCache(schema_json, fragment=get_fragment(BACKEND_SCHEMA_FORMAT))
+
+def invalidate_schema_cache():
+    global schema_state
+    schema_state = None
+
+def get_schema(engine, tables=None, question=None, prompt=None):
+    """
+    Retrieves the schema for all tables (or just `tables`) in the public schema for PostgreSQL,
+    pruned to the columns relevant to `question` when CENQUERY_SCHEMA_TOP_K is set.
+    With a `prompt` template the schema is fitted to the token budget; returns (schema, plan).
+    """
+    global schema_state
     try:
-        inspector = inspect(engine)
-        schema_info = []
-        table_names = inspector.get_table_names(schema='public')
-        for table_name in table_names:
-            columns = inspector.get_columns(table_name, schema='public')
-            column_names = ", ".join([col['name'] for col in columns])
-            schema_info.append(f"Table '{table_name}' has columns: {column_names}")
-        return "\n".join(schema_info)
+        state = schema_state
+        if state is None:
+            with STAGE_SECONDS.time("schema_load"):
+                cache = load_schema_cache(engine)
+            state = schema_state = (cache, PromptBuilder(cache, SchemaLinker(cache.schema_json)))
+        schema_cache, prompt_builder = state
+        if prompt is not None:
+            with STAGE_SECONDS.time("prompt_build"):
+                selection, plan = prompt_builder.select(
+                    question, tables or schema_cache.schema_json,
+                    lambda s: prompt.format(schema=s, question=question))
+            return schema_cache.render_selection(selection), plan
+        if question and prompt_builder.linker.top_k:
+            selection = prompt_builder.linker.link(question, tables or schema_cache.schema_json)
+            return schema_cache.render_selection(selection)
+        return schema_cache.render(tables)
     except Exception as e:
         print(f"Error retrieving schema: {e}")
+        if prompt is not None:
+            return "Could not retrieve schema from the database.", None
         return "Could not retrieve schema from the database."
 
-def _generate_query(question: str, prompt_template: str) -> GenerateSQLResponse:
-    """Helper function to invoke the LLM for SQL generation."""
-    db_schema = get_schema(engine)
-    if "Could not retrieve" in db_schema:
-         raise HTTPException(status_code=500, detail="Could not retrieve database schema.")
-    
+# --- Request Coalescing ---
+# A class firing the same question at once would otherwise cost one LLM call
+# per student: concurrent requests with the same normalized question, prompt
+# and schema share the first one's call.
+class SingleFlight:
+    """Runs one call per key at a time; callers arriving meanwhile wait for it and share its result (or error)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight: Dict[str, Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            call = self.in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self.in_flight[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return call.result()
+        try:
+            result = fn()
+            call.set_result(result)
+            return result
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+    def stats(self):
+        with self.lock:
+            total = self.calls + self.coalesced
+            return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self.in_flight),
+                    "coalesced_rate": round(self.coalesced / total, 4) if total else 0.0}
+
+generation_flight = SingleFlight()
+
+# --- Static Check & Repair ---
+# Generated SELECTs are checked against the cached schema catalog before they
+# reach /execute-sql: misspelled tables/columns are renamed to the nearest
+# real ones, and only if that fails is the LLM asked once more, with the errors.
+REPAIR_PROMPT = """
+    The PostgreSQL query below was written for the question, but it does not match the database schema.
+    Errors: {errors}
+
+    Schema:
+    {schema}
+
+    Question: {question}
+
+    Query:
+    {sql}
+
+    Output only the corrected SQL SELECT query.
+    """
+
+class ValidationStats:
+    """Static-check outcomes and the time spent checking."""
+
+    OUTCOMES = ("valid", "repaired", "reprompted", "failed")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = dict.fromkeys(self.OUTCOMES, 0)
+        self.validate_ms = 0.0
+
+    def record(self, outcome, validate_ms):
+        with self.lock:
+            self.counts[outcome] += 1
+            self.validate_ms += validate_ms
+
+    def stats(self):
+        with self.lock:
+            total = sum(self.counts.values())
+            return {**self.counts, "checked": total,
+                    "validate_ms_mean": round(self.validate_ms / total, 3) if total else 0.0}
+
+validation_stats = ValidationStats()
+
+def log_validation(question: str, outcome: str, errors: list, fixes: list, validate_ms: float, reprompt_ms: float):
+    """Logs the static check of one generated query."""
+    file_exists = os.path.isfile(VALIDATION_LOG_FILE)
+    with open(VALIDATION_LOG_FILE, "a", newline="") as f:
+        writer = csv.writer(f)
+        if not file_exists:
+            writer.writerow(["question", "outcome", "errors", "fixes", "validate_ms", "reprompt_ms"])
+        writer.writerow([question, outcome, "; ".join(errors), "; ".join(fixes), validate_ms, reprompt_ms])
+
+def check_and_repair(sql: str, catalog: dict):
+    """
+    (sql, ok, errors, fixes): the query as generated if it resolves, else its
+    edit-distance repair if that resolves; `errors` are the original query's.
+    """
+    errors = validate_query(sql, catalog)["errors"]
+    if not errors:
+        return sql, True, [], []
+    fixed, fixes = repair_query(sql, catalog)
+    if fixes and validate_query(fixed, catalog)["ok"]:
+        return fixed, True, errors, fixes
+    return sql, False, errors, fixes
+
+def validate_generated(question: str, sql: str, db_schema: str, llm) -> str:
+    """Static check of a generated SELECT; repairs it locally or, failing that, re-prompts the LLM once."""
+    state = schema_state
+    catalog = state[0].catalog if state else None
+    if catalog is None:
+        return sql
+    start = time.perf_counter()
+    try:
+        checked, ok, errors, fixes = check_and_repair(sql, catalog)
+    except Exception:
+        return sql  # beyond the checker; leave it to the database
+    validate_ms, reprompt_ms = (time.perf_counter() - start) * 1000, 0.0
+    if ok:
+        outcome = "repaired" if fixes else "valid"
+    else:
+        start = time.perf_counter()
+        try:
+            chain = PromptTemplate(input_variables=["errors", "schema", "question", "sql"], template=REPAIR_PROMPT) | llm
+            content = chain.invoke({"errors": "; ".join(errors), "schema": db_schema, "question": question, "sql": sql}).content
+            retry = content.strip().replace("`", "").replace("sql", "")
+            reprompt_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            retry, ok, retry_errors, retry_fixes = check_and_repair(retry, catalog)
+            validate_ms += (time.perf_counter() - start) * 1000
+            fixes += retry_fixes
+            errors += [f"after re-prompt: {e}" for e in retry_errors]
+        except Exception as e:
+            reprompt_ms = (time.perf_counter() - start) * 1000
+            ok, errors = False, errors + [f"re-prompt failed: {str(e).splitlines()[0] if str(e) else type(e).__name__}"]
+        if ok:
+            outcome, checked = "reprompted", retry
+        else:
+            outcome = "failed"  # /execute-sql will report the database's own error
+    validation_stats.record(outcome, validate_ms)
+    log_validation(question, outcome, errors, fixes, round(validate_ms, 3), round(reprompt_ms, 2))
+    return checked
+
+# --- Template Routing ---
+# SELECT questions are first matched against the curated templates. Matching
+# takes microseconds, so a confident match answers before any LLM request is
+# sent (nothing billable is started and thrown away); otherwise the LLM
+# answers as before. The LLM latency a template answer saved is estimated
+# from recent LLM calls.
+template_router = TemplateRouter(load_curated_pairs(TEMPLATE_DIR), TEMPLATE_THRESHOLD) if TEMPLATE_THRESHOLD <= 1 else None
+
+class RouteStats:
+    """Which path answered, and the LLM time the template path saved."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wins = {"template": 0, "llm": 0}
+        self.saved_ms = 0.0
+        self.llm_ms = []         # observed LLM latencies, for estimating the time a template answer saved
+
+    def llm_latency_estimate(self):
+        with self.lock:
+            recent = self.llm_ms[-100:]
+            return sum(recent) / len(recent) if recent else 0.0
+
+    def record(self, winner, saved_ms=0.0, llm_ms=None):
+        with self.lock:
+            self.wins[winner] += 1
+            self.saved_ms += saved_ms
+            if llm_ms is not None:
+                self.llm_ms.append(llm_ms)
+                del self.llm_ms[:-1000]
+
+    def stats(self):
+        with self.lock:
+            template = self.wins["template"]
+            return {**self.wins, "saved_ms_total": round(self.saved_ms, 1),
+                    "saved_ms_per_template_win": round(self.saved_ms / template, 1) if template else 0.0}
+
+route_stats = RouteStats()
+
+def log_route(question: str, winner: str, confidence: float | None, latency_ms: float, saved_ms: float):
+    """Logs which path answered a question and how much LLM time that saved (estimated from recent calls)."""
+    file_exists = os.path.isfile(ROUTE_LOG_FILE)
+    with open(ROUTE_LOG_FILE, "a", newline="") as f:
+        writer = csv.writer(f)
+        if not file_exists:
+            writer.writerow(["question", "winner", "confidence", "latency_ms", "saved_ms"])
+        writer.writerow([question, winner, confidence, latency_ms, saved_ms])
+
+def _route(question: str):
+    """The curated SQL for a confidently matched question (stats and logs recorded), else (None, match)."""
+    start = time.perf_counter()
+    match = template_router.match(question)
+    if match and match["confidence"] >= template_router.threshold:
+        template_ms = round((time.perf_counter() - start) * 1000, 3)
+        saved = round(max(0.0, route_stats.llm_latency_estimate() - template_ms), 2)
+        route_stats.record("template", saved)
+        log_route(question, "template", match["confidence"], template_ms, saved)
+        log_generation(question, match["sql"])
+        return match["sql"], match
+    return None, match
+
+@profiling.attached
+def _generate_query(question: str, prompt_template: str, select: bool = False) -> GenerateSQLResponse:
+    """
+    Helper function to invoke the LLM for SQL generation. `select` questions
+    are answered from the curated templates when they match confidently;
+    otherwise the LLM's query is statically checked against the schema.
+    """
+    match = None
+    if select and template_router is not None:
+        sql, match = _route(question)
+        if sql is not None:
+            return GenerateSQLResponse(question=question, sql_query=sql)
+
     prompt = PromptTemplate(
         input_variables=["schema", "question"],
         template=prompt_template
     )
-    
-    llm = ChatGroq(model="llama-3.1-8b-instant", temperature=0)
-    sql_generation_chain = prompt | llm
-    
-    try:
-        response_content = sql_generation_chain.invoke({"schema": db_schema, "question": question}).content
-        sql_query = response_content.strip().replace("`", "").replace("sql", "") # Clean up LLM output
-        # Log the successful generation
-        log_generation(question, sql_query)
-        return GenerateSQLResponse(question=question, sql_query=sql_query)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"LLM Error: {e}")
+
+    db_schema, plan = get_schema(engine, question=question, prompt=prompt)
+    if "Could not retrieve" in db_schema:
+         raise HTTPException(status_code=500, detail="Could not retrieve database schema.")
+
+    def generate() -> str:
+        llm = local_generator.as_runnable() if local_generator else ChatGroq(model="llama-3.1-8b-instant", temperature=0)
+        sql_generation_chain = prompt | llm
+
+        try:
+            start = time.perf_counter()
+            response_content = sql_generation_chain.invoke({"schema": db_schema, "question": question}).content
+            llm_s = time.perf_counter() - start
+            STAGE_SECONDS.observe(llm_s, "llm")
+            log_prompt(question, plan, round(llm_s * 1000, 2))
+            if select and template_router is not None:
+                route_stats.record("llm", llm_ms=llm_s * 1000)
+                log_route(question, "llm", match["confidence"] if match else None, round(llm_s * 1000, 2), 0.0)
+            sql_query = response_content.strip().replace("`", "").replace("sql", "") # Clean up LLM output
+            if select:
+                with STAGE_SECONDS.time("validate"):
+                    sql_query = validate_generated(question, sql_query, db_schema, llm)
+            # Log the successful generation
+            log_generation(question, sql_query)
+            return sql_query
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"LLM Error: {e}")
+
+    key = hashlib.sha256("\x00".join([normalize_question(question), prompt_template, db_schema]).encode("utf-8")).hexdigest()
+    return GenerateSQLResponse(question=question, sql_query=generation_flight.do(key, generate))
 
 # --- API Endpoints ---
+# The generation endpoints block on the LLM, so they are plain functions:
+# FastAPI runs them in its threadpool instead of stalling the event loop.
 @app.post("/generate-select-sql", response_model=GenerateSQLResponse)
-async def generate_select_sql(request: GenerateSQLRequest):
+def generate_select_sql(request: GenerateSQLRequest):
     """
     Accepts a natural language question and returns a `SELECT` SQL query.
     """
@@ -159,10 +545,10 @@ async def generate_select_sql(request: GenerateSQLRequest):
 
     SQL SELECT Query:
     """
-    return _generate_query(request.question, prompt_template)
+    return _generate_query(request.question, prompt_template, select=True)
 
 @app.post("/generate-other-sql", response_model=GenerateSQLResponse)
-async def generate_other_sql(request: GenerateSQLRequest):
+def generate_other_sql(request: GenerateSQLRequest):
     """
     Accepts a natural language instruction and returns a DML (INSERT, UPDATE, DELETE) or DDL (CREATE, ALTER) SQL command.
     **Warning:** Use with caution as this can modify the database.
@@ -194,6 +580,7 @@ async def generate_other_sql(request: GenerateSQLRequest):
     return _generate_query(request.question, prompt_template)
 
 @app.post("/execute-sql", response_model=ExecuteSQLResponse)
+@profiling.attached
 async def execute_sql(request: ExecuteSQLRequest):
     """
     Executes a given SQL query and returns the result from the database.
@@ -206,12 +593,17 @@ async def execute_sql(request: ExecuteSQLRequest):
         with engine.connect() as connection:
             # For queries that don't return rows (like INSERT, UPDATE, DELETE), use a transaction
             if any(keyword in request.sql_query.strip().upper() for keyword in ["INSERT", "UPDATE", "DELETE", "CREATE", "ALTER", "DROP"]):
-                 with connection.begin(): # Start transaction
+                 with connection.begin(), STAGE_SECONDS.time("execute"): # Start transaction
                     result_proxy = connection.execute(text(request.sql_query))
                     result = {"rows_affected": result_proxy.rowcount}
+                 if any(keyword in request.sql_query.upper() for keyword in ["CREATE", "ALTER", "DROP"]):
+                    invalidate_schema_cache()
             else: # For SELECT queries
-                df = pd.read_sql_query(sql=text(request.sql_query), con=connection)
-                result = df.to_dict(orient='records')
+                with STAGE_SECONDS.time("execute"):
+                    df = pd.read_sql_query(sql=text(request.sql_query), con=connection)
+                with STAGE_SECONDS.time("serialize"):
+                    result = df.to_dict(orient='records')
+                RESULT_ROWS.observe(len(df))
 
             status = "success"
     except Exception as e:
@@ -228,6 +620,62 @@ async def execute_sql(request: ExecuteSQLRequest):
         status=status
     )
 
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    """Request counts, per-stage latency histograms, result sizes and DB pool gauges in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+def require_admin(request: Request):
+    if not profiling.authorized(request.headers.get("x-admin-token")):
+        raise HTTPException(status_code=403, detail="Admin token required.")
+
+@app.get("/profiles", include_in_schema=False)
+def list_profiles(request: Request):
+    """Recently saved request profiles, newest first (admin token required)."""
+    require_admin(request)
+    return profiling.list_profiles()
+
+@app.get("/profiles/{profile_id}", include_in_schema=False)
+def download_profile(profile_id: str, request: Request):
+    """A saved profile: .speedscope.json opens in speedscope.app, .pstats in `python -m pstats` or snakeviz."""
+    require_admin(request)
+    path = profiling.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return FileResponse(path, filename=os.path.basename(path))
+
+@app.get("/validation-stats", include_in_schema=False)
+async def validation_stats_endpoint():
+    """Outcomes of the static check of generated SELECTs (valid, repaired, reprompted, failed), since startup."""
+    return validation_stats.stats()
+
+@app.get("/routing-stats", include_in_schema=False)
+async def routing_stats():
+    """Template vs LLM wins for SELECT questions and the LLM time saved, since startup."""
+    return route_stats.stats()
+
+@app.get("/batching-stats", include_in_schema=False)
+async def batching_stats():
+    """Micro-batch sizes and generate() time of the local model (CENQUERY_LLM_BACKEND=local)."""
+    return local_generator.stats() if local_generator else {}
+
+@app.get("/schema-cache-stats", include_in_schema=False)
+async def schema_cache_stats():
+    """Hit statistics of the rendered-schema cache since startup (or the last DDL)."""
+    state = schema_state
+    return state[0].stats() if state else {"tables": 0, "table_sets": 0, "hits": 0, "misses": 0, "hit_rate": 0.0}
+
+@app.get("/prompt-stats", include_in_schema=False)
+async def prompt_stats():
+    """Token-count distribution of the prompts built since startup (or the last DDL)."""
+    state = schema_state
+    return state[1].size_summary() if state else {}
+
+@app.get("/coalescing-stats", include_in_schema=False)
+async def coalescing_stats():
+    """LLM calls made vs generation requests that shared an in-flight call, since startup."""
+    return generation_flight.stats()
+
 @app.get("/", include_in_schema=False)
 async def root():
     return {"message": "Text-to-SQL API is running. Go to /docs for the API documentation."}
@@ -0,0 +1,270 @@
+import os
+import sys
+import hmac
+import json
+import time
+import uuid
+import pstats
+import random
+import cProfile
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# ==================================================
+# CONFIG
+# ==================================================
+PROFILE_DIR = os.getenv("CENQUERY_PROFILE_DIR", "profiles")
+ADMIN_TOKEN = os.getenv("CENQUERY_ADMIN_TOKEN", "")          # unset: on-demand profiling and /profiles are off
+SAMPLE_RATE = float(os.getenv("CENQUERY_PROFILE_SAMPLE_RATE", "0"))  # fraction of API requests profiled unasked
+INTERVAL_MS = float(os.getenv("CENQUERY_PROFILE_INTERVAL_MS", "2"))  # statistical sampler period
+KEEP = int(os.getenv("CENQUERY_PROFILE_KEEP", "50"))          # older profile files are deleted
+MAX_ACTIVE = int(os.getenv("CENQUERY_PROFILE_MAX_ACTIVE", "2"))  # more concurrent requests run unprofiled
+
+# Random sampling only covers the question/SQL endpoints, not stats scrapes
+SAMPLED_PATHS = {"/generate-select-sql", "/generate-other-sql", "/execute-sql"}
+
+# "sample" (statistical, speedscope JSON) or "cprofile" (deterministic, pstats)
+MODES = {"sample": ".speedscope.json", "cprofile": ".pstats"}
+DEFAULT_MODE = "sample"
+
+_current = contextvars.ContextVar("cenquery_profile", default=None)
+_slots = threading.BoundedSemaphore(max(1, MAX_ACTIVE))
+
+
+# ==================================================
+# PROFILE
+# ==================================================
+class Profile:
+    """
+    Profile of one request. A request can hop threads (the event loop for
+    async endpoints, a threadpool worker for sync ones), so threads join it with
+    `attach()` while they work on it. In "sample" mode one sampler thread
+    records the attached threads' stacks every `interval_ms`; in "cprofile"
+    mode every attached thread runs its own cProfile and the stats are merged.
+    """
+
+    def __init__(self, mode=DEFAULT_MODE, interval_ms=INTERVAL_MS, label="", trigger=""):
+        self.id = uuid.uuid4().hex
+        self.mode, self.interval_ms, self.label, self.trigger = mode, interval_ms, label, trigger
+        self.lock = threading.Lock()
+        self.threads = {}         # thread id -> attach depth
+        self.names = {}           # thread id -> thread name
+        self.samples = {}         # thread id -> [(stack of frame indices, weight ms)]
+        self.frames, self.frame_index = [], {}
+        self.cprofiles = []
+        self.stopped = threading.Event()
+        self.start = time.perf_counter()
+        self.duration_ms = 0.0
+        self.sampler = None
+        if mode == "sample":
+            self.sampler = threading.Thread(target=self._sample, name=f"profile-{self.id[:8]}", daemon=True)
+            self.sampler.start()
+
+    # --- Threads ---
+    def enter(self):
+        tid = threading.get_ident()
+        with self.lock:
+            depth = self.threads.get(tid, 0)
+            self.threads[tid] = depth + 1
+            self.names[tid] = threading.current_thread().name
+        if self.mode == "cprofile" and depth == 0:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return profiler
+        return None
+
+    def exit(self, profiler=None):
+        tid = threading.get_ident()
+        if profiler is not None:
+            profiler.disable()
+        with self.lock:
+            if self.threads[tid] > 1:
+                self.threads[tid] -= 1
+            else:
+                del self.threads[tid]
+            if profiler is not None and not self.stopped.is_set():
+                self.cprofiles.append(profiler)
+
+    # --- Statistical sampler ---
+    def _frame(self, code):
+        key = (code.co_filename, code.co_firstlineno, code.co_name)
+        index = self.frame_index.get(key)
+        if index is None:
+            index = self.frame_index[key] = len(self.frames)
+            self.frames.append({"name": getattr(code, "co_qualname", code.co_name),
+                                "file": code.co_filename, "line": code.co_firstlineno})
+        return index
+
+    def _sample(self):
+        last = time.perf_counter()
+        while not self.stopped.wait(self.interval_ms / 1000):
+            now = time.perf_counter()
+            weight, last = (now - last) * 1000, now
+            with self.lock:
+                tids = list(self.threads)
+            frames = sys._current_frames()
+            for tid in tids:
+                frame = frames.get(tid)
+                stack = []
+                while frame is not None:
+                    stack.append(self._frame(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    self.samples.setdefault(tid, []).append((stack[::-1], weight))
+
+    # --- Output ---
+    def stop(self):
+        self.duration_ms = (time.perf_counter() - self.start) * 1000
+        self.stopped.set()
+        if self.sampler is not None:
+            self.sampler.join()
+
+    def save(self, directory=PROFILE_DIR):
+        """Writes <id>.speedscope.json or <id>.pstats; returns the path, or None if nothing was recorded."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.id + MODES[self.mode])
+        if self.mode == "cprofile":
+            with self.lock:
+                profilers = list(self.cprofiles)
+            if not profilers:
+                return None
+            stats = pstats.Stats(profilers[0])
+            for profiler in profilers[1:]:
+                stats.add(profiler)
+            stats.dump_stats(path)
+        else:
+            if not self.samples:
+                return None
+            profiles = []
+            for tid, samples in self.samples.items():
+                total = sum(w for _, w in samples)
+                profiles.append({"type": "sampled", "name": f"{self.label} {self.names[tid]}", "unit": "milliseconds",
+                                 "startValue": 0, "endValue": round(total, 3),
+                                 "samples": [s for s, _ in samples], "weights": [round(w, 3) for _, w in samples]})
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"$schema": "https://www.speedscope.app/file-format-schema.json",
+                           "name": f"{self.label} ({self.duration_ms:.0f} ms)", "exporter": "cenquery",
+                           "activeProfileIndex": 0, "shared": {"frames": self.frames}, "profiles": profiles}, f)
+        _prune(directory)
+        return path
+
+
+# ==================================================
+# REQUEST HOOKS
+# ==================================================
+def authorized(token):
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token or "", ADMIN_TOKEN)
+
+
+def requested_mode(path, headers, query):
+    """
+    (mode, trigger) to profile a request in, or (None, None). On demand with
+    `X-Profile: sample|cprofile` (or `?profile=`) plus the admin token in the
+    `X-Admin-Token` header (never a query parameter: URLs end up in access
+    logs and browser history); otherwise a SAMPLE_RATE fraction of API
+    requests in "sample" mode.
+    """
+    mode = headers.get("x-profile") or query.get("profile")
+    if mode:
+        if not authorized(headers.get("x-admin-token")):
+            return None, None
+        return (mode if mode in MODES else DEFAULT_MODE), "requested"
+    if SAMPLE_RATE > 0 and path in SAMPLED_PATHS and random.random() < SAMPLE_RATE:
+        return DEFAULT_MODE, "sampled"
+    return None, None
+
+
+def begin(mode, label, trigger):
+    """Starts a profile for the current request, or returns None if MAX_ACTIVE are already running."""
+    if not _slots.acquire(blocking=False):
+        return None
+    profile = Profile(mode, label=label, trigger=trigger)
+    profile.context_token = _current.set(profile)
+    return profile
+
+
+def end(profile):
+    """Stops and saves `profile`; returns the saved path (or None)."""
+    _current.reset(profile.context_token)
+    try:
+        profile.stop()
+        path = profile.save()
+        if path:
+            _index[profile.id] = {"endpoint": profile.label, "mode": profile.mode, "trigger": profile.trigger,
+                                  "duration_ms": round(profile.duration_ms, 2)}
+        return path
+    finally:
+        _slots.release()
+
+
+@contextmanager
+def attach():
+    """Adds the calling thread to the current request's profile (if any) for the duration of the block."""
+    profile = _current.get()
+    if profile is None or profile.stopped.is_set():
+        yield
+        return
+    profiler = profile.enter()
+    try:
+        yield
+    finally:
+        profile.exit(profiler)
+
+
+def attached(fn):
+    """Decorator: the function's thread is profiled with the request while it runs (sync or async)."""
+    if hasattr(fn, "__code__") and fn.__code__.co_flags & 0x80:  # CO_COROUTINE
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with attach():
+                return await fn(*args, **kwargs)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with attach():
+                return fn(*args, **kwargs)
+    return wrapper
+
+
+# ==================================================
+# STORAGE
+# ==================================================
+_index = {}   # profile id -> request details, for profiles saved since startup
+
+
+def _prune(directory):
+    files = sorted((os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(tuple(MODES.values()))),
+                   key=os.path.getmtime, reverse=True)
+    for old in files[KEEP:]:
+        os.remove(old)
+        _index.pop(os.path.basename(old).split(".")[0], None)
+
+
+def list_profiles(directory=PROFILE_DIR):
+    """Saved profiles, newest first."""
+    if not os.path.isdir(directory):
+        return []
+    rows = []
+    for name in os.listdir(directory):
+        suffix = next((s for s in MODES.values() if name.endswith(s)), None)
+        if suffix is None:
+            continue
+        path = os.path.join(directory, name)
+        profile_id = name[:-len(suffix)]
+        rows.append({"id": profile_id, "file": name, "bytes": os.path.getsize(path),
+                     "created": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(os.path.getmtime(path))),
+                     **_index.get(profile_id, {})})
+    return sorted(rows, key=lambda r: r["created"], reverse=True)
+
+
+def profile_path(profile_id, directory=PROFILE_DIR):
+    """Path of a saved profile, or None; ids are uuid hex, so nothing outside `directory` can be named."""
+    if len(profile_id) != 32 or any(c not in "0123456789abcdef" for c in profile_id):
+        return None
+    for suffix in MODES.values():
+        path = os.path.join(directory, profile_id + suffix)
+        if os.path.isfile(path):
+            return path
+    return None
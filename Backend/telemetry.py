@@ -0,0 +1,163 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+# ==================================================
+# CONFIG
+# ==================================================
+# Seconds; LLM calls dominate the top end, schema renders the bottom
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ==================================================
+# REGISTRY
+# ==================================================
+class Registry:
+    """
+    Metrics in the Prometheus text format. Every thread writes to its own
+    shard (a plain dict), so recording a value takes no lock; `render()` sums
+    the shards of all threads that ever recorded anything.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self._shards = []
+        self._local = threading.local()
+        self._lock = threading.Lock()   # only taken when a thread records its first value
+
+    def shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(self, name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(self, name, help, labels, buckets))
+
+    def gauge(self, name, help, fn):
+        return self._add(Gauge(self, name, help, fn))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collect(self, name):
+        """{label values: value} for one metric, summed over thread shards."""
+        with self._lock:
+            shards = list(self._shards)
+        total = {}
+        for shard in shards:
+            for (metric, labels), value in list(shard.items()):
+                if metric != name:
+                    continue
+                if isinstance(value, list):
+                    acc = total.setdefault(labels, [0] * len(value))
+                    for i, v in enumerate(value):
+                        acc[i] += v
+                else:
+                    total[labels] = total.get(labels, 0) + value
+        return total
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + [f'{n}="{v}"' for n, v in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ==================================================
+# METRICS
+# ==================================================
+class Counter:
+    type = "counter"
+
+    def __init__(self, registry, name, help, labels):
+        self.registry, self.name, self.help, self.labels = registry, name, help, tuple(labels)
+
+    def inc(self, *labels, amount=1):
+        shard = self.registry.shard()
+        key = (self.name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def render(self):
+        return [f"{self.name}{_labels(self.labels, k)} {_number(v)}"
+                for k, v in sorted(self.registry.collect(self.name).items())]
+
+
+class Histogram:
+    """Per-bucket counts (non-cumulative while recording) plus sum, kept as one list per label set."""
+    type = "histogram"
+
+    def __init__(self, registry, name, help, labels, buckets):
+        self.registry, self.name, self.help, self.labels = registry, name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        shard = self.registry.shard()
+        key = (self.name, labels)
+        counts = shard.get(key)
+        if counts is None:
+            counts = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def render(self):
+        lines = []
+        for k, counts in sorted(self.registry.collect(self.name).items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts[:-1]):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_labels(self.labels, k, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, k)} {_number(counts[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, k)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Read at scrape time from `fn()`, which returns {label dict as tuple of pairs: value} or a number."""
+    type = "gauge"
+
+    def __init__(self, registry, name, help, fn):
+        self.registry, self.name, self.help, self.fn = registry, name, help, fn
+
+    def render(self):
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        if not isinstance(value, dict):
+            return [f"{self.name} {_number(value)}"]
+        return [f"{self.name}{_labels([], [], k)} {_number(v)}" for k, v in sorted(value.items())]
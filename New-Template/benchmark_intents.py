@@ -0,0 +1,85 @@
+import os
+import glob
+import time
+import argparse
+from collections import Counter
+
+from intent_matcher import INTENTS, INTENT_MATCHER
+
+# ==================================================
+# CONFIG
+# ==================================================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+QUESTION_FILES = [os.path.join(BASE_DIR, "question.txt")] + sorted(
+    glob.glob(os.path.join(BASE_DIR, "dataset", "*question*.txt"))
+)
+
+
+def load_questions(paths):
+    questions = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            questions.extend(l.strip() for l in f if l.strip())
+    return questions
+
+
+def substring_detect_intents(question: str):
+    """The previous detect_intents: one `in` scan per keyword, no word boundaries."""
+    q = question.lower()
+    active = set()
+    for intent, groups in INTENTS.items():
+        if any(t in q for t in groups["strong"]):
+            active.add(intent)
+    if active:
+        for intent, groups in INTENTS.items():
+            if any(t in q for t in groups["weak"]):
+                active.add(intent)
+    return active
+
+
+def time_it(fn, questions, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for q in questions:
+            fn(q)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intent detection over the curated questions.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--show", type=int, default=10, help="Number of changed questions to print.")
+    args = parser.parse_args()
+
+    questions = load_questions(QUESTION_FILES)
+    print(f"📋 {len(questions)} questions, {INTENT_MATCHER.keyword_count} keywords")
+
+    old_s = time_it(substring_detect_intents, questions, args.repeat)
+    new_s = time_it(lambda q: INTENT_MATCHER.detect(q), questions, args.repeat)
+    print(f"⏱️  substring scan : {old_s * 1e6 / len(questions):8.1f} µs/question")
+    print(f"⏱️  automaton      : {new_s * 1e6 / len(questions):8.1f} µs/question ({old_s / new_s:.1f}x)")
+
+    changed = []
+    for q in questions:
+        old, (new, matches) = substring_detect_intents(q), INTENT_MATCHER.detect(q)
+        if old != new:
+            changed.append((q, old - new, new - old))
+
+    print(f"🔀 Intent sets changed for {len(changed)} / {len(questions)} questions")
+    per_intent = Counter()
+    for _, dropped, added in changed:
+        per_intent.update(f"-{i}" for i in dropped)
+        per_intent.update(f"+{i}" for i in added)
+    print(f"   {dict(per_intent.most_common())}")
+    for q, dropped, added in changed[:args.show]:
+        print(f"   - {q}")
+        if dropped:
+            print(f"       dropped: {sorted(dropped)}")
+        if added:
+            print(f"       added:   {sorted(added)}")
+
+
+if __name__ == "__main__":
+    main()
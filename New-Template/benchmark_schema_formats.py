@@ -0,0 +1,181 @@
+import os
+import re
+import time
+import json
+import argparse
+import statistics
+
+from sqlalchemy import create_engine, text
+
+from schema_cache import SchemaCache, SCHEMA_FORMATS
+from schema_linker import SchemaLinker
+from prompt_builder import PromptBuilder, TokenCounter
+from sql_validator import validate_query
+from verify_queries import result_hash
+from benchmark_schema_linking import load_pairs, percentile, LLM_MODEL
+from generate_training_data import SCHEMA_FILE, DATASET_DIR, select_tables, format_entry
+
+# ==================================================
+# CONFIG
+# ==================================================
+# Same shape as the backend's SELECT prompt
+BACKEND_PROMPT = """Given the database schema below, write a PostgreSQL SELECT query that answers the question.
+
+Schema:
+{schema}
+
+Question: {question}
+
+SQL SELECT Query:"""
+
+REPORT_FILE = "schema_format_report.json"
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+# ==================================================
+# MODELS
+# ==================================================
+class StubModel:
+    """
+    Offline stand-in for the LLM: answers with the gold SQL when every table and
+    column it uses appears verbatim in the prompt's schema, otherwise with
+    nothing. It measures what a format (or pruning) loses, not model skill.
+    """
+
+    name = "stub"
+
+    def __init__(self, gold):
+        self.gold = gold  # question -> (sql, {table: cols})
+
+    def generate(self, question, prompt):
+        sql, columns = self.gold[question]
+        schema = set(IDENTIFIER.findall(prompt.split("Question:", 1)[0].lower()))
+        needed = set(columns) | {c for cols in columns.values() for c in cols}
+        return sql if needed <= schema else ""
+
+
+class GroqModel:
+    """The backend's model; needs GROQ_API_KEY."""
+
+    def __init__(self, model=LLM_MODEL):
+        from langchain_groq import ChatGroq
+        self.name = model
+        self.llm = ChatGroq(model=model, temperature=0)
+
+    def generate(self, question, prompt):
+        content = self.llm.invoke(prompt).content
+        return content.strip().replace("`", "").replace("sql", "")  # same cleanup as the backend
+
+
+# ==================================================
+# EXECUTION
+# ==================================================
+def execute(engine, sql, cache):
+    """Order-insensitive result fingerprint, or None on error; memoized per SQL text."""
+    if not sql.strip():
+        return None
+    if sql not in cache:
+        try:
+            with engine.connect() as conn:
+                result = conn.execute(text(sql))
+                cache[sql] = result_hash(list(result.keys()), result.fetchall())
+        except Exception:
+            cache[sql] = None
+    return cache[sql]
+
+
+# ==================================================
+# BENCHMARK
+# ==================================================
+def bench_format(name, schema_json, pairs, counter, model, engine, results_cache, top_k, budget):
+    cache = SchemaCache(schema_json, fragment=SCHEMA_FORMATS[name])
+    builder = PromptBuilder(cache, SchemaLinker(schema_json, top_k=top_k), budget=budget, counter=counter)
+
+    training = [counter.count(format_entry(q, s, cache.render(t))["text"]) for q, s, t, _ in pairs]
+
+    backend, correct, executed, gen_ms = [], 0, 0, []
+    for q, s, _, _ in pairs:
+        prompt, plan = builder.build(q, schema_json, lambda x: BACKEND_PROMPT.format(schema=x, question=q))
+        backend.append(plan["tokens"])
+        if model is None:
+            continue
+        start = time.perf_counter()
+        predicted = model.generate(q, prompt)
+        gen_ms.append((time.perf_counter() - start) * 1000)
+        gold = execute(engine, s, results_cache)
+        if gold is None:
+            continue  # gold query fails on this database; not scored
+        executed += 1
+        correct += execute(engine, predicted, results_cache) == gold
+    return {
+        "format": name,
+        "training_tokens_mean": round(statistics.mean(training), 1),
+        "training_tokens_p95": percentile(training, 95),
+        "backend_tokens_mean": round(statistics.mean(backend), 1),
+        "backend_tokens_p95": percentile(backend, 95),
+        "scored": executed,
+        "execution_accuracy": round(correct / executed, 4) if executed else None,
+        "generate_ms_p50": round(percentile(gen_ms, 50), 2) if gen_ms else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt size and execution accuracy per schema serializer.")
+    parser.add_argument("--formats", nargs="+", default=list(SCHEMA_FORMATS), choices=list(SCHEMA_FORMATS))
+    parser.add_argument("--dataset-dir", default=DATASET_DIR)
+    parser.add_argument("--model", choices=["none", "stub", "groq"], default="stub")
+    parser.add_argument("--dsn", default=os.getenv("DB_CONNECTION_STRING"),
+                        help="Database for execution accuracy, e.g. duckdb:///census.duckdb (default: $DB_CONNECTION_STRING).")
+    parser.add_argument("--limit", type=int, default=0, help="Only the first N pairs (0 = all).")
+    parser.add_argument("--top-k", type=int, default=0, help="Also prune columns like the backend would.")
+    parser.add_argument("--token-budget", type=int, default=0)
+    parser.add_argument("--report", default=REPORT_FILE)
+    args = parser.parse_args()
+
+    schema_json = SchemaCache.from_file(SCHEMA_FILE).schema_json
+    catalog = SchemaCache(schema_json).catalog
+    pairs = []
+    for q, s in load_pairs(args.dataset_dir)[:args.limit or None]:
+        verdict = validate_query(s, catalog)
+        if verdict["ok"]:
+            pairs.append((q, s, select_tables(q) | set(verdict["tables"]), verdict["columns"]))
+
+    model = engine = None
+    if args.model != "none":
+        if not args.dsn:
+            print("⚠️  No --dsn / DB_CONNECTION_STRING; reporting prompt sizes only.")
+        elif args.model == "groq" and not os.getenv("GROQ_API_KEY"):
+            print("⚠️  GROQ_API_KEY not set; reporting prompt sizes only.")
+        else:
+            engine = create_engine(args.dsn)
+            model = GroqModel() if args.model == "groq" else \
+                StubModel({q: (s, cols) for q, s, _, cols in pairs})
+
+    counter = TokenCounter()
+    print(f"📋 {len(pairs)} valid pairs, tokenizer {counter.name}, model {model.name if model else 'none'}")
+    results_cache = {}
+    rows = [bench_format(name, schema_json, pairs, counter, model, engine, results_cache, args.top_k, args.token_budget)
+            for name in args.formats]
+
+    base = next((r for r in rows if r["format"] == "ddl"), rows[0])
+    print(f"\n   {'format':<12} {'train tok':>9} {'p95':>6} {'backend tok':>11} {'p95':>6} {'vs ' + base['format']:>8} {'exec acc':>9}")
+    for r in rows:
+        saved = 1 - r["backend_tokens_mean"] / base["backend_tokens_mean"]
+        acc = f"{r['execution_accuracy']:.1%}" if r["execution_accuracy"] is not None else "-"
+        print(f"   {r['format']:<12} {r['training_tokens_mean']:9.0f} {r['training_tokens_p95']:6.0f} "
+              f"{r['backend_tokens_mean']:11.0f} {r['backend_tokens_p95']:6.0f} {saved:8.1%} {acc:>9}")
+
+    scored = [r for r in rows if r["execution_accuracy"] is not None]
+    if scored:
+        best = max(r["execution_accuracy"] for r in scored)
+        cheapest = min((r for r in scored if r["execution_accuracy"] >= best), key=lambda r: r["backend_tokens_mean"])
+        print(f"\n🏆 Cheapest format at top accuracy ({best:.1%}): {cheapest['format']}")
+
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"model": model.name if model else None, "top_k": args.top_k, "token_budget": args.token_budget,
+                   "pairs": len(pairs), "tokenizer": counter.name, "formats": rows}, f, indent=4)
+    print(f"🧾 Report: {os.path.abspath(args.report)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import os
+import re
+import time
+import argparse
+import statistics
+
+from schema_cache import SchemaCache, column_list_fragment
+from schema_linker import SchemaLinker
+from sql_validator import validate_query
+from generate_training_data import (
+    SCHEMA_FILE, QUESTIONS_FILE, SQL_FILE, DATASET_DIR,
+    discover_pairs, load_questions, load_sql_queries, select_tables, format_entry,
+)
+
+# ==================================================
+# CONFIG
+# ==================================================
+TOP_KS = [4, 8, 16]
+LLM_MODEL = "llama-3.1-8b-instant"
+
+
+def approx_tokens(text):
+    # Word pieces and punctuation; close enough to BPE counts for comparing prompts
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+
+def load_pairs(dataset_dir):
+    pairs = []
+    for q_path, s_path in [(QUESTIONS_FILE, SQL_FILE)] + discover_pairs(dataset_dir):
+        pairs.extend(zip(load_questions(q_path), load_sql_queries(s_path)))
+    return pairs
+
+
+def bench_training(pairs, schema, top_ks):
+    """Training prompts: intent-selected tables as DDL, full vs pruned (no gold columns forced in)."""
+    prepared = []
+    for q, s in pairs:
+        verdict = validate_query(s, schema.catalog)
+        tables = select_tables(q) | set(verdict["tables"])
+        prepared.append((q, s, tables, verdict["columns"]))
+
+    full = [approx_tokens(format_entry(q, s, schema.render(t))["text"]) for q, s, t, _ in prepared]
+    print(f"\n📚 Training prompts ({len(prepared)} pairs, DDL of selected tables)")
+    print(f"   {'top-k':>6} {'mean tok':>9} {'p95 tok':>8} {'saved':>7} {'col recall':>11} {'full recall':>12} {'link µs':>8}")
+    print(f"   {'full':>6} {statistics.mean(full):9.0f} {percentile(full, 95):8.0f}")
+
+    for k in top_ks:
+        linker = SchemaLinker(schema.schema_json, top_k=k)
+        tokens, hit, total, complete = [], 0, 0, 0
+        start = time.perf_counter()
+        selections = [linker.link(q, t) for q, _, t, _ in prepared]
+        link_us = (time.perf_counter() - start) * 1e6 / len(prepared)
+        for (q, s, _, gold), selection in zip(prepared, selections):
+            tokens.append(approx_tokens(format_entry(q, s, schema.render_selection(selection))["text"]))
+            missing = 0
+            for table, cols in gold.items():
+                kept = selection.get(table)
+                for c in cols:
+                    total += 1
+                    if kept is None or c in kept:
+                        hit += 1
+                    else:
+                        missing += 1
+            complete += missing == 0
+        saved = 1 - statistics.mean(tokens) / statistics.mean(full)
+        print(f"   {k:>6} {statistics.mean(tokens):9.0f} {percentile(tokens, 95):8.0f} {saved:7.1%} "
+              f"{hit / total:11.1%} {complete / len(prepared):12.1%} {link_us:8.0f}")
+
+
+def bench_backend(pairs, schema_json, top_ks):
+    """Backend prompts: every table as a column list, full vs pruned."""
+    cache = SchemaCache(schema_json, fragment=column_list_fragment)
+    full = approx_tokens(cache.render())
+    print(f"\n🌐 Backend schema text (all {len(schema_json)} tables, column lists)")
+    print(f"   {'top-k':>6} {'mean tok':>9} {'saved':>7}")
+    print(f"   {'full':>6} {full:9.0f}")
+    for k in top_ks:
+        linker = SchemaLinker(schema_json, top_k=k)
+        tokens = [approx_tokens(cache.render_selection(linker.link(q, schema_json))) for q, _ in pairs]
+        print(f"   {k:>6} {statistics.mean(tokens):9.0f} {1 - statistics.mean(tokens) / full:7.1%}")
+
+
+def bench_llm(pairs, schema_json, top_k, n):
+    """Wall-clock generation latency with the backend's model, full vs pruned schema."""
+    from langchain_groq import ChatGroq
+
+    llm = ChatGroq(model=LLM_MODEL, temperature=0)
+    cache = SchemaCache(schema_json, fragment=column_list_fragment)
+    linker = SchemaLinker(schema_json, top_k=top_k)
+    print(f"\n⏱️  LLM latency ({LLM_MODEL}, {n} questions, top-k {top_k})")
+    for label, render in (("full", lambda q: cache.render()),
+                          ("pruned", lambda q: cache.render_selection(linker.link(q, schema_json)))):
+        timings = []
+        for q, _ in pairs[:n]:
+            prompt = f"Schema:\n{render(q)}\n\nQuestion: {q}\n\nSQL SELECT Query:"
+            start = time.perf_counter()
+            llm.invoke(prompt)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"   {label:<7} p50 {percentile(timings, 50):7.0f} ms   p95 {percentile(timings, 95):7.0f} ms")
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt-size and recall benchmark for schema linking.")
+    parser.add_argument("--top-k", type=int, nargs="+", default=TOP_KS)
+    parser.add_argument("--dataset-dir", default=DATASET_DIR)
+    parser.add_argument("--llm", type=int, default=0, metavar="N",
+                        help="Also time N real generations (needs GROQ_API_KEY).")
+    args = parser.parse_args()
+
+    schema = SchemaCache.from_file(SCHEMA_FILE)
+    pairs = load_pairs(args.dataset_dir)
+    bench_training(pairs, schema, args.top_k)
+    bench_backend(pairs, schema.schema_json, args.top_k)
+    if args.llm:
+        if not os.getenv("GROQ_API_KEY"):
+            print("⚠️  GROQ_API_KEY not set; skipping LLM latency.")
+        else:
+            bench_llm(pairs, schema.schema_json, args.top_k[len(args.top_k) // 2], args.llm)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import os
+import sys
+import glob
+import json
+import hashlib
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from verify_queries import DualLogger, load_queries, sql_key, make_engine, percentile, SQL_FILE, STATEMENT_TIMEOUT_MS
+
+load_dotenv()
+
+# ==================================================
+# CONFIG
+# ==================================================
+OUTPUT_FILE = "explain_output.txt"
+DATASET_DIR = "dataset"
+REPORT_FILE = "plan_report.json"
+BASELINE_FILE = "plan_baseline.json"
+
+# EXPLAIN ANALYZE timings are skewed by concurrent queries; one connection by default
+POOL_SIZE = 1
+REPEAT = 3                 # runs per query; the fastest execution is kept
+SLOWDOWN_FACTOR = 1.5      # flag queries this much slower than the baseline...
+SLOWDOWN_MIN_MS = 5        # ...and at least this many ms slower (server-side execution time)
+
+EXPLAIN = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+BUFFER_KEYS = ["Shared Hit Blocks", "Shared Read Blocks", "Shared Dirtied Blocks", "Shared Written Blocks",
+               "Temp Read Blocks", "Temp Written Blocks"]
+
+
+# ==================================================
+# PLAN SUMMARY
+# ==================================================
+def node_label(node):
+    label = node["Node Type"]
+    if "Relation Name" in node:
+        label += f"[{node['Relation Name']}]"
+    if "Index Name" in node:
+        label += f"<{node['Index Name']}>"
+    return label
+
+
+def plan_shape(node):
+    """Plan tree as text, without costs or timings: Hash Join(Seq Scan[a],Hash(Index Scan[b]<b_pkey>))."""
+    children = node.get("Plans", [])
+    if not children:
+        return node_label(node)
+    return f"{node_label(node)}({','.join(plan_shape(c) for c in children)})"
+
+
+def walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def summarize_plan(explain_json):
+    """The parts of one EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) result worth tracking across runs."""
+    if isinstance(explain_json, str):
+        explain_json = json.loads(explain_json)
+    top = explain_json[0]
+    plan = top["Plan"]
+    nodes = list(walk(plan))
+    node_types = {}
+    for n in nodes:
+        node_types[n["Node Type"]] = node_types.get(n["Node Type"], 0) + 1
+    shape = plan_shape(plan)
+    return {
+        "shape": shape,
+        "shape_hash": hashlib.sha256(shape.encode("utf-8")).hexdigest()[:16],
+        "node_types": node_types,
+        "seq_scans": sorted({n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan" and "Relation Name" in n}),
+        # The top node's counters include its children's
+        "buffers": {k: plan.get(k, 0) for k in BUFFER_KEYS},
+        "rows": plan.get("Actual Rows"),
+        "planning_ms": round(top.get("Planning Time", 0.0), 3),
+        "execution_ms": round(top.get("Execution Time", 0.0), 3),
+    }
+
+
+def explain_query(engine, file, index, sql, key, repeat=REPEAT):
+    entry = {"id": f"{file}#{index}", "file": file, "index": index, "key": key, "sql": sql}
+    try:
+        runs = []
+        with engine.connect() as conn:
+            for _ in range(repeat):
+                runs.append(summarize_plan(conn.execute(text(EXPLAIN + sql)).scalar()))
+                conn.rollback()  # ANALYZE really runs the statement
+        # Plan and buffers of the fastest run; its timing is the least disturbed
+        entry.update(min(runs, key=lambda r: r["execution_ms"]), status="ok")
+    except Exception as e:
+        message = str(e).splitlines()[0]
+        entry.update(status="timeout" if "statement timeout" in message else "error", error=message)
+    return entry
+
+
+# ==================================================
+# DIFF
+# ==================================================
+def diff_plans(current, previous, factor=SLOWDOWN_FACTOR, min_ms=SLOWDOWN_MIN_MS):
+    """
+    Compares two plan reports by query text. New sequential scans and
+    slowdowns are regressions; other plan-shape changes are reported only.
+    """
+    before = {q["key"]: q for q in previous.get("queries", [])}
+    diff = {"seq_scans": [], "slowdowns": [], "errors": [], "plan_changed": [], "fixed": []}
+    for q in current["queries"]:
+        old = before.get(q["key"])
+        if old is None:
+            continue
+        if old["status"] == "ok" and q["status"] != "ok":
+            diff["errors"].append({"id": q["id"], "error": q.get("error")})
+            continue
+        if old["status"] != "ok":
+            if q["status"] == "ok":
+                diff["fixed"].append({"id": q["id"]})
+            continue
+        new_seq = sorted(set(q["seq_scans"]) - set(old["seq_scans"]))
+        if new_seq:
+            diff["seq_scans"].append({"id": q["id"], "tables": new_seq,
+                                      "before": old["shape"], "after": q["shape"]})
+        elif q["shape_hash"] != old["shape_hash"]:
+            diff["plan_changed"].append({"id": q["id"], "before": old["shape"], "after": q["shape"]})
+        if q["execution_ms"] > old["execution_ms"] * factor and q["execution_ms"] - old["execution_ms"] >= min_ms:
+            diff["slowdowns"].append({"id": q["id"], "ms_before": old["execution_ms"], "ms_after": q["execution_ms"],
+                                      "shared_read_before": old["buffers"]["Shared Read Blocks"],
+                                      "shared_read_after": q["buffers"]["Shared Read Blocks"]})
+    return diff
+
+
+# ==================================================
+# RUN
+# ==================================================
+def explain_queries(sql_files, dsn, pool_size=POOL_SIZE, timeout_ms=STATEMENT_TIMEOUT_MS, repeat=REPEAT):
+    engine = make_engine(dsn, pool_size, timeout_ms)
+    if engine.dialect.name != "postgresql":
+        raise ValueError(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) needs PostgreSQL, not {engine.dialect.name}")
+    tasks, seen = [], {}
+    for path in sql_files:
+        for i, sql in enumerate(load_queries(path), 1):
+            key = sql_key(sql)
+            seen[key] = seen.get(key, 0) + 1
+            tasks.append((os.path.basename(path), i, sql, f"{key}-{seen[key]}"))
+    if not tasks:
+        print("⚠️  No queries found to explain.")
+        return None
+
+    print(f"📋 Explaining {len(tasks)} queries x{repeat} on {pool_size} connection(s)...\n")
+    with ThreadPoolExecutor(max_workers=pool_size) as pool:
+        results = list(pool.map(lambda t: explain_query(engine, *t, repeat=repeat), tasks))
+    engine.dispose()
+
+    for q in results:
+        if q["status"] == "ok":
+            seq = f"  seq: {','.join(q['seq_scans'])}" if q["seq_scans"] else ""
+            print(f"✅ {q['id']:<35} {q['execution_ms']:>9.2f} ms  {q['buffers']['Shared Read Blocks']:>6} read{seq}")
+        else:
+            print(f"❌ {q['id']:<35} {q['error']}")
+
+    ok = [q for q in results if q["status"] == "ok"]
+    timings = [q["execution_ms"] for q in ok]
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "files": [os.path.abspath(p) for p in sql_files],
+        "repeat": repeat,
+        "summary": {
+            "queries": len(results),
+            "ok": len(ok),
+            "errors": len(results) - len(ok),
+            "with_seq_scan": sum(bool(q["seq_scans"]) for q in ok),
+            "p50_ms": percentile(timings, 50),
+            "p95_ms": percentile(timings, 95),
+            "shared_read_blocks": sum(q["buffers"]["Shared Read Blocks"] for q in ok),
+        },
+        "queries": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE the golden queries and diff plans against a baseline.")
+    parser.add_argument("files", nargs="*", default=None,
+                        help=f"SQL files (default: {SQL_FILE} and {DATASET_DIR}/*.sql).")
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE)
+    parser.add_argument("--timeout-ms", type=int, default=STATEMENT_TIMEOUT_MS)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--slowdown-factor", type=float, default=SLOWDOWN_FACTOR)
+    parser.add_argument("--report", default=REPORT_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true", help="Save this run as the new baseline.")
+    args = parser.parse_args()
+
+    sys.stdout.reconfigure(encoding='utf-8')  # type: ignore
+    sys.stderr.reconfigure(encoding='utf-8')  # type: ignore
+    sys.stdout = DualLogger(OUTPUT_FILE)
+    sys.stderr = sys.stdout
+
+    dsn = os.getenv("DB_CONNECTION_STRING")
+    if not dsn:
+        print("❌ Error: DB_CONNECTION_STRING not found in .env file.")
+        sys.exit(1)
+    files = args.files or [SQL_FILE] + sorted(glob.glob(os.path.join(DATASET_DIR, "*.sql")))
+
+    try:
+        report = explain_queries(files, dsn, args.pool_size, args.timeout_ms, args.repeat)
+    except Exception as e:
+        print(f"\n❌ Database Error: {e}")
+        sys.exit(1)
+    if report is None:
+        return
+
+    failing = False
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            previous = json.load(f)
+        diff = report["diff"] = diff_plans(report, previous, args.slowdown_factor)
+        print("-" * 50)
+        print(f"🔍 Diff vs {args.baseline} ({previous.get('generated_at')}):")
+        for name in ("seq_scans", "slowdowns", "errors", "plan_changed", "fixed"):
+            print(f"   {name:<13} {len(diff[name])}")
+            for item in diff[name][:10]:
+                print(f"      {item}")
+        failing = bool(diff["seq_scans"] or diff["slowdowns"] or diff["errors"])
+
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📌 Baseline saved: {os.path.abspath(args.baseline)}")
+
+    s = report["summary"]
+    print("-" * 50)
+    print(f"📊 {s['queries']} queries: {s['ok']} explained, {s['errors']} errors, {s['with_seq_scan']} with a seq scan")
+    print(f"⏱️  execution p50 {s['p50_ms']} ms, p95 {s['p95_ms']} ms, {s['shared_read_blocks']} shared blocks read")
+    print(f"🧾 Report: {os.path.abspath(args.report)}")
+    sys.exit(1 if failing else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,19 @@
 import json
 import os
 import re
-import csv
 import sys
+import glob
+import time
+import hashlib
+import argparse
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 
-from sqlalchemy.sql import text
-from sqlalchemy.dialects import postgresql
+from intent_matcher import INTENT_MATCHER
+from schema_cache import SchemaCache, SCHEMA_FORMAT, SCHEMA_FORMATS, get_fragment
+from schema_linker import SchemaLinker, TOP_K
+from prompt_builder import PromptBuilder, TOKEN_BUDGET, size_summary
+from sql_validator import validate_query
 
 # ==================================================
 # LOGGING
@@ -25,31 +32,54 @@ class DualLogger:
         self.log.flush()
 
 
-sys.stdout.reconfigure(encoding="utf-8")  # type: ignore
-sys.stderr.reconfigure(encoding="utf-8")  # type: ignore
-
 LOG_DIR = "logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-LOG_FILE = os.path.join(
-    LOG_DIR, f"cenquery_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-)
+LOG_FILE = None
+
+
+def setup_logging():
+    # Called from __main__ only, so pool workers importing this module don't
+    # each open a log file and redirect stdout
+    global LOG_FILE
+    sys.stdout.reconfigure(encoding="utf-8")  # type: ignore
+    sys.stderr.reconfigure(encoding="utf-8")  # type: ignore
 
-sys.stdout = DualLogger(LOG_FILE)
-sys.stderr = sys.stdout
+    os.makedirs(LOG_DIR, exist_ok=True)
+    LOG_FILE = os.path.join(
+        LOG_DIR, f"cenquery_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+    )
+
+    sys.stdout = DualLogger(LOG_FILE)
+    sys.stderr = sys.stdout
 
 
 # ==================================================
 # CONFIG
 # ==================================================
-BASE_DATA_DIR = "data"
-
 SCHEMA_FILE = "database_schema.json"
 QUESTIONS_FILE = "question.txt"
 SQL_FILE = "queries.sql"
 OUTPUT_DIR = "training_data"
 
+# Batch mode (--batch)
+DATASET_DIR = "dataset"
+BATCH_OUTPUT_DIR = os.path.join(OUTPUT_DIR, "batch")
+SHARD_PREFIX = "train_batch"
+SHARD_SIZE = 500        # records per JSONL shard
+CHUNK_SIZE = 50         # question/SQL pairs per worker task
+
 MAX_OPTIONAL_TABLES = 6
 
+# Question-aware column pruning (schema_linker): keys + top-k columns per wide
+# table; 0 keeps full tables. Defaults to CENQUERY_SCHEMA_TOP_K like the backend.
+COLUMN_TOP_K = TOP_K
+
+# Prompt token budget (prompt_builder); 0 = unlimited. The LoRA notebook trains
+# at MAX_SEQ_LENGTH 2048, so --token-budget 2048 keeps every SQL target intact.
+PROMPT_TOKEN_BUDGET = TOKEN_BUDGET
+
+# Schema serializer (schema_cache.SCHEMA_FORMATS); training data has always used DDL
+TRAIN_SCHEMA_FORMAT = SCHEMA_FORMAT or "ddl"
+
 # These tables are ALWAYS included
 CORE_TABLES = {
     "regions",
@@ -60,110 +90,6 @@ CORE_TABLES = {
 }
 
 
-# ==================================================
-# CSV LOADERS
-# ==================================================
-def load_csv_keywords(filename, column):
-    path = os.path.join(BASE_DATA_DIR, filename)
-    out = set()
-    with open(path, encoding="utf-8") as f:
-        for row in csv.DictReader(f):
-            v = row[column].strip().lower()
-            if v:
-                out.add(v)
-    return out
-
-
-LANGUAGE_KEYWORDS = load_csv_keywords("languages.csv", "name")
-RELIGION_KEYWORDS = load_csv_keywords("religions.csv", "religion_name")
-AGE_GROUP_KEYWORDS = load_csv_keywords("age_groups.csv", "name")
-
-
-# ==================================================
-# INTENT DEFINITIONS (FINAL)
-# ==================================================
-INTENTS = {
-    "population": {
-        "strong": {
-            "population", "people", "persons", "count", "total",
-            "live", "living", "men", "women", "male", "female", 
-            "boys", "girls", "sex ratio", "gender", "households",
-            "dwellers", "villagers", "citizens", "residents"
-        },
-        "weak": {
-            "most", "least", "largest", "smallest", "fewest",
-            "more", "less", "higher", "lower",
-            "ratio", "gap", "difference", "percentage", "percent"
-        }
-    },
-
-    "religion": {
-        "strong": RELIGION_KEYWORDS | {
-            "religion", "religious", "faith", "community",
-            "parsi", "parsis", "zoroastrian", "zoroastrians"
-        },
-        "weak": set()
-    },
-
-    "language": {
-        "strong": LANGUAGE_KEYWORDS | {
-            "language", "languages", "spoken", "speakers", "mother tongue"
-        },
-        "weak": set()
-    },
-
-    "education": {
-        "strong": {
-            "literacy", "literate", "illiterate",
-            "education", "educated", "schooling", "school", 
-            "university", "college", "degree", "diploma", "pre-primary"
-        },
-        "weak": {"rate"}
-    },
-
-    "occupation": {
-        "strong": {
-            "work", "working", "worker", "employment",
-            "non-worker", "workforce", "participation",
-            "job", "jobs", "employed", "unemployed", "cultivator",
-            "labourer", "agricultural", "paid", "cash"
-        },
-        "weak": set()
-    },
-
-    "health": {
-        "strong": {
-            "health", "mortality", "fertility", "disease", "anaemia", "diabetes",
-            "vaccinated", "vaccination", "vaccine", "vaccines", 
-            "stunting", "stunted", "wasting", "wasted",
-            "underweight", "overweight", "obese", "obesity", "bmi",
-            "birth", "births", "delivery", "deliveries", "antenatal", "postnatal",
-            "breastfed", "breastfeeding", "diet", "nutrition",
-            "blood sugar", "blood pressure", "hypertension",
-            "hygienic", "menstruation", "sanitation", "clean fuel", "cooking fuel",
-            "electricity", "drinking water", "water", "toilet",
-            "internet", "bank account", "mobile phone", "insurance",
-            "violence", "crime", "tobacco", "alcohol", "smoking",
-            "fever", "ari", "diarrhoea", "treatment", "advice",
-            "vitamin", "iodized", "salt", "cancer", "screening", "c-section",
-            "hiv", "aids", "condom", "knowledge",
-            "anaemic", "pregnant", "pregnancy", "married", "marriage", 
-            "waist", "hip", "folic", "acid", "decision", "owning", "house", "land",
-            "registered", "registration", "authority"
-        },
-        "weak": set()
-    },
-
-    "age": {
-        "strong": AGE_GROUP_KEYWORDS | {
-            "age", "children", "elderly", "youth",
-            "adult", "adults", "working age", "teenagers", "seniors", 
-            "0-6", "15-49", "60+"
-        },
-        "weak": set()
-    }
-}
-
 # ==================================================
 # RULE GRAPH (FINAL FIX)
 # ==================================================
@@ -188,29 +114,21 @@ RULES = [
 # ==================================================
 # SCHEMA
 # ==================================================
-def load_schema(path):
-    with open(path, encoding="utf-8") as f:
-        return json.load(f)
+def load_schema(path, schema_format=None):
+    # Per-table DDL is rendered once here; build_schema() is then a memo lookup
+    return SchemaCache.from_file(path, get_fragment(schema_format or TRAIN_SCHEMA_FORMAT))
+
+
+def load_builder(schema, top_k, budget):
+    return PromptBuilder(schema, SchemaLinker(schema.schema_json, top_k=top_k), budget=budget)
 
 
 # ==================================================
 # INTENT DETECTION
 # ==================================================
 def detect_intents(question: str):
-    q = question.lower()
-    active = set()
-
-    # Strong first
-    for intent, groups in INTENTS.items():
-        if any(t in q for t in groups["strong"]):
-            active.add(intent)
-
-    # Weak only if something already active
-    if active:
-        for intent, groups in INTENTS.items():
-            if any(t in q for t in groups["weak"]):
-                active.add(intent)
-
+    # One Aho-Corasick pass over the question; whole-word hits only
+    active, _ = INTENT_MATCHER.detect(question)
     return active
 
 
@@ -235,38 +153,21 @@ def select_tables(question: str):
 # ==================================================
 # SCHEMA BUILD
 # ==================================================
-def build_schema(schema_json, tables):
-    ddl = []
-    for t in sorted(tables):
-        if t not in schema_json:
-            continue
-        cols = []
-        for c in schema_json[t]["columns"]:
-            d = f"{c['name']} {c['type']}"
-            if "PK" in c.get("constraints", []):
-                d += " PRIMARY KEY"
-            cols.append(d)
-        ddl.append(f"CREATE TABLE {t} ({', '.join(cols)});")
-    return "\n".join(ddl)
+def build_schema(schema, tables):
+    return schema.render(tables)
 
 
 # ==================================================
 # SQL VALIDATION
 # ==================================================
-def validate_sql_syntax(sql):
-    try:
-        text(sql).compile(dialect=postgresql.dialect())
-        return True, None
-    except Exception as e:
-        return False, str(e)
-
-
-def used_tables(sql):
-    found = set()
-    for a, b in re.findall(r"\bFROM\s+(\w+)|\bJOIN\s+(\w+)", sql, re.I):
-        if a: found.add(a)
-        if b: found.add(b)
-    return found
+def validate_sql_syntax(sql, catalog):
+    """
+    Real parse + table/column resolution against database_schema.json.
+    Returns (ok, error, tables, columns): the real tables the query reads,
+    including those inside CTEs and subqueries, and {table: columns} it uses.
+    """
+    verdict = validate_query(sql, catalog)
+    return verdict["ok"], "; ".join(verdict["errors"]) or None, set(verdict["tables"]), verdict["columns"]
 
 # =========================
 # LOAD QUESTIONS / SQL
@@ -299,6 +200,29 @@ This query will run on a database whose schema is represented in this string:
 {sql}"""
     }
 
+def build_entry(schema, question, sql, builder=None):
+    """Returns (entry, real_missing); raises ValueError on invalid SQL."""
+    ok, err, used_tables, used_columns = validate_sql_syntax(sql, schema.catalog)
+    if not ok:
+        raise ValueError(f"❌ Invalid SQL:\n{sql}\n{err}")
+
+    tables = select_tables(question)
+
+    # Real tables the SQL reads but the intent rules didn't select
+    real_missing = used_tables - tables
+
+    # Auto-fix for output generation
+    tables |= real_missing
+
+    if builder is None:
+        return format_entry(question, sql, build_schema(schema, tables)), real_missing
+
+    # Same pruning/budgeting as inference; the gold SQL's tables and columns are
+    # never dropped so the target never references something missing from the prompt
+    required = {t: used_columns.get(t, []) for t in used_tables}
+    prompt, _ = builder.build(question, tables, lambda s: format_entry(question, sql, s)["text"], required=required)
+    return {"text": prompt}, real_missing
+
 # =========================
 # UNIQUE OUTPUT FILE
 # =========================
@@ -321,7 +245,8 @@ def main():
     member = input("Enter your name: ").strip().replace(" ", "_") or "Member"
     out_path = get_unique_filename(OUTPUT_DIR, f"train_{member}.jsonl")
 
-    schema_json = load_schema(SCHEMA_FILE)
+    schema = load_schema(SCHEMA_FILE)
+    builder = load_builder(schema, COLUMN_TOP_K, PROMPT_TOKEN_BUDGET)
     questions = load_questions(QUESTIONS_FILE)
     sqls = load_sql_queries(SQL_FILE)
 
@@ -329,33 +254,204 @@ def main():
     n= 1
     with open(out_path, "w", encoding="utf-8") as out:
         for q, s in zip(questions, sqls):
-            ok, err = validate_sql_syntax(s)
-            if not ok:
-                raise ValueError(f"❌ Invalid SQL syntax:\n{s}\n{err}")
-
-            tables = select_tables(q)
-            
-            # Helper to check for missing real tables (ignores CTEs)
-            missing = used_tables(s) - tables
-            real_missing = {t for t in missing if t in schema_json}
-            
+            entry, real_missing = build_entry(schema, q, s, builder)
+
             if real_missing:
                 print("-" * 60)
                 print(f"🧠 Question {n}: {q}")
-                print("📊 Selected tables:", sorted(tables))
+                print("📊 Selected tables:", sorted(select_tables(q)))
                 print("⚠️ Missing tables:", real_missing)
-            
-            # Auto-fix for output generation
-            tables |= real_missing
 
-            schema = build_schema(schema_json, tables)
-            out.write(json.dumps(format_entry(q, s, schema)) + "\n")
+            out.write(json.dumps(entry) + "\n")
             n+=1
 
     print(f"✅ Generated {len(questions)} samples")
     print(f"📂 Saved to {out_path}")
+    print(schema.report())
+    print(builder.report())
     print(f"🧾 Log: {LOG_FILE}")
 
 
+# ==================================================
+# BATCH MODE
+# ==================================================
+def discover_pairs(dataset_dir):
+    """Pairs 'x_question(s)_y.txt' with 'x_queries_y.sql' in a dataset folder."""
+    def key(path):
+        stem = os.path.splitext(os.path.basename(path))[0].lower()
+        return re.sub(r"questions?|queries", "", stem)
+
+    sql_files = {key(p): p for p in glob.glob(os.path.join(dataset_dir, "*.sql"))}
+    pairs = []
+    for q_path in sorted(glob.glob(os.path.join(dataset_dir, "*question*.txt"))):
+        s_path = sql_files.get(key(q_path))
+        if s_path:
+            pairs.append((q_path, s_path))
+        else:
+            print(f"⚠️ No SQL file for {q_path}")
+    return pairs
+
+
+_WORKER_SCHEMA = None
+_WORKER_BUILDER = None
+
+
+def _init_worker(schema_path, top_k, budget, schema_format):
+    global _WORKER_SCHEMA, _WORKER_BUILDER
+    _WORKER_SCHEMA = load_schema(schema_path, schema_format)
+    _WORKER_BUILDER = load_builder(_WORKER_SCHEMA, top_k, budget)
+
+
+def process_chunk(task):
+    """
+    Worker: (source, offset, questions, sqls) -> (source, offset, lines, warnings,
+    errors, prompt token counts, (pid, schema cache stats so far)).
+    """
+    source, offset, questions, sqls = task
+    lines, warnings, errors = [], [], []
+    _WORKER_BUILDER.sizes.clear()  # the window is far larger than a chunk
+    for i, (q, s) in enumerate(zip(questions, sqls), start=offset + 1):
+        try:
+            entry, real_missing = build_entry(_WORKER_SCHEMA, q, s, _WORKER_BUILDER)
+        except ValueError as e:
+            errors.append({"source": source, "index": i, "question": q, "error": str(e)})
+            continue
+        if real_missing:
+            warnings.append({"source": source, "index": i, "question": q, "missing": sorted(real_missing)})
+        lines.append(json.dumps(entry))
+    sizes = list(_WORKER_BUILDER.sizes)
+    return source, offset, lines, warnings, errors, sizes, (os.getpid(), _WORKER_SCHEMA.stats())
+
+
+def make_tasks(pairs, chunk_size):
+    """Splits every question/SQL pair file into ordered chunks; count mismatches are errors."""
+    tasks, errors = [], []
+    for q_path, s_path in pairs:
+        questions, sqls = load_questions(q_path), load_sql_queries(s_path)
+        source = os.path.basename(q_path)
+        if len(questions) != len(sqls):
+            errors.append({"source": source, "error": f"Question/SQL count mismatch ({len(questions)} vs {len(sqls)})"})
+            continue
+        for start in range(0, len(questions), chunk_size):
+            tasks.append((source, start, questions[start:start + chunk_size], sqls[start:start + chunk_size]))
+    return tasks, errors
+
+
+def write_shards(lines, out_dir, shard_size):
+    """Writes lines into fixed-size shards; stale shards from earlier runs are removed."""
+    os.makedirs(out_dir, exist_ok=True)
+    for old in glob.glob(os.path.join(out_dir, f"{SHARD_PREFIX}_*.jsonl")):
+        os.remove(old)
+
+    shards = []
+    for n, start in enumerate(range(0, len(lines), shard_size)):
+        name = f"{SHARD_PREFIX}_{n:05d}.jsonl"
+        data = "".join(l + "\n" for l in lines[start:start + shard_size]).encode("utf-8")
+        with open(os.path.join(out_dir, name), "wb") as f:
+            f.write(data)
+        shards.append({"file": name, "records": min(shard_size, len(lines) - start),
+                       "sha256": hashlib.sha256(data).hexdigest()})
+    return shards
+
+
+def run_batch(pairs, out_dir=BATCH_OUTPUT_DIR, workers=None, shard_size=SHARD_SIZE, chunk_size=CHUNK_SIZE,
+              top_k=COLUMN_TOP_K, budget=PROMPT_TOKEN_BUDGET, schema_format=None):
+    """
+    Processes every (questions, sql) file pair across a process pool. Results are
+    reassembled in input order, so the shards are byte-identical whatever the
+    worker count or completion order.
+    """
+    start = time.perf_counter()
+    tasks, errors = make_tasks(pairs, chunk_size)
+    total = sum(len(t[2]) for t in tasks)
+    print(f"📋 {len(pairs)} file pairs, {total} questions, {len(tasks)} tasks")
+
+    schema_format = schema_format or TRAIN_SCHEMA_FORMAT
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(SCHEMA_FILE, top_k, budget, schema_format)) as pool:
+        results = list(pool.map(process_chunk, tasks))
+
+    lines, warnings, per_source, cache_stats, sizes = [], [], {}, {}, []
+    for source, _, chunk_lines, chunk_warnings, chunk_errors, chunk_sizes, (pid, stats) in results:
+        sizes.extend(chunk_sizes)
+        # Each worker has its own cache; keep its latest cumulative stats
+        cache_stats[pid] = max(cache_stats.get(pid, stats), stats, key=lambda s: s["hits"] + s["misses"])
+        lines.extend(chunk_lines)
+        warnings.extend(chunk_warnings)
+        errors.extend(chunk_errors)
+        per_source[source] = per_source.get(source, 0) + len(chunk_lines)
+
+    for w in warnings:
+        print(f"⚠️ {w['source']} #{w['index']}: missing tables {w['missing']} added")
+    for e in errors:
+        print(f"❌ {e['source']}{' #' + str(e['index']) if 'index' in e else ''}: {e['error']}")
+
+    shards = write_shards(lines, out_dir, shard_size)
+    elapsed = time.perf_counter() - start
+    hits = sum(s["hits"] for s in cache_stats.values())
+    misses = sum(s["misses"] for s in cache_stats.values())
+    prompt_tokens = size_summary(sizes, budget)
+    manifest = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "pairs": [{"questions": q, "sql": s} for q, s in pairs],
+        "records": len(lines),
+        "column_top_k": top_k,
+        "schema_format": schema_format,
+        "per_source": per_source,
+        "shards": shards,
+        "warnings": warnings,
+        "errors": errors,
+        "schema_cache": {"workers": len(cache_stats), "hits": hits, "misses": misses},
+        "prompt_tokens": prompt_tokens,
+        "elapsed_s": round(elapsed, 3),
+    }
+    with open(os.path.join(out_dir, "batch_manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4)
+
+    print("-" * 60)
+    for source, count in per_source.items():
+        print(f"   {source:<35} {count:>6} samples")
+    print(f"✅ Generated {len(lines)} samples in {len(shards)} shards ({len(errors)} errors)")
+    print(f"⏱️  {elapsed:.2f}s, {len(lines) / elapsed if elapsed else 0:.0f} samples/s, workers={workers or os.cpu_count()}")
+    print(f"🗂️  Schema cache: {hits} hits / {misses} misses across {len(cache_stats)} workers")
+    if prompt_tokens:
+        print(f"📏 Prompt tokens: mean {prompt_tokens['mean']}, p50 {prompt_tokens['p50']}, p95 {prompt_tokens['p95']}, "
+              f"max {prompt_tokens['max']}, {prompt_tokens['over_budget']} over budget {budget or '∞'}")
+    print(f"📂 Saved to {out_dir}")
+    return manifest
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build SQLCoder training JSONL from question/SQL file pairs.")
+    parser.add_argument("--batch", action="store_true",
+                        help="Non-interactive: process every pair across a process pool into sharded JSONL.")
+    parser.add_argument("--pair", nargs=2, action="append", metavar=("QUESTIONS", "SQL"),
+                        help="Question/SQL file pair (repeatable). Default: question.txt/queries.sql plus dataset/.")
+    parser.add_argument("--dataset-dir", default=DATASET_DIR)
+    parser.add_argument("--output-dir", default=BATCH_OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--top-k", type=int, default=COLUMN_TOP_K,
+                        help="Prune wide tables to keys + top-k question-relevant columns (0 = full tables).")
+    parser.add_argument("--token-budget", type=int, default=PROMPT_TOKEN_BUDGET,
+                        help="Drop the least relevant columns until each prompt fits (0 = unlimited).")
+    parser.add_argument("--schema-format", default=TRAIN_SCHEMA_FORMAT, choices=sorted(SCHEMA_FORMATS),
+                        help="Schema serializer for the prompts (see benchmark_schema_formats.py).")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parse_args()
+    setup_logging()
+    COLUMN_TOP_K = args.top_k
+    PROMPT_TOKEN_BUDGET = args.token_budget
+    TRAIN_SCHEMA_FORMAT = args.schema_format
+    if args.batch:
+        pairs = [tuple(p) for p in args.pair] if args.pair else \
+            [(QUESTIONS_FILE, SQL_FILE)] + discover_pairs(args.dataset_dir)
+        manifest = run_batch(pairs, args.output_dir, args.workers, args.shard_size, args.chunk_size, args.top_k,
+                             args.token_budget, args.schema_format)
+        print(f"🧾 Log: {LOG_FILE}")
+        sys.exit(1 if manifest["errors"] else 0)
     main()
\ No newline at end of file
@@ -0,0 +1,243 @@
+import os
+import re
+import csv
+from collections import deque
+
+# ==================================================
+# CONFIG
+# ==================================================
+BASE_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# Lookup names that are also everyday English words ("What are ...")
+ENGLISH_COLLISIONS = {"are", "war"}
+
+
+# ==================================================
+# CSV LOADERS
+# ==================================================
+def load_csv_keywords(filename, column):
+    path = os.path.join(BASE_DATA_DIR, filename)
+    out = set()
+    with open(path, encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            v = row[column].strip().lower()
+            if v:
+                out.add(v)
+    return out
+
+
+def with_aliases(names):
+    """Adds the parts of compound names: 'lushai/mizo' -> 'lushai', 'mizo'; 'proja (ori)' -> 'proja', 'ori'."""
+    out = set(names)
+    for name in names:
+        for part in re.split(r"[/()]", name):
+            if part.strip():
+                out.add(part.strip())
+    return out
+
+
+LANGUAGE_KEYWORDS = with_aliases(load_csv_keywords("languages.csv", "name")) - ENGLISH_COLLISIONS
+RELIGION_KEYWORDS = load_csv_keywords("religions.csv", "religion_name")
+AGE_GROUP_KEYWORDS = load_csv_keywords("age_groups.csv", "name")
+
+
+# ==================================================
+# INTENT DEFINITIONS (FINAL)
+# ==================================================
+INTENTS = {
+    "population": {
+        "strong": {
+            "population", "people", "persons", "count", "total",
+            "live", "living", "men", "women", "male", "female",
+            "boys", "girls", "sex ratio", "gender", "households",
+            "dwellers", "villagers", "citizens", "residents"
+        },
+        "weak": {
+            "most", "least", "largest", "smallest", "fewest",
+            "more", "less", "higher", "lower",
+            "ratio", "gap", "difference", "percentage", "percent"
+        }
+    },
+
+    "religion": {
+        "strong": RELIGION_KEYWORDS | {
+            "religion", "religious", "faith", "community",
+            "parsi", "parsis", "zoroastrian", "zoroastrians"
+        },
+        "weak": set()
+    },
+
+    "language": {
+        "strong": LANGUAGE_KEYWORDS | {
+            "language", "languages", "speak", "spoken", "speakers", "mother tongue"
+        },
+        "weak": set()
+    },
+
+    "education": {
+        "strong": {
+            "literacy", "literate", "illiterate",
+            "education", "educated", "schooling", "school",
+            "university", "college", "degree", "diploma", "pre-primary"
+        },
+        "weak": {"rate"}
+    },
+
+    "occupation": {
+        "strong": {
+            "work", "working", "worker", "employment",
+            "non-worker", "workforce", "participation",
+            "job", "jobs", "employed", "unemployed", "cultivator",
+            "labourer", "agricultural", "paid", "cash"
+        },
+        "weak": set()
+    },
+
+    "health": {
+        "strong": {
+            "health", "mortality", "fertility", "disease", "anaemia", "diabetes",
+            "vaccinated", "vaccination", "vaccine", "vaccines",
+            "stunting", "stunted", "wasting", "wasted",
+            "underweight", "overweight", "obese", "obesity", "bmi",
+            "birth", "births", "delivery", "deliveries", "antenatal", "postnatal",
+            "breastfed", "breastfeeding", "diet", "nutrition",
+            "blood sugar", "blood pressure", "hypertension",
+            "hygienic", "menstruation", "sanitation", "clean fuel", "cooking fuel",
+            "electricity", "drinking water", "water", "toilet",
+            "internet", "bank account", "mobile phone", "insurance",
+            "violence", "crime", "tobacco", "alcohol", "smoking",
+            "fever", "ari", "diarrhoea", "treatment", "advice",
+            "vitamin", "iodized", "salt", "cancer", "screening", "c-section",
+            "hiv", "aids", "condom", "knowledge",
+            "anaemic", "pregnant", "pregnancy", "married", "marriage",
+            "waist", "hip", "folic", "acid", "decision", "owning", "house", "land",
+            "registered", "registration", "authority"
+        },
+        "weak": set()
+    },
+
+    "age": {
+        "strong": AGE_GROUP_KEYWORDS | {
+            "age", "children", "elderly", "youth",
+            "adult", "adults", "working age", "teenagers", "seniors",
+            "0-6", "15-49", "60+"
+        },
+        "weak": set()
+    }
+}
+
+
+# ==================================================
+# AHO-CORASICK AUTOMATON
+# ==================================================
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton: finds every (possibly overlapping) occurrence of
+    every keyword in a single left-to-right pass over the text.
+    """
+
+    def __init__(self, keywords):
+        """`keywords` is an iterable of (keyword, payload) pairs."""
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+
+        for keyword, payload in keywords:
+            state = 0
+            for ch in keyword:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append((len(keyword), payload))
+
+        # Breadth-first failure links; each state inherits its fallback's outputs
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter_matches(self, text):
+        """Yields (start, end, payload) for every keyword occurrence in `text`."""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, payload in out[state]:
+                yield i - length + 1, i + 1, payload
+
+
+# ==================================================
+# INTENT MATCHER
+# ==================================================
+def _is_word_boundary(text, start, end):
+    """Whole-word match, allowing a plural 's' ('worker' matches 'workers')."""
+    if start > 0 and text[start - 1].isalnum():
+        return False
+    if end < len(text) and text[end].isalnum():
+        if text[end] != "s" or (end + 1 < len(text) and text[end + 1].isalnum()):
+            return False
+    return True
+
+
+class IntentMatcher:
+    """
+    Compiled once from an INTENTS-style dict ({intent: {"strong": set, "weak": set}}).
+    `detect()` returns the active intents and the matched spans in one pass.
+    """
+
+    def __init__(self, intents=INTENTS):
+        payloads = {}
+        for intent, groups in intents.items():
+            for strength in ("strong", "weak"):
+                for keyword in groups.get(strength, ()):
+                    payloads.setdefault(keyword.lower(), []).append((intent, strength))
+        self.automaton = KeywordAutomaton((kw, tuple(p)) for kw, p in payloads.items())
+        self.keyword_count = len(payloads)
+
+    def find(self, question):
+        """All whole-word keyword hits as dicts with intent, strength, keyword and span."""
+        q = question.lower()
+        matches = []
+        for start, end, payload in self.automaton.iter_matches(q):
+            if not _is_word_boundary(q, start, end):
+                continue
+            for intent, strength in payload:
+                matches.append({
+                    "intent": intent,
+                    "strength": strength,
+                    "keyword": q[start:end],
+                    "start": start,
+                    "end": end,
+                })
+        return matches
+
+    def detect(self, question):
+        """
+        Returns (intents, matches). Weak keywords only count once some strong
+        keyword has matched, as in the original detect_intents.
+        """
+        matches = self.find(question)
+        active = {m["intent"] for m in matches if m["strength"] == "strong"}
+        if active:
+            active |= {m["intent"] for m in matches if m["strength"] == "weak"}
+        return active, matches
+
+
+INTENT_MATCHER = IntentMatcher(INTENTS)
+
+
+def detect_intents(question: str):
+    return INTENT_MATCHER.detect(question)[0]
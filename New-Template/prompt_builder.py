@@ -0,0 +1,273 @@
+import os
+import re
+import csv
+import argparse
+import threading
+import statistics
+from collections import OrderedDict, deque
+
+from schema_linker import SchemaLinker
+
+# ==================================================
+# CONFIG
+# ==================================================
+# Max prompt tokens (0 = unlimited). Shared by the generator and the backend.
+# Training runs at MAX_SEQ_LENGTH 2048 in Training/new_test_lora.ipynb, and
+# the training prompt includes the target SQL, so 2048 is the natural budget
+# there: anything longer gets its SQL truncated.
+TOKEN_BUDGET = int(os.getenv("CENQUERY_PROMPT_TOKEN_BUDGET", "0"))
+
+# "tiktoken:<encoding>" or "approx". tiktoken needs its BPE file cached
+# locally (TIKTOKEN_CACHE_DIR) or network access on first use.
+TOKENIZER = os.getenv("CENQUERY_TOKENIZER", "tiktoken:cl100k_base")
+
+COUNT_CACHE_SIZE = 8192
+
+# Recent prompt sizes kept for percentiles; counts, mean, max and over-budget stay exact
+SIZE_WINDOW = int(os.getenv("CENQUERY_PROMPT_SIZE_WINDOW", "10000"))
+
+
+# ==================================================
+# TOKEN COUNTING
+# ==================================================
+def approx_tokens(text):
+    # Word pieces and punctuation; within ~15% of BPE counts on these prompts
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+
+def load_tokenizer(spec=TOKENIZER):
+    """Returns (name, count_fn); falls back to approx_tokens if tiktoken is unavailable."""
+    if spec.startswith("tiktoken:"):
+        name = spec.split(":", 1)[1]
+        try:
+            import tiktoken
+            enc = tiktoken.get_encoding(name)
+            return spec, lambda text: len(enc.encode(text, disallowed_special=()))
+        except Exception as e:
+            print(f"⚠️  Tokenizer {spec} unavailable ({type(e).__name__}); using approximate counts.")
+    return "approx", approx_tokens
+
+
+class TokenCounter:
+    """
+    Token counts memoized per text (LRU); schema fragments repeat across prompts.
+    Backend request threads share one counter, so the LRU is updated under a
+    lock; the tokenizer itself runs outside it.
+    """
+
+    def __init__(self, spec=TOKENIZER, maxsize=COUNT_CACHE_SIZE):
+        self.name, self._count = load_tokenizer(spec)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, text):
+        with self._lock:
+            n = self._cache.get(text)
+            if n is not None:
+                self.hits += 1
+                self._cache.move_to_end(text)
+                return n
+            self.misses += 1
+        n = self._count(text)
+        with self._lock:
+            self._cache[text] = n
+            if len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return n
+
+
+# ==================================================
+# PROMPT BUILDER
+# ==================================================
+class PromptBuilder:
+    """
+    Assembles schema text for a question under a token budget.
+
+    Starts from the linker's selection (full tables when pruning is off) and,
+    while the prompt is over budget, drops the least relevant columns and wide
+    tables first (lowest linker score). Keys, narrow lookup tables and anything
+    in `required` are never dropped. Prompt size is counted as the frame
+    (template with an empty schema) plus each table fragment's cached count.
+    """
+
+    def __init__(self, schema, linker=None, budget=TOKEN_BUDGET, counter=None, size_window=SIZE_WINDOW):
+        self.schema = schema
+        self.linker = linker or SchemaLinker(schema.schema_json)
+        self.budget = budget
+        self.counter = counter or TokenCounter()
+        self._column_cost = {}
+        self.sizes = deque(maxlen=size_window)
+        self.totals = {"prompts": 0, "tokens": 0, "max": 0, "over_budget": 0}
+        self._size_lock = threading.Lock()   # backend threads build prompts while /prompt-stats reads
+
+    def _fragment_tokens(self, table, cols):
+        return self.counter.count(self.schema.table_fragment(table, cols))
+
+    def _column_tokens(self, table, column):
+        """
+        Marginal tokens of one column in a table's fragment, measured next to a
+        neighbour so the separator is counted too. Rendered directly rather than
+        through the schema cache, which only holds fragments actually sent.
+        """
+        key = (table, column)
+        if key not in self._column_cost:
+            info = self.schema.schema_json[table]
+            other = next(c for c in info["columns"] if c["name"] != column)
+            mine = next(c for c in info["columns"] if c["name"] == column)
+            one = self.counter.count(self.schema.fragment(table, {**info, "columns": [other]}))
+            two = self.counter.count(self.schema.fragment(table, {**info, "columns": [other, mine]}))
+            self._column_cost[key] = max(two - one, 1)
+        return self._column_cost[key]
+
+    def _schema_tokens(self, cols):
+        # +1 per joining newline
+        return sum(self._fragment_tokens(t, c) for t, c in cols.items()) + max(len(cols) - 1, 0)
+
+    def build(self, question, tables, render, required=None, budget=None):
+        """
+        `render(schema_text)` returns the full prompt. Returns (prompt, plan) where
+        plan has token counts and what was dropped.
+        """
+        selection, plan = self.select(question, tables, render, required, budget)
+        return render(self.schema.render_selection(selection)), plan
+
+    def select(self, question, tables, render, required=None, budget=None):
+        """Like build() but returns the ({table: columns | None}, plan) selection unrendered."""
+        budget = self.budget if budget is None else budget
+        required = required or {}
+        selection = self.linker.link(question, tables, required=required)
+        frame = self.counter.count(render(""))
+        cols = {t: (None if c is None else list(c)) for t, c in selection.items()}
+        tokens = frame + self._schema_tokens(cols)
+
+        dropped_tables, dropped_columns = [], 0
+        if budget and tokens > budget:
+            for score, _, table, column in self._drop_order(question, cols, required):
+                if table not in cols:
+                    continue
+                if column is None:
+                    tokens -= self._fragment_tokens(table, cols.pop(table)) + 1
+                    dropped_tables.append(table)
+                else:
+                    current = list(self.linker.columns[table]) if cols[table] is None else cols[table]
+                    if column not in current:
+                        continue
+                    current.remove(column)
+                    cols[table] = current
+                    tokens -= self._column_tokens(table, column)
+                    dropped_columns += 1
+                if tokens <= budget:
+                    # Estimates are per column; confirm with the real fragment counts
+                    tokens = frame + self._schema_tokens(cols)
+                    if tokens <= budget:
+                        break
+
+        plan = {
+            "tokens": tokens,
+            "budget": budget,
+            "over_budget": bool(budget) and tokens > budget,
+            "tables": len(cols),
+            "columns": sum(len(self.linker.columns[t]) if c is None else len(c) for t, c in cols.items()),
+            "dropped_tables": dropped_tables,
+            "dropped_columns": dropped_columns,
+        }
+        with self._size_lock:
+            self.sizes.append(tokens)
+            t = self.totals
+            t["prompts"] += 1
+            t["tokens"] += tokens
+            t["max"] = max(t["max"], tokens)
+            t["over_budget"] += plan["over_budget"]
+        return cols, plan
+
+    def _drop_order(self, question, cols, required):
+        """
+        (score, kind, table, column) ascending. At equal score whole tables go
+        first, so an irrelevant wide table is dropped in one step rather than
+        column by column.
+        """
+        order = []
+        for table, current in cols.items():
+            keep = set(self.linker.keys[table]) | set(required.get(table, ()))
+            scores = dict(self.linker.score(question, table))
+            present = self.linker.columns[table] if current is None else current
+            for column in present:
+                if column not in keep:
+                    order.append((scores.get(column, 0.0), 1, table, column))
+            if table not in required and len(self.linker.columns[table]) > self.linker.max_full_columns:
+                order.append((max(scores.values(), default=0.0), 0, table, None))
+        order.sort(key=lambda x: (x[0], x[1]))
+        return order
+
+    def size_summary(self):
+        with self._size_lock:
+            sizes, t = list(self.sizes), dict(self.totals)
+        summary = size_summary(sizes, self.budget)
+        if summary:
+            # p50/p95 cover the last `window` prompts; the rest is since startup
+            summary.update(prompts=t["prompts"], mean=round(t["tokens"] / t["prompts"], 1), max=t["max"],
+                           over_budget=t["over_budget"], window=len(sizes))
+            summary.update(tokenizer=self.counter.name, count_cache_hits=self.counter.hits,
+                           count_cache_misses=self.counter.misses)
+        return summary
+
+    def report(self):
+        s = self.size_summary()
+        if not s:
+            return "📏 No prompts built"
+        return (f"📏 Prompt tokens ({s['tokenizer']}): mean {s['mean']}, p50 {s['p50']}, p95 {s['p95']}, "
+                f"max {s['max']}, {s['over_budget']} over budget {self.budget or '∞'}, "
+                f"count cache {s['count_cache_hits']} hits / {s['count_cache_misses']} misses")
+
+
+# ==================================================
+# PROMPT SIZE vs LATENCY
+# ==================================================
+def size_summary(sizes, budget=0):
+    """Distribution of prompt token counts (also used to merge batch workers' counts)."""
+    if not sizes:
+        return {}
+    s = sorted(sizes)
+    return {
+        "prompts": len(s),
+        "mean": round(statistics.mean(s), 1),
+        "p50": s[len(s) // 2],
+        "p95": s[min(len(s) - 1, int(0.95 * len(s)))],
+        "max": s[-1],
+        "budget": budget,
+        "over_budget": sum(1 for n in s if budget and n > budget),
+    }
+
+
+def size_latency_report(path, bins=5):
+    """Reads a prompt log (Backend prompt_log.csv) and prints LLM latency per prompt-size quantile."""
+    if not os.path.isfile(path):
+        print(f"⚠️  No prompt log at {path}: run the backend first (it writes prompt_log.csv)")
+        return
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = [r for r in csv.DictReader(f) if r.get("llm_latency_ms")]
+    if not rows:
+        print(f"⚠️  No rows with latency in {path}")
+        return
+    pairs = sorted((int(r["prompt_tokens"]), float(r["llm_latency_ms"])) for r in rows)
+    print(f"📊 {len(pairs)} prompts from {path}")
+    print(f"   {'tokens':>15} {'n':>5} {'p50 ms':>8} {'p95 ms':>8}")
+    size = max(len(pairs) // bins, 1)
+    for i in range(0, len(pairs), size):
+        chunk = pairs[i:i + size]
+        lat = sorted(l for _, l in chunk)
+        print(f"   {chunk[0][0]:>6} - {chunk[-1][0]:<6} {len(chunk):>5} {lat[len(lat) // 2]:8.0f} "
+              f"{lat[min(len(lat) - 1, int(0.95 * len(lat)))]:8.0f}")
+    if len(pairs) > 2:
+        print(f"   correlation(tokens, latency) = {statistics.correlation(*zip(*pairs)):.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prompt size vs LLM latency from a backend prompt log.")
+    parser.add_argument("log", nargs="?", default=os.path.join("..", "Backend", "prompt_log.csv"))
+    parser.add_argument("--bins", type=int, default=5)
+    args = parser.parse_args()
+    size_latency_report(args.log, args.bins)
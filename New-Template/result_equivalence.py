@@ -0,0 +1,263 @@
+import re
+import time
+import hashlib
+import numbers
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# ==================================================
+# CONFIG
+# ==================================================
+# Floats are equal when they agree to this many significant bits (~1e-11
+# relative): SUM/AVG come back with different last digits from Postgres,
+# DuckDB and different plans
+FLOAT_SIGNIFICANT_BITS = 36
+# ...and anything smaller than this counts as zero
+FLOAT_ZERO = 1e-12
+# Rounding puts two values this close on either side of a bucket edge now and
+# then; equivalent() re-checks such results within one rounding step
+FLOAT_REL_TOL = 2.0 ** -(FLOAT_SIGNIFICANT_BITS - 1)
+
+NULL = "\x00NULL"
+
+# Positional multipliers used to combine column hashes into a row hash (odd, so
+# multiplication is a bijection on uint64)
+_MULTIPLIERS = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+                         0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9],
+                        dtype=np.uint64)
+
+
+# ==================================================
+# CANONICAL COLUMNS
+# ==================================================
+def _quantize(values):
+    """float64 rounded to FLOAT_SIGNIFICANT_BITS; ints, Decimals and floats of equal value hash alike."""
+    values = np.asarray(values, dtype=np.float64)
+    mantissa, exponent = np.frexp(values)
+    scale = float(2 ** FLOAT_SIGNIFICANT_BITS)
+    values = np.ldexp(np.round(mantissa * scale) / scale, exponent)
+    values[np.abs(values) < FLOAT_ZERO] = 0.0   # also turns -0.0 into 0.0
+    return values
+
+
+def _is_number(value):
+    """Booleans are not numbers (True is "True", not 1.0), whichever branch hashes them."""
+    return isinstance(value, numbers.Number) and not isinstance(value, bool)
+
+
+def canonical_column(values):
+    """
+    (uint64 hash per value, float64 values or None) after type coercion:
+    numbers by value, everything else by text. The floats, unrounded with NaN
+    for NULL, are kept for equivalent()'s tolerance re-check.
+    """
+    array = np.array(values) if len(values) else np.array([], dtype=object)
+    if array.ndim == 1 and array.dtype.kind in "iuf":
+        # All plain numbers (the common case): no per-value Python work
+        array = array.astype(np.float64)
+        return pd.util.hash_array(_quantize(array)), array
+    series = pd.Series(values, dtype=object)
+    present = series.dropna()
+    if len(present) and all(_is_number(v) for v in present):
+        # Postgres NUMERIC comes back as Decimal, DuckDB as float
+        array = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64)
+        return pd.util.hash_array(_quantize(array)), array
+    text = series.map(lambda v: NULL if v is None or v is pd.NA or (isinstance(v, float) and v != v) else str(v))
+    return pd.util.hash_array(text.to_numpy(dtype=object)), None
+
+
+def column_hashes(values):
+    """uint64 hash per value after type coercion: numbers by value, everything else by text."""
+    return canonical_column(values)[0]
+
+
+# ==================================================
+# RESULT SETS
+# ==================================================
+class ResultSet:
+    """
+    A query result reduced to hashes: one uint64 per value, a bag signature per
+    column (sum of its value hashes, so independent of row order) and, on
+    demand, one hash per row. Comparing two results is then a few numpy
+    operations however many rows they have.
+    """
+
+    def __init__(self, columns, rows):
+        self.columns = list(columns)
+        self.n_rows = len(rows)
+        by_column = list(zip(*rows)) if self.n_rows else [()] * len(self.columns)
+        self.values, self.numbers = [], []
+        for values in by_column:
+            hashes, floats = canonical_column(values)
+            self.values.append(hashes)
+            self.numbers.append(floats)
+        self.signatures = np.array([h.sum(dtype=np.uint64) for h in self.values], dtype=np.uint64)
+
+    def column_order(self, by_content=True):
+        """Column positions in canonical order: sorted by content signature, or as selected."""
+        if not by_content:
+            return list(range(len(self.values)))
+        return list(np.argsort(self.signatures, kind="stable"))
+
+    def row_hashes(self, order):
+        rows = np.zeros(self.n_rows, dtype=np.uint64)
+        for k, i in enumerate(order):
+            rows += self.values[i] * _MULTIPLIERS[k % len(_MULTIPLIERS)] + np.uint64(k)
+        return rows
+
+    def fingerprint(self, ordered=False, ignore_column_order=True):
+        """
+        Stable hex digest of the exact-bucket comparison: equal results give
+        equal digests (up to hash collisions), but a float within tolerance on
+        the other side of a rounding edge changes it, which equivalent()
+        re-checks and a digest cannot.
+        """
+        order = self.column_order(ignore_column_order)
+        rows = self.row_hashes(order)
+        if not ordered:
+            rows = np.sort(rows)
+        h = hashlib.sha256(np.array([len(order), self.n_rows], dtype=np.uint64).tobytes())
+        h.update(self.signatures[order].tobytes())
+        h.update(rows.tobytes())
+        return h.hexdigest()[:16]
+
+
+def equivalent(a, b, ordered=False, ignore_column_order=True):
+    """
+    True if `a` and `b` hold the same rows: as a bag (ordered=False) or in the
+    same order. Column names never matter (aliases); with ignore_column_order
+    columns are matched by content rather than position.
+    """
+    if len(a.values) != len(b.values) or a.n_rows != b.n_rows:
+        return False
+    order_a = a.column_order(ignore_column_order)
+    order_b = b.column_order(ignore_column_order)
+    if np.array_equal(a.signatures[order_a], b.signatures[order_b]):
+        rows_a, rows_b = a.row_hashes(order_a), b.row_hashes(order_b)
+        if not ordered:
+            rows_a, rows_b = np.sort(rows_a), np.sort(rows_b)
+        if np.array_equal(rows_a, rows_b):
+            return True
+    # Hashes differ: equal unless only floats near a rounding edge moved
+    if not any(x is not None for x in a.numbers) or not any(x is not None for x in b.numbers):
+        return False
+    return _within_tolerance(a, b, ordered, ignore_column_order)
+
+
+def _close(x, y):
+    return bool(np.allclose(x, y, rtol=FLOAT_REL_TOL, atol=FLOAT_ZERO, equal_nan=True))
+
+
+def _column_match(a, i, b, j):
+    """Column a[i] holds the same bag of values as b[j]: exact for text, within tolerance for numbers."""
+    if a.signatures[i] == b.signatures[j]:
+        return True
+    x, y = a.numbers[i], b.numbers[j]
+    return x is not None and y is not None and _close(np.sort(x), np.sort(y))
+
+
+def _within_tolerance(a, b, ordered, ignore_column_order):
+    """
+    Slow path of equivalent(): pair columns (exact signatures first, then
+    numbers within tolerance), sort both results' rows by the paired columns
+    unless ordered, and compare value by value.
+    """
+    n = len(a.values)
+    if ignore_column_order:
+        paired, free = {}, list(range(n))
+        for exact in (True, False):
+            for i in range(n):
+                if i in paired:
+                    continue
+                j = next((j for j in free if (a.signatures[i] == b.signatures[j] if exact
+                                              else _column_match(a, i, b, j))), None)
+                if j is not None:
+                    paired[i] = j
+                    free.remove(j)
+        if free:
+            return False
+        pairs = sorted(paired.items())
+    else:
+        pairs = [(i, i) for i in range(n)]
+    cols_a = [a.values[i] if a.numbers[i] is None else a.numbers[i] for i, _ in pairs]
+    cols_b = [b.values[j] if b.numbers[j] is None else b.numbers[j] for _, j in pairs]
+    if not ordered and a.n_rows:
+        # lexsort's primary key is the last one
+        rows_a, rows_b = np.lexsort(cols_a[::-1]), np.lexsort(cols_b[::-1])
+        cols_a = [c[rows_a] for c in cols_a]
+        cols_b = [c[rows_b] for c in cols_b]
+    for x, y in zip(cols_a, cols_b):
+        if x.dtype != y.dtype:
+            return False  # a number against text
+        if x.dtype == np.uint64 and not np.array_equal(x, y):
+            return False
+        if x.dtype == np.float64 and not _close(x, y):
+            return False
+    return True
+
+
+# ==================================================
+# ORDER SEMANTICS
+# ==================================================
+def has_order_by(sql):
+    """True if the outermost query sorts its output, i.e. row order is part of the answer."""
+    try:
+        import sqlglot
+        ast = sqlglot.parse_one(sql, read="postgres")
+        return ast is not None and ast.args.get("order") is not None
+    except Exception:
+        # Unparseable: an ORDER BY after the last closing parenthesis belongs to the outer query
+        return bool(re.search(r"\border\s+by\b[^)]*$", sql, re.I | re.S))
+
+
+def results_match(gold_sql, gold, pred, ignore_column_order=True):
+    """Execution match: ordered comparison when the gold query has ORDER BY, bag semantics otherwise."""
+    return equivalent(gold, pred, ordered=has_order_by(gold_sql), ignore_column_order=ignore_column_order)
+
+
+# ==================================================
+# BENCHMARK
+# ==================================================
+def _naive_equal(cols_a, rows_a, cols_b, rows_b):
+    """What comparing in Python looks like: sort repr()s of every row."""
+    return cols_a == cols_b and sorted(map(repr, rows_a)) == sorted(map(repr, rows_b))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time result-set comparison on a real table.")
+    parser.add_argument("--dsn", default="duckdb:///census.duckdb")
+    parser.add_argument("--sql", default="SELECT * FROM language_stats")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine, text
+    with create_engine(args.dsn).connect() as conn:
+        result = conn.execute(text(args.sql))
+        columns, rows = list(result.keys()), [tuple(r) for r in result.fetchall()]
+    # The same rows shuffled, columns reversed and renamed: equivalent as a bag
+    shuffled = [r[::-1] for r in np.random.default_rng(0).permutation(np.array(rows, dtype=object))]
+    shuffled = [tuple(r) for r in shuffled]
+    renamed = [f"c{i}" for i in range(len(columns))]
+
+    def best(fn):
+        times = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            out = fn()
+            times.append((time.perf_counter() - start) * 1000)
+        return out, min(times)
+
+    print(f"📋 {len(rows)} rows x {len(columns)} columns from: {args.sql}")
+    gold, build_ms = best(lambda: ResultSet(columns, rows))
+    pred, _ = best(lambda: ResultSet(renamed, shuffled))
+    same, compare_ms = best(lambda: equivalent(gold, pred))
+    naive, naive_ms = best(lambda: _naive_equal(columns, rows, columns, rows[::-1]))
+    print(f"   canonicalize + hash  {build_ms:8.2f} ms per result")
+    print(f"   equivalent()         {compare_ms:8.2f} ms  -> {same} (shuffled rows, permuted/renamed columns)")
+    print(f"   repr-sort baseline   {naive_ms:8.2f} ms  -> {naive} (same column order only)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import os
+import json
+
+
+# ==================================================
+# FRAGMENT RENDERERS
+# ==================================================
+def ddl_fragment(table, info):
+    """CREATE TABLE statement as used in the SQLCoder training prompts."""
+    cols = []
+    for c in info["columns"]:
+        d = f"{c['name']} {c['type']}"
+        if "PK" in c.get("constraints", []):
+            d += " PRIMARY KEY"
+        cols.append(d)
+    return f"CREATE TABLE {table} ({', '.join(cols)});"
+
+
+def column_list_fragment(table, info):
+    """One line per table, the format the backend prompt has always used."""
+    return f"Table '{table}' has columns: {', '.join(c['name'] for c in info['columns'])}"
+
+
+def _keys(info):
+    """(primary key columns, {column: 'table.column'}) from either schema layout."""
+    pks = set(info.get("primary_key", []))
+    pks.update(c["name"] for c in info["columns"] if "PK" in c.get("constraints", []))
+    refs = {}
+    for fk in info.get("foreign_keys", []):
+        target = fk.get("references", "")
+        refs[fk["column"]] = target.replace("(", ".").rstrip(")")
+    return pks, refs
+
+
+def compact_fragment(table, info):
+    """table(col:TYPE,...) with PK marked; no DDL boilerplate."""
+    pks, _ = _keys(info)
+    cols = [f"{c['name']}:{c['type']}{' PK' if c['name'] in pks else ''}" for c in info["columns"]]
+    return f"{table}({','.join(cols)})"
+
+
+# Short type codes for abbreviated_fragment; unknown types fall back to their
+# lowercased base name (VARCHAR(50) -> varchar)
+TYPE_CODES = {
+    "BIGINT": "int", "INTEGER": "int", "SMALLINT": "int",
+    "DOUBLE PRECISION": "float", "REAL": "float", "FLOAT": "float", "NUMERIC": "num",
+    "TEXT": "text", "VARCHAR": "text", "BOOLEAN": "bool", "DATE": "date",
+}
+
+
+def type_code(sql_type):
+    base = sql_type.split("(")[0].strip().upper()
+    return TYPE_CODES.get(base, base.lower())
+
+
+def abbreviated_fragment(table, info):
+    """compact_fragment with short type codes (int, float, text)."""
+    pks, _ = _keys(info)
+    cols = [f"{c['name']}:{type_code(c['type'])}{' PK' if c['name'] in pks else ''}" for c in info["columns"]]
+    return f"{table}({','.join(cols)})"
+
+
+def keys_fragment(table, info):
+    """Column names only, keys marked, foreign keys as edges: t(id PK,state->regions.state,a,b)."""
+    pks, refs = _keys(info)
+    cols = []
+    for c in info["columns"]:
+        name = c["name"]
+        if name in pks:
+            name += " PK"
+        elif refs.get(name):
+            name += f"->{refs[name]}"
+        cols.append(name)
+    return f"{table}({','.join(cols)})"
+
+
+# Pluggable serializers, selectable by name (CENQUERY_SCHEMA_FORMAT, --schema-format).
+# benchmark_schema_formats.py compares their prompt size and accuracy.
+SCHEMA_FORMATS = {
+    "ddl": ddl_fragment,
+    "columns": column_list_fragment,
+    "compact": compact_fragment,
+    "abbreviated": abbreviated_fragment,
+    "keys": keys_fragment,
+}
+
+# Empty = each caller's own default (DDL for training data, column lists in the backend)
+SCHEMA_FORMAT = os.getenv("CENQUERY_SCHEMA_FORMAT", "")
+
+
+def get_fragment(name):
+    if name not in SCHEMA_FORMATS:
+        raise ValueError(f"Unknown schema format '{name}'; choose from {', '.join(SCHEMA_FORMATS)}")
+    return SCHEMA_FORMATS[name]
+
+
+# ==================================================
+# SCHEMA CACHE
+# ==================================================
+class SchemaCache:
+    """
+    Renders the schema text for a set of tables.
+
+    Every table's fragment is rendered once when the cache is built; the joined
+    text is then memoized per frozenset of tables, so a prompt costs a dict
+    lookup no matter how wide the tables are. Only a handful of distinct table
+    sets come out of select_tables(), so the memo stays small.
+    """
+
+    def __init__(self, schema_json, fragment=ddl_fragment):
+        self.schema_json = schema_json
+        self.fragment = fragment
+        self.fragments = {t: fragment(t, info) for t, info in schema_json.items()}
+        # {table: set(lowercase columns)} for name resolution (see sql_validator)
+        self.catalog = {t: {c["name"].lower() for c in info["columns"]} for t, info in schema_json.items()}
+        self._rendered = {}
+        self._pruned = {}
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_file(cls, path, fragment=ddl_fragment):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), fragment)
+
+    def __contains__(self, table):
+        return table in self.fragments
+
+    def render(self, tables=None):
+        """Schema text for `tables` (all tables if None); unknown names are ignored."""
+        key = frozenset(self.fragments if tables is None else (t for t in tables if t in self.fragments))
+        text = self._rendered.get(key)
+        if text is not None:
+            self.hits += 1
+            return text
+        self.misses += 1
+        text = "\n".join(self.fragments[t] for t in sorted(key))
+        self._rendered[key] = text
+        return text
+
+    def render_selection(self, selection):
+        """
+        Schema text for a column selection from SchemaLinker.link() ({table: None
+        for all columns, or a list of columns}). Pruned fragments are memoized per
+        (table, columns), since the same indicators are asked about repeatedly.
+        """
+        if all(cols is None for cols in selection.values()):
+            return self.render(selection)
+        return "\n".join(self.table_fragment(t, selection[t]) for t in sorted(t for t in selection if t in self.fragments))
+
+    def table_fragment(self, table, cols=None):
+        """One table's fragment, restricted to `cols` (schema order) when given."""
+        if cols is None:
+            return self.fragments[table]
+        key = (table, tuple(cols))
+        text = self._pruned.get(key)
+        if text is None:
+            self.misses += 1
+            wanted = set(cols)
+            info = dict(self.schema_json[table])
+            info["columns"] = [c for c in info["columns"] if c["name"] in wanted]
+            text = self._pruned[key] = self.fragment(table, info)
+        else:
+            self.hits += 1
+        return text
+
+    def clear(self):
+        """Forget rendered sets (e.g. after DDL changed the live schema); counters are kept."""
+        self._rendered.clear()
+        self._pruned.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "tables": len(self.fragments),
+            "table_sets": len(self._rendered),
+            "pruned_fragments": len(self._pruned),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def report(self):
+        s = self.stats()
+        return (f"🗂️  Schema cache: {s['hits']} hits / {s['misses']} misses "
+                f"({s['hit_rate']:.1%}), {s['table_sets']} distinct table sets")
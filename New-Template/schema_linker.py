@@ -0,0 +1,217 @@
+import os
+import re
+import math
+
+# ==================================================
+# CONFIG
+# ==================================================
+# Columns kept per wide table besides its keys. Shared by the training-data
+# generator and the backend so both build the same kind of prompt; 0 disables
+# pruning (full tables, the previous behaviour).
+TOP_K = int(os.getenv("CENQUERY_SCHEMA_TOP_K", "0"))
+
+# Tables this narrow are always sent whole
+MAX_FULL_COLUMNS = 12
+
+# Abbreviations found in column names -> the words a question would use.
+# Built from the census/NFHS headers (pop_living_in_hh_with_electricity_,
+# tot_work_p, marg_al_0_3_f, women_age_1549_who_are_lit4_, ...).
+COLUMN_ABBREVIATIONS = {
+    "p": ["person", "population", "total", "people"],
+    "m": ["male", "men"],
+    "f": ["female", "women"],
+    "tot": ["total", "population"],
+    "pop": ["population", "people"],
+    "hh": ["household"],
+    "lit": ["literate", "literacy"],
+    "ill": ["illiterate", "illiteracy"],
+    "illiterate": ["illiteracy"],
+    "literates": ["literacy"],
+    "work": ["worker", "working"],
+    "mainwork": ["main", "worker"],
+    "margwork": ["marginal", "worker"],
+    "marg": ["marginal"],
+    "cl": ["cultivator"],
+    "al": ["agricultural", "labourer"],
+    "ot": ["other"],
+    "06": ["child", "children"],
+    "u5": ["children", "under", "five"],
+    "1549": ["women", "adult"],
+    "drinkingwater": ["drinking", "water"],
+    "insurancefin": ["insurance"],
+    "preprimary": ["pre", "primary"],
+    "underfive": ["under", "five", "children"],
+    "tru": ["rural", "urban"],
+}
+
+# Question words -> column vocabulary
+QUESTION_SYNONYMS = {
+    "kid": ["child"],
+    "toilet": ["sanitation"],
+    "literacy": ["lit", "literate"],
+    "employment": ["work"],
+    "employed": ["work"],
+    "job": ["work"],
+    "farmer": ["cultivator"],
+    "farm": ["cultivator", "agricultural"],
+    "family": ["household"],
+    "home": ["household"],
+    "power": ["electricity"],
+    "internet": ["internet"],
+    "phone": ["mobile"],
+    "insured": ["insurance"],
+    "vaccinated": ["vaccin"],
+    "immunisation": ["vaccin"],
+    "immunization": ["vaccin"],
+    "bp": ["blood", "pressure"],
+    "sugar": ["glucose", "sugar"],
+    "anemia": ["anaemia", "anaemic"],
+    "anaemia": ["anaemic"],
+    "obese": ["obese", "overweight"],
+    "obesity": ["obese", "overweight"],
+    "diabetes": ["sugar", "glucose", "mgdl"],
+    "hypertension": ["blood", "pressure", "elevated"],
+    "workforce": ["work"],
+    "participation": ["work"],
+    "measles": ["dose", "vaccin"],
+    "hepatitis": ["dose", "vaccin"],
+    "marriage": ["married"],
+    "death": ["mortality", "death"],
+    "sc": ["scheduled", "caste"],
+    "st": ["scheduled", "tribe"],
+}
+
+STOPWORDS = {
+    "the", "a", "an", "of", "in", "on", "for", "to", "and", "or", "is", "are", "was",
+    "what", "which", "who", "how", "many", "much", "show", "list", "give", "me", "with",
+    "by", "from", "that", "than", "as", "at", "it", "its", "their", "there", "do", "does",
+    "state", "states", "india", "compare", "between", "each", "all", "top", "highest", "lowest",
+}
+
+KEY_COLUMNS = {"state", "tru_id", "id"}
+
+# Denominators (total persons/males/females, survey sizes) that rates and sex
+# ratios divide by; kept alongside the keys in every pruned table
+ANCHOR_COLUMNS = re.compile(r"^(tot|total)_(p|m|f|person|male|female)$|^number_of_")
+
+
+# ==================================================
+# TOKENS
+# ==================================================
+def stem(word):
+    for suffix in ("ations", "ation", "ated", "ing", "ies", "es", "ed", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + ("y" if suffix == "ies" else "")
+    return word
+
+
+def question_terms(question):
+    # '15-49' -> '1549', '0-6' -> '06' to match column spelling
+    q = re.sub(r"(\d)\s*-\s*(\d)", r"\1\2", question.lower())
+    terms = set()
+    for word in re.findall(r"[a-z]+|\d+", q):
+        if word in STOPWORDS:
+            continue
+        terms.add(stem(word))
+        for syn in QUESTION_SYNONYMS.get(word, QUESTION_SYNONYMS.get(stem(word), [])):
+            terms.add(stem(syn))
+    return terms
+
+
+def column_terms(name):
+    """'pop_living_in_hh_with_electricity_' -> stems of pop, living, hh, electricity + expansions."""
+    terms = set()
+    for token in re.findall(r"[a-z]+|\d+", name.lower()):
+        if token in STOPWORDS and len(token) > 2:
+            continue
+        terms.add(stem(token))
+        for expansion in COLUMN_ABBREVIATIONS.get(token, []):
+            terms.add(stem(expansion))
+    return terms
+
+
+def _match(q, c):
+    if q == c:
+        return 1.0
+    # Glued or truncated header words: 'water' in 'drinkingwater', 'authori' for 'authority'
+    if min(len(q), len(c)) >= 5 and (q in c or c in q):
+        return 0.6
+    return 0.0
+
+
+# ==================================================
+# SCHEMA LINKER
+# ==================================================
+class SchemaLinker:
+    """
+    Scores every column of a table against a question and keeps the keys plus
+    the top-k matches. Column vocabularies, IDF weights and a term -> columns
+    index are computed once per schema; a question is matched against each
+    table's vocabulary (a few hundred terms), not against every column.
+    """
+
+    def __init__(self, schema_json, top_k=TOP_K, max_full_columns=MAX_FULL_COLUMNS):
+        self.top_k = top_k
+        self.max_full_columns = max_full_columns
+        self.columns = {}
+        self.keys = {}
+        self.terms = {}
+        self.idf = {}
+        self.postings = {}
+        for table, info in schema_json.items():
+            names = [c["name"] for c in info["columns"]]
+            fks = {fk["column"] for fk in info.get("foreign_keys", [])}
+            pks = set(info.get("primary_key", []))
+            self.columns[table] = names
+            self.keys[table] = [n for n in names if n in pks or n in fks or n in KEY_COLUMNS or n.endswith("_id")
+                                or ANCHOR_COLUMNS.match(n)]
+            self.terms[table] = {n: column_terms(n) for n in names}
+            postings = {}
+            for pos, n in enumerate(names):
+                for t in self.terms[table][n]:
+                    postings.setdefault(t, []).append(pos)
+            self.postings[table] = postings
+            self.idf[table] = {t: math.log(1 + len(names) / len(cols)) for t, cols in postings.items()}
+
+    def score(self, question, table, terms=None):
+        """[(column, score)] for every non-key column, best first (schema order breaks ties)."""
+        terms = question_terms(question) if terms is None else terms
+        idf = self.idf[table]
+        names = self.columns[table]
+        totals = [0.0] * len(names)
+        for q in terms:
+            # Best match of this question term per column, summed over terms
+            best = {}
+            for c, weight in idf.items():
+                w = _match(q, c) * weight
+                if w:
+                    for pos in self.postings[table][c]:
+                        if w > best.get(pos, 0.0):
+                            best[pos] = w
+            for pos, w in best.items():
+                totals[pos] += w
+        keys = set(self.keys[table])
+        scored = sorted((-totals[pos], pos, name) for pos, name in enumerate(names) if name not in keys)
+        return [(name, -neg) for neg, _, name in scored]
+
+    def link(self, question, tables, top_k=None, required=None):
+        """
+        {table: [columns]} in schema order: keys + top-k scoring columns, or every
+        column for narrow tables / when pruning is off. `required` ({table: cols})
+        forces columns in, e.g. the gold SQL's columns when building training data.
+        """
+        top_k = self.top_k if top_k is None else top_k
+        terms = question_terms(question)
+        selection = {}
+        for table in tables:
+            if table not in self.columns:
+                continue
+            names = self.columns[table]
+            if not top_k or len(names) <= self.max_full_columns:
+                selection[table] = None
+                continue
+            keep = set(self.keys[table])
+            keep.update(name for name, s in self.score(question, table, terms)[:top_k] if s > 0)
+            keep.update(c for c in (required or {}).get(table, ()) if c in names)
+            selection[table] = [n for n in names if n in keep]
+        return selection
@@ -0,0 +1,455 @@
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import ParseError
+from sqlglot.optimizer.scope import Scope, traverse_scope
+
+from schema_cache import SchemaCache
+
+# ==================================================
+# CONFIG
+# ==================================================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_FILE = os.path.join(BASE_DIR, "database_schema.json")
+SQL_FILES = [os.path.join(BASE_DIR, "queries.sql")] + sorted(glob.glob(os.path.join(BASE_DIR, "dataset", "*.sql")))
+CACHE_FILE = os.path.join(BASE_DIR, ".sql_validation_cache.json")
+REPORT_FILE = os.path.join(BASE_DIR, "sql_validation_report.json")
+DIALECT = "postgres"
+
+# Bump when the checks change so cached verdicts are not reused
+VALIDATOR_VERSION = 3
+
+# A misspelled identifier is replaced by the closest catalog name when it is at
+# most this many edits away (after dropping '_stats' and plural 's') and the
+# runner-up is at least REPAIR_MARGIN edits further. A length-relative limit
+# let long NFHS column names "repair" to a different statistic.
+REPAIR_MAX_EDITS = 2
+REPAIR_MARGIN = 2
+
+
+# ==================================================
+# SCHEMA CATALOG
+# ==================================================
+def load_catalog(path=SCHEMA_FILE):
+    """{table: set(columns)} from database_schema.json."""
+    return SchemaCache.from_file(path).catalog
+
+
+def catalog_fingerprint(catalog):
+    blob = json.dumps({t: sorted(c) for t, c in sorted(catalog.items())})
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+# ==================================================
+# RESOLUTION
+# ==================================================
+def _source_columns(source, catalog):
+    """Output columns of a scope source, or None when they cannot be known (SELECT *)."""
+    if isinstance(source, exp.Table):
+        return catalog.get(source.name.lower())
+    if isinstance(source, Scope):
+        select = source.expression
+        if isinstance(select, exp.Select) and not select.is_star:
+            return {n.lower() for n in select.named_selects}
+    return None
+
+
+def _output_aliases(scope):
+    select = scope.expression
+    if isinstance(select, exp.Select):
+        return {e.alias.lower() for e in select.expressions if isinstance(e, exp.Alias)}
+    return set()
+
+
+def resolve(ast, catalog):
+    """
+    Walks every scope (CTEs, subqueries, unions) and returns (tables, columns,
+    problems): the real tables referenced, {table: set(columns)} read from them,
+    and a list of unknown table/column messages.
+    """
+    tables, columns, problems = set(), {}, []
+    cte_names = {cte.alias_or_name.lower() for cte in ast.find_all(exp.CTE)}
+
+    for scope in traverse_scope(ast):
+        for name, source in scope.sources.items():
+            if isinstance(source, exp.Table):
+                table = source.name.lower()
+                if table in catalog:
+                    tables.add(table)
+                elif table not in cte_names:
+                    problems.append(f"unknown table '{source.name}'")
+
+        aliases = _output_aliases(scope)
+        for column in scope.columns:
+            name = column.name.lower()
+            if not name or name == "*" or not _owned_by(column, scope):
+                continue
+            qualifier = column.table.lower()
+            if qualifier:
+                source = scope.sources.get(qualifier) or scope.sources.get(column.table)
+                if source is None:
+                    # Correlated reference to an outer query's alias
+                    if any(qualifier in s.sources for s in _outer_scopes(scope)):
+                        continue
+                    problems.append(f"unknown table alias '{column.table}' in '{column.sql(dialect=DIALECT)}'")
+                    continue
+                known = _source_columns(source, catalog)
+                if known is not None and name not in known:
+                    problems.append(f"unknown column '{column.sql(dialect=DIALECT)}'")
+                elif isinstance(source, exp.Table) and known is not None:
+                    columns.setdefault(source.name.lower(), set()).add(name)
+                continue
+
+            # Unqualified: any source in this scope (or the enclosing query's, for a
+            # correlated subquery), or a SELECT alias
+            if name in aliases:
+                continue
+            sources = list(_visible_sources(scope))
+            candidates = [_source_columns(s, catalog) for s in sources]
+            owners = [s.name.lower() for s, c in zip(sources, candidates)
+                      if isinstance(s, exp.Table) and c is not None and name in c]
+            for owner in owners:
+                columns.setdefault(owner, set()).add(name)
+            if owners or any(c is None for c in candidates) or any(name in c for c in candidates):
+                continue
+            problems.append(f"unknown column '{column.name}'")
+
+    return tables, columns, sorted(set(problems))
+
+
+# ==================================================
+# REPAIR
+# ==================================================
+def _stem(name):
+    name = name.lower()
+    if name.endswith("_stats"):
+        name = name[:-len("_stats")]
+    return name[:-1] if name.endswith("s") and len(name) > 3 else name
+
+
+def edit_distance(a, b):
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def nearest_name(name, candidates, max_edits=REPAIR_MAX_EDITS, margin=REPAIR_MARGIN):
+    """
+    The catalog name closest to `name` ('population' -> 'population_stats',
+    'male' -> 'males'), or None when nothing is close enough or the runner-up
+    is nearly as close.
+    """
+    name, stem = name.lower(), _stem(name)
+    scored = sorted((min(edit_distance(stem, _stem(c)), edit_distance(name, c)), c) for c in candidates)
+    if not scored or scored[0][0] > max_edits:
+        return None
+    if len(scored) > 1 and scored[1][0] - scored[0][0] < margin:
+        return None  # ambiguous
+    return scored[0][1]
+
+
+def repair_query(sql, catalog, max_edits=REPAIR_MAX_EDITS):
+    """
+    Renames unknown tables and columns to their nearest catalog names. Returns
+    (sql, fixes); `sql` is unchanged when it does not parse or nothing was
+    fixed. Re-validate the result: a fix can still leave other errors.
+    """
+    try:
+        ast = sqlglot.parse_one(sql, read=DIALECT)
+    except ParseError:
+        return sql, []
+    fixes = []
+    cte_names = {cte.alias_or_name.lower() for cte in ast.find_all(exp.CTE)}
+
+    for table in list(ast.find_all(exp.Table)):
+        name = table.name.lower()
+        if not name or name in catalog or name in cte_names:
+            continue
+        new = nearest_name(name, catalog, max_edits)
+        if new is None:
+            continue
+        fixes.append(f"table {table.name} -> {new}")
+        if not table.alias:
+            # Columns qualified with the old table name follow it
+            for column in ast.find_all(exp.Column):
+                if column.table.lower() == name:
+                    column.set("table", exp.to_identifier(new))
+        table.set("this", exp.to_identifier(new))
+
+    for scope in traverse_scope(ast):
+        tables = {alias.lower(): s.name.lower() for alias, s in scope.sources.items() if isinstance(s, exp.Table)}
+        aliases = _output_aliases(scope)
+        for column in scope.columns:
+            name = column.name.lower()
+            if not name or name == "*" or name in aliases or not _owned_by(column, scope):
+                continue
+            qualifier = column.table.lower()
+            if qualifier:
+                if qualifier not in tables or tables[qualifier] not in catalog:
+                    continue
+                known = catalog[tables[qualifier]]
+            else:
+                known = set().union(*(catalog.get(t, set()) for t in tables.values())) if tables else set()
+                if any(not isinstance(s, exp.Table) for s in scope.sources.values()):
+                    continue  # may come from a subquery or CTE
+            if name in known:
+                continue
+            new = nearest_name(name, known, max_edits)
+            if new is not None:
+                fixes.append(f"column {column.sql(dialect=DIALECT)} -> {new}")
+                column.set("this", exp.to_identifier(new))
+
+    if not fixes:
+        return sql, []
+    return ast.sql(dialect=DIALECT), list(dict.fromkeys(fixes))
+
+
+def _owned_by(column, scope):
+    """
+    sqlglot also lists a subquery's unqualified columns in the enclosing scope
+    (they might be correlated); they are checked in the subquery's own scope.
+    """
+    select = scope.expression
+    return not isinstance(select, exp.Select) or column.find_ancestor(exp.Select) is select
+
+
+def _outer_scopes(scope):
+    """
+    Enclosing queries a subquery can correlate with. CTEs and derived tables
+    can't see outwards, and their parent's sources include the CTE or derived
+    table itself, whose output names would vouch for its own unknown columns.
+    """
+    while scope.is_subquery and scope.parent is not None:
+        scope = scope.parent
+        yield scope
+
+
+def _visible_sources(scope):
+    yield from scope.sources.values()
+    for outer in _outer_scopes(scope):
+        yield from outer.sources.values()
+
+
+def referenced_tables(sql, catalog):
+    """Real tables a query reads, through CTEs and subqueries; falls back to none on parse errors."""
+    try:
+        return resolve(sqlglot.parse_one(sql, read=DIALECT), catalog)[0]
+    except ParseError:
+        return set()
+
+
+# ==================================================
+# VALIDATION
+# ==================================================
+def query_key(sql, catalog_fp, explain):
+    normalized = " ".join(sql.split())
+    blob = f"{VALIDATOR_VERSION}|{catalog_fp}|{int(explain)}|{normalized}"
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def validate_query(sql, catalog, engine=None):
+    """Parse + resolve (+ EXPLAIN when an engine is given). Returns a verdict dict."""
+    verdict = {"ok": True, "errors": [], "tables": [], "columns": {}}
+    try:
+        statements = [s for s in sqlglot.parse(sql, read=DIALECT) if s is not None]
+    except ParseError as e:
+        return {"ok": False, "errors": [f"parse error: {e.errors[0]['description'] if e.errors else e}"],
+                "tables": [], "columns": {}}
+    if len(statements) != 1:
+        return {"ok": False, "errors": [f"expected 1 statement, found {len(statements)}"], "tables": [], "columns": {}}
+
+    tables, columns, problems = resolve(statements[0], catalog)
+    verdict["tables"] = sorted(tables)
+    verdict["columns"] = {t: sorted(c) for t, c in sorted(columns.items())}
+    verdict["errors"].extend(problems)
+
+    if engine is not None and not problems:
+        from sqlalchemy import text
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("EXPLAIN " + sql.rstrip().rstrip(";")))
+        except Exception as e:
+            verdict["errors"].append(f"explain: {str(e).splitlines()[0]}")
+
+    verdict["ok"] = not verdict["errors"]
+    return verdict
+
+
+_WORKER = {}
+
+
+def _init_worker(schema_path, dsn):
+    _WORKER["catalog"] = load_catalog(schema_path)
+    _WORKER["engine"] = None
+    if dsn:
+        from sqlalchemy import create_engine
+        _WORKER["engine"] = create_engine(dsn, pool_size=1)
+
+
+def _validate_task(task):
+    key, sql = task
+    return key, validate_query(sql, _WORKER["catalog"], _WORKER["engine"])
+
+
+# ==================================================
+# CACHE
+# ==================================================
+def load_cache(path=CACHE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_cache(cache, path=CACHE_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+
+
+# ==================================================
+# SELF-CHECK
+# ==================================================
+# (query, should validate): scoping mistakes that once slipped through or were rejected
+SCOPE_CASES = [
+    ("WITH t AS (SELECT state, bogus FROM population_stats) SELECT state FROM t", False),
+    ("SELECT state FROM (SELECT state, bogus FROM population_stats) s", False),
+    ("WITH t AS (SELECT state FROM population_stats) SELECT state FROM t", True),
+    ("SELECT state FROM population_stats p WHERE EXISTS (SELECT 1 FROM tru WHERE id = tru_id)", True),
+    ("SELECT state FROM population_stats p WHERE EXISTS (SELECT 1 FROM tru WHERE bogus = tru_id)", False),
+]
+
+
+# (query, repaired query or None when it must be left for the LLM to redo)
+REPAIR_CASES = [
+    ("SELECT males FROM population WHERE state = 1", "SELECT males FROM population_stats WHERE state = 1"),
+    ("SELECT male FROM population_stats", "SELECT males FROM population_stats"),
+    # The right column is ~14 edits away; the nearest by ratio was a women's statistic
+    ("SELECT men_age_15_49_years_who_are_anaemic FROM healthcare_stats", None),
+    # A subquery's own columns are not repaired against the outer query's tables
+    ("SELECT state FROM population_stats p WHERE EXISTS (SELECT 1 FROM tru WHERE id = tru_id)", None),
+]
+
+
+def self_check(catalog):
+    """Failure messages for SCOPE_CASES and REPAIR_CASES; empty when every outcome is as expected."""
+    failures = []
+    for sql, expected in SCOPE_CASES:
+        verdict = validate_query(sql, catalog)
+        if verdict["ok"] != expected:
+            failures.append(f"expected {'ok' if expected else 'an error'}, got {verdict['errors'] or 'ok'}: {sql}")
+    for sql, expected in REPAIR_CASES:
+        repaired, fixes = repair_query(sql, catalog)
+        got = repaired if fixes else None
+        if got != expected:
+            failures.append(f"repair expected {expected}, got {got} ({'; '.join(fixes) or 'no fixes'}): {sql}")
+    return failures
+
+
+# ==================================================
+# RUNNER
+# ==================================================
+def load_sql_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    return [q.strip() + ";" for q in content.split(";") if q.strip()]
+
+
+def validate_files(sql_files, schema_path=SCHEMA_FILE, dsn=None, workers=None, cache_path=CACHE_FILE, use_cache=True):
+    """
+    Validates every query in `sql_files`. Verdicts are cached by a hash of the
+    normalized query, the schema and the EXPLAIN flag, so only new or edited
+    queries are parsed again; those are checked across a process pool.
+    """
+    start = time.perf_counter()
+    catalog = load_catalog(schema_path)
+    catalog_fp = catalog_fingerprint(catalog)
+    cache = load_cache(cache_path) if use_cache else {}
+
+    entries, pending, cached = [], {}, 0
+    for path in sql_files:
+        for i, sql in enumerate(load_sql_file(path), start=1):
+            key = query_key(sql, catalog_fp, bool(dsn))
+            entries.append((os.path.basename(path), i, sql, key))
+            if key in cache:
+                cached += 1
+            else:
+                pending[key] = sql
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(schema_path, dsn)) as pool:
+            for key, verdict in pool.map(_validate_task, pending.items(), chunksize=16):
+                cache[key] = verdict
+
+    if use_cache:
+        # Only keep verdicts for queries that still exist
+        save_cache({key: cache[key] for *_, key in entries}, cache_path)
+
+    results = [{"file": f, "index": i, "sql": sql, **cache[key]} for f, i, sql, key in entries]
+    failed = [r for r in results if not r["ok"]]
+    return {
+        "queries": len(results),
+        "checked": len(pending),
+        "cached": cached,
+        "failed": len(failed),
+        "explain": bool(dsn),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        "failures": failed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse and resolve curated SQL against database_schema.json.")
+    parser.add_argument("files", nargs="*", default=SQL_FILES)
+    parser.add_argument("--schema", default=SCHEMA_FILE)
+    parser.add_argument("--explain", action="store_true",
+                        help="Also run EXPLAIN against DB_CONNECTION_STRING (or --dsn).")
+    parser.add_argument("--dsn", default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--report", default=REPORT_FILE)
+    parser.add_argument("--self-check", action="store_true", help="Only run the built-in regression cases.")
+    args = parser.parse_args()
+
+    if args.self_check:
+        failures = self_check(load_catalog(args.schema))
+        for failure in failures:
+            print(f"❌ {failure}")
+        print("✅ All self-check cases passed" if not failures else f"❌ {len(failures)} self-check case(s) failed")
+        sys.exit(1 if failures else 0)
+
+    dsn = None
+    if args.explain:
+        dsn = args.dsn or os.getenv("DB_CONNECTION_STRING")
+        if not dsn:
+            print("❌ --explain needs --dsn or DB_CONNECTION_STRING")
+            sys.exit(2)
+
+    report = validate_files(args.files, args.schema, dsn, args.workers, use_cache=not args.no_cache)
+    for r in report["failures"]:
+        print(f"❌ {r['file']} #{r['index']}: {'; '.join(r['errors'])}")
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+
+    print("-" * 60)
+    print(f"📊 {report['queries']} queries: {report['checked']} checked, {report['cached']} from cache, "
+          f"{report['failed']} failed in {report['elapsed_ms']:.0f} ms")
+    print(f"🧾 Report: {args.report}")
+    sys.exit(1 if report["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import os
+import re
+import math
+import time
+import random
+import argparse
+
+from intent_matcher import (
+    KeywordAutomaton, _is_word_boundary, load_csv_keywords,
+    LANGUAGE_KEYWORDS, RELIGION_KEYWORDS, AGE_GROUP_KEYWORDS,
+)
+
+# ==================================================
+# CONFIG
+# ==================================================
+# Minimum confidence for answering with a curated query instead of the LLM
+THRESHOLD = 0.9
+
+# Words that change the SQL even when the rest of the question is the same;
+# a curated query is only reused when these agree exactly
+POLARITY_WORDS = {
+    "highest", "lowest", "most", "least", "top", "bottom", "largest", "smallest", "fewest",
+    "more", "less", "fewer", "higher", "lower", "maximum", "minimum", "average", "total",
+    "male", "female", "men", "women", "boys", "girls", "rural", "urban", "village", "villages",
+    "city", "cities", "town", "towns", "first", "second", "third", "percentage", "percent", "ratio",
+    "literate", "illiterate", "literacy", "not", "without", "except",
+    "above", "below", "over", "under", "greater", "exceed", "exceeds", "exceeding", "than", "between",
+    "at", "least", "within", "beyond",
+}
+STOPWORDS = {"the", "a", "an", "of", "in", "is", "are", "what", "which", "how", "do", "does", "there",
+             "to", "for", "by", "and", "or", "me", "show", "give", "list", "find", "tell", "number"}
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_question(question):
+    """Case, whitespace and trailing punctuation don't change the SQL."""
+    return re.sub(r"\s+", " ", question).strip().rstrip("?.!").strip().casefold()
+
+
+def _stem(word):
+    """'living'/'lives'/'live' -> 'liv': inflections don't change the SQL."""
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    return word[:-1] if word.endswith("e") and len(word) > 3 else word
+
+
+def load_curated_pairs(template_dir):
+    """The curated (question, SQL) pairs: question.txt + queries.sql and every pair in dataset/."""
+    from generate_training_data import QUESTIONS_FILE, SQL_FILE, DATASET_DIR, \
+        discover_pairs, load_questions, load_sql_queries
+    files = [(os.path.join(template_dir, QUESTIONS_FILE), os.path.join(template_dir, SQL_FILE))]
+    pairs = []
+    for q_path, s_path in files + discover_pairs(os.path.join(template_dir, DATASET_DIR)):
+        pairs.extend(zip(load_questions(q_path), load_sql_queries(s_path)))
+    return pairs
+
+
+# ==================================================
+# TEMPLATE ROUTER
+# ==================================================
+class TemplateRouter:
+    """
+    Deterministic question -> curated SQL lookup. A question is answered from
+    the corpus when it names exactly the same entities (states, languages,
+    religions, age groups, numbers), polarity and comparison words and, up to
+    inflection, the same content words as a curated question, and their TF-IDF
+    word vectors agree to `threshold` cosine; an identical normalized question
+    has confidence 1.0. Rewording with stopwords is tolerated; a different
+    subject ("children" for "population") is not.
+    """
+
+    def __init__(self, pairs, threshold=THRESHOLD):
+        self.threshold = threshold
+        states = load_csv_keywords("regions.csv", "area_name")
+        entities = states | LANGUAGE_KEYWORDS | RELIGION_KEYWORDS | AGE_GROUP_KEYWORDS
+        self.entities = KeywordAutomaton((e, e) for e in entities if e)
+
+        self.exact = {}
+        docs = []
+        for question, sql in pairs:
+            self.exact.setdefault(normalize_question(question), (question, sql))
+            docs.append(self._terms(question))
+        df = {}
+        for terms in docs:
+            for t in set(terms):
+                df[t] = df.get(t, 0) + 1
+        n = len(docs)
+        self.idf = {t: math.log((1 + n) / (1 + c)) + 1 for t, c in df.items()}
+        self.default_idf = math.log(1 + n) + 1   # unseen words weigh like the rarest
+
+        self.candidates = {}
+        for (question, sql), terms in zip(pairs, docs):
+            entry = (question, sql, self._vector(terms))
+            self.candidates.setdefault(self._key(question, terms), []).append(entry)
+
+    def _terms(self, question):
+        return [w for w in WORD_RE.findall(question.lower()) if w not in STOPWORDS]
+
+    def _vector(self, terms):
+        vec = {}
+        for t in terms:
+            vec[t] = vec.get(t, 0.0) + self.idf.get(t, self.default_idf)
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        return {t: v / norm for t, v in vec.items()}
+
+    def _key(self, question, terms):
+        return self.signature(question), frozenset(_stem(t) for t in terms)
+
+    def signature(self, question):
+        """Entities, numbers and polarity words; questions that differ here need different SQL."""
+        q = question.lower()
+        found = {payload for start, end, payload in self.entities.iter_matches(q) if _is_word_boundary(q, start, end)}
+        words = set(WORD_RE.findall(q))
+        found |= {w for w in words if w.isdigit()} | (words & POLARITY_WORDS)
+        return frozenset(found)
+
+    def match(self, question):
+        """Best curated match as {sql, confidence, question}, or None if nothing shares the signature and words."""
+        hit = self.exact.get(normalize_question(question))
+        if hit:
+            return {"sql": hit[1], "confidence": 1.0, "question": hit[0]}
+        terms = self._terms(question)
+        candidates = self.candidates.get(self._key(question, terms))
+        if not candidates:
+            return None
+        vector = self._vector(terms)
+        best, score = None, 0.0
+        for entry in candidates:
+            s = sum(w * entry[2].get(t, 0.0) for t, w in vector.items())
+            if s > score:
+                best, score = entry, s
+        return {"sql": best[1], "confidence": round(score, 4), "question": best[0]} if best else None
+
+    def route(self, question):
+        """The match if it clears the threshold, else None."""
+        m = self.match(question)
+        return m if m and m["confidence"] >= self.threshold else None
+
+
+# ==================================================
+# SELF-CHECK
+# ==================================================
+def main():
+    parser = argparse.ArgumentParser(description="Route paraphrased and altered curated questions; report hits and errors.")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--substitutions", type=int, default=1000)
+    args = parser.parse_args()
+
+    pairs = load_curated_pairs(os.path.dirname(os.path.abspath(__file__)))
+    start = time.perf_counter()
+    router = TemplateRouter(pairs, args.threshold)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rewrites = [(r"^How many (\w+) live in", r"How many \1 are living in"), (r"^What is the", "Tell me the"),
+                (r"\?$", ""), (r"^Count the number of", "Count the")]
+    paraphrased = wrong = 0
+    start = time.perf_counter()
+    for question, sql in pairs:
+        for pattern, repl in rewrites:
+            variant = re.sub(pattern, repl, question)
+            if variant == question:
+                continue
+            routed = router.route(variant)
+            paraphrased += routed is not None and routed["sql"] == sql
+            wrong += routed is not None and routed["sql"] != sql
+    # Swapping the state must never reuse the other state's SQL
+    swapped = [re.sub(r"\bKerala\b", "Goa", q) for q, _ in pairs if "Kerala" in q]
+    leaked = sum(1 for q in swapped if (r := router.route(q)) and "kerala" in r["sql"].lower())
+    # Replacing one content word with another from the corpus changes what is asked
+    rng = random.Random(0)
+    vocabulary = sorted({w for q, _ in pairs for w in WORD_RE.findall(q.lower()) if w not in STOPWORDS})
+    substituted = kept = 0
+    for question, sql in rng.sample(pairs, min(len(pairs), args.substitutions)):
+        words = question.split()
+        slots = [i for i, w in enumerate(words) if w.lower().strip("?,.") not in STOPWORDS]
+        if not slots:
+            continue
+        i = rng.choice(slots)
+        replacement = rng.choice(vocabulary)
+        if _stem(replacement) == _stem(words[i].lower().strip("?,.")):
+            continue
+        words[i] = replacement
+        substituted += 1
+        routed = router.route(" ".join(words))
+        kept += routed is not None and routed["sql"] == sql
+    route_us = (time.perf_counter() - start) * 1e6 / max(1, paraphrased + wrong + len(swapped) + substituted)
+    print(f"📋 {len(pairs)} curated pairs, index built in {build_ms:.1f} ms, threshold {args.threshold}")
+    print(f"   paraphrases routed to their own SQL: {paraphrased}, to another query's SQL: {wrong}")
+    print(f"   Kerala->Goa swaps answered with Kerala SQL: {leaked}/{len(swapped)}")
+    print(f"   one-word substitutions still answered with the original SQL: {kept}/{substituted}")
+    print(f"   ~{route_us:.0f} µs per routing")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,16 @@
 import os
 import sys
-import pandas as pd
+import json
+import time
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+
+from result_equivalence import ResultSet
 
 # 1. Load Environment Variables
 load_dotenv()
@@ -13,92 +21,226 @@ class DualLogger:
     def __init__(self, filename):
         self.terminal = sys.stdout
         self.log = open(filename, "w", encoding="utf-8")
+        self.lock = threading.Lock()
 
     def write(self, message):
-        self.terminal.write(message)
-        self.log.write(message)
+        # Worker threads print concurrently; keep lines whole
+        with self.lock:
+            self.terminal.write(message)
+            self.log.write(message)
 
     def flush(self):
         # Needed for python 3 compatibility
         self.terminal.flush()
         self.log.flush()
 
-# Force UTF-8 on the terminal first (for emojis)
-sys.stdout.reconfigure(encoding='utf-8')  # type: ignore
-sys.stderr.reconfigure(encoding='utf-8')  # type: ignore
-
-# Redirect stdout and stderr to our DualLogger
-# This captures all print() statements and errors
 OUTPUT_FILE = "output.txt"
-sys.stdout = DualLogger(OUTPUT_FILE)
-sys.stderr = sys.stdout 
-# --------------------------------------------
-
-# Get the single connection string from .env
-DB_CONNECTION_STRING = os.getenv("DB_CONNECTION_STRING")
-
-# Check if it exists
-if not DB_CONNECTION_STRING:
-    print("❌ Error: DB_CONNECTION_STRING not found in .env file.")
-    sys.exit(1)
-
 SQL_FILE ="queries.sql"
+REPORT_FILE = "verify_report.json"
+
+POOL_SIZE = 4                  # concurrent connections / worker threads
+STATEMENT_TIMEOUT_MS = 30000   # per-query limit enforced by the server
+SLOWDOWN_FACTOR = 1.5          # flag queries this much slower than last run...
+SLOWDOWN_MIN_MS = 50           # ...and at least this many ms slower
+RESULT_HASH_VERSION = 3        # bump when result_hash changes; older reports are not compared on it
 
 def load_queries(filepath):
-    """Reads queries from the file (one query per line)."""
+    """Reads queries from the file, split on ';' like the training-data generator."""
     if not os.path.exists(filepath):
         print(f"❌ Error: {filepath} not found.")
         return []
-    
-    with open(filepath, 'r', encoding='utf-8') as f:
-        # distinct lines, skipping empty ones
-        return [line.strip() for line in f if line.strip()]
 
-def verify_queries():
-    print(f"📄 Output is being saved to: {os.path.abspath(OUTPUT_FILE)}")
-    print("🚀 Connecting to Database...")
-    
+    with open(filepath, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return [q.strip() for q in content.split(";") if q.strip()]
+
+def sql_key(sql):
+    """Identifies a query across runs independent of its position or whitespace."""
+    return hashlib.sha256(" ".join(sql.split()).encode("utf-8")).hexdigest()[:16]
+
+def result_hash(columns, rows):
+    """
+    Order-insensitive fingerprint of a result set (ORDER BY ties may come back in
+    any order). Column names and order, int/float/Decimal and last-digit float
+    noise don't change it; see result_equivalence.py.
+    """
+    return ResultSet(columns, rows).fingerprint()
+
+def make_engine(dsn, pool_size, timeout_ms):
+    """Bounded pool (no overflow); Postgres enforces statement_timeout on every connection."""
+    engine = create_engine(dsn, pool_size=pool_size, max_overflow=0, pool_pre_ping=True)
+    if engine.dialect.name == "postgresql":
+        @event.listens_for(engine, "connect")
+        def set_timeout(dbapi_conn, _):
+            with dbapi_conn.cursor() as cur:
+                cur.execute(f"SET statement_timeout = {int(timeout_ms)}")
+            dbapi_conn.commit()
+    return engine
+
+def run_query(engine, file, index, sql, key):
+    entry = {"id": f"{file}#{index}", "file": file, "index": index, "key": key, "sql": sql}
+    start = time.perf_counter()
     try:
-        engine = create_engine(DB_CONNECTION_STRING)  # type: ignore
-        queries = load_queries(SQL_FILE)
-
-        if not queries:
-            print("⚠️  No queries found in queries.sql to run.")
-            return
-
-        print(f"📋 Found {len(queries)} queries. Starting verification...\n")
-
         with engine.connect() as conn:
-            for index, sql_query in enumerate(queries, 1):
-                print(f"🔹 Running Query #{index}...")
-                
-                try:
-                    # Execute query
-                    result = conn.execute(text(sql_query))
-                    
-                    # Check for data
-                    if result.returns_rows:
-                        rows = result.fetchall()
-                        df = pd.DataFrame(rows, columns=list(result.keys()))
-                        
-                        if not df.empty:
-                            print(f"✅ Success! Returned {len(df)} rows.")
-                            # to_string handles formatting nicely for text files
-                            print(df.head().to_string(index=False)) 
-                        else:
-                            print("⚠️  Query ran successfully but returned NO data.")
-                            print(f"Query: {sql_query}")
-                    else:
-                        print("✅ Query executed (No rows returned).")
-
-                except Exception as q_err:
-                    print(f"❌ Query #{index} Failed: {q_err}")
-                    conn.rollback()
-                
-                print("-" * 50)
+            result = conn.execute(text(sql))
+            if result.returns_rows:
+                columns = list(result.keys())
+                rows = result.fetchall()
+                entry.update(rows=len(rows), result_hash=result_hash(columns, rows),
+                             status="ok" if rows else "empty")
+            else:
+                entry.update(rows=0, result_hash=None, status="ok")
+            conn.rollback()
+    except Exception as e:
+        message = str(e).splitlines()[0]
+        entry.update(rows=None, result_hash=None, error=message,
+                     status="timeout" if "statement timeout" in message else "error")
+    entry["ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return entry
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q / 100 * len(values)))], 2)
+
+def diff_reports(current, previous, factor=SLOWDOWN_FACTOR, min_ms=SLOWDOWN_MIN_MS):
+    """Compares two reports by query text: status regressions, changed results, slowdowns."""
+    before = {q["key"]: q for q in previous.get("queries", [])}
+    now = {q["key"]: q for q in current["queries"]}
+    diff = {"regressions": [], "fixed": [], "result_changed": [], "slowdowns": [],
+            "new": sorted(set(now) - set(before)), "removed": sorted(set(before) - set(now))}
+    # Hashes from another result_hash version never match; only compare like with like
+    same_hashing = previous.get("result_hash_version") == current.get("result_hash_version")
+    for key, q in now.items():
+        old = before.get(key)
+        if old is None:
+            continue
+        change = {"id": q["id"], "before": old["status"], "after": q["status"]}
+        if old["status"] in ("ok", "empty") and q["status"] in ("error", "timeout"):
+            diff["regressions"].append(change)
+        elif old["status"] in ("error", "timeout") and q["status"] in ("ok", "empty"):
+            diff["fixed"].append(change)
+        elif same_hashing and q["result_hash"] != old["result_hash"] and {old["status"], q["status"]} <= {"ok", "empty"}:
+            diff["result_changed"].append({**change, "rows_before": old["rows"], "rows_after": q["rows"]})
+        if q["ms"] > old["ms"] * factor and q["ms"] - old["ms"] >= min_ms:
+            diff["slowdowns"].append({"id": q["id"], "ms_before": old["ms"], "ms_after": q["ms"]})
+    return diff
+
+def verify_queries(sql_files, dsn, pool_size=POOL_SIZE, timeout_ms=STATEMENT_TIMEOUT_MS):
+    engine = make_engine(dsn, pool_size, timeout_ms)
+    tasks = [(os.path.basename(path), i, sql) for path in sql_files
+             for i, sql in enumerate(load_queries(path), 1)]
+    if not tasks:
+        print("⚠️  No queries found to run.")
+        return None
+
+    # The corpus repeats some queries verbatim; number the repeats so diff keys stay unique
+    seen = {}
+    for n, (file, i, sql) in enumerate(tasks):
+        key = sql_key(sql)
+        seen[key] = seen.get(key, 0) + 1
+        tasks[n] = (file, i, sql, f"{key}-{seen[key]}")
+
+    print(f"📋 Found {len(tasks)} queries. Running on {pool_size} connections (timeout {timeout_ms} ms)...\n")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=pool_size) as pool:
+        results = list(pool.map(lambda t: run_query(engine, *t), tasks))
+    wall = time.perf_counter() - start
+    engine.dispose()
+
+    for q in results:
+        icon = {"ok": "✅", "empty": "⚠️ ", "error": "❌", "timeout": "⏱️ "}[q["status"]]
+        detail = q.get("error") or f"{q['rows']} rows"
+        print(f"{icon} {q['id']:<35} {q['ms']:>9.1f} ms  {detail}")
+
+    timings = [q["ms"] for q in results]
+    counts = {s: sum(q["status"] == s for q in results) for s in ("ok", "empty", "error", "timeout")}
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "files": [os.path.abspath(p) for p in sql_files],
+        "pool_size": pool_size,
+        "timeout_ms": timeout_ms,
+        "result_hash_version": RESULT_HASH_VERSION,
+        "summary": {
+            **counts,
+            "queries": len(results),
+            "wall_s": round(wall, 3),
+            "sum_ms": round(sum(timings), 1),
+            "p50_ms": percentile(timings, 50),
+            "p95_ms": percentile(timings, 95),
+            "max_ms": max(timings),
+        },
+        "queries": results,
+    }
+
+def main(sql_file=SQL_FILE, output_file=OUTPUT_FILE):
+    """CLI entry point; other corpora (Template/) call it with their own default files."""
+    parser = argparse.ArgumentParser(description="Run the SQL corpus concurrently and diff against the last run.")
+    parser.add_argument("files", nargs="*", default=[sql_file])
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE)
+    parser.add_argument("--timeout-ms", type=int, default=STATEMENT_TIMEOUT_MS)
+    parser.add_argument("--report", default=REPORT_FILE)
+    parser.add_argument("--baseline", default=None, help="Report to diff against (default: the previous --report).")
+    parser.add_argument("--fail-on-slowdown", action="store_true")
+    args = parser.parse_args()
+
+    # Force UTF-8 on the terminal first (for emojis), then log to output_file too
+    sys.stdout.reconfigure(encoding='utf-8')  # type: ignore
+    sys.stderr.reconfigure(encoding='utf-8')  # type: ignore
+    sys.stdout = DualLogger(output_file)
+    sys.stderr = sys.stdout
+
+    # Get the single connection string from .env
+    dsn = os.getenv("DB_CONNECTION_STRING")
+    if not dsn:
+        print("❌ Error: DB_CONNECTION_STRING not found in .env file.")
+        sys.exit(1)
+
+    print(f"📄 Output is being saved to: {os.path.abspath(output_file)}")
+    baseline_path = args.baseline or args.report
+    previous = None
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as f:
+            previous = json.load(f)
 
+    try:
+        report = verify_queries(args.files, dsn, args.pool_size, args.timeout_ms)
     except Exception as e:
         print(f"\n❌ Database Connection Error: {e}")
+        sys.exit(1)
+    if report is None:
+        return
+
+    failing = False
+    if previous:
+        diff = report["diff"] = diff_reports(report, previous)
+        report["baseline"] = {"path": os.path.abspath(baseline_path), "generated_at": previous.get("generated_at")}
+        print("-" * 50)
+        print(f"🔍 Diff vs {baseline_path} ({previous.get('generated_at')}):")
+        for name in ("regressions", "result_changed", "slowdowns", "fixed"):
+            print(f"   {name:<15} {len(diff[name])}")
+            for item in diff[name][:10]:
+                print(f"      {item}")
+        print(f"   new / removed   {len(diff['new'])} / {len(diff['removed'])}")
+        if previous.get("result_hash_version") != RESULT_HASH_VERSION:
+            print("   ℹ️  Baseline used another result hash version; result changes not compared this run")
+        failing = bool(diff["regressions"] or diff["result_changed"] or
+                       (args.fail_on_slowdown and diff["slowdowns"]))
+
+    if args.baseline is None and previous:
+        # Keep the previous run around for manual comparison
+        with open(args.report + ".prev", "w", encoding="utf-8") as f:
+            json.dump(previous, f, indent=2)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    s = report["summary"]
+    print("-" * 50)
+    print(f"📊 {s['queries']} queries: {s['ok']} ok, {s['empty']} empty, {s['error']} errors, {s['timeout']} timeouts")
+    print(f"⏱️  wall {s['wall_s']:.2f}s, p50 {s['p50_ms']} ms, p95 {s['p95_ms']} ms, max {s['max_ms']} ms")
+    print(f"🧾 Report: {os.path.abspath(args.report)}")
+    sys.exit(1 if failing else 0)
 
 if __name__ == "__main__":
-    verify_queries()
\ No newline at end of file
+    main()
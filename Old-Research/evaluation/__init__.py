@@ -0,0 +1,11 @@
+"""
+Offline Text-to-SQL evaluation harness, extracted from benchmark.ipynb.
+Run `python -m evaluation --help` from Old-Research/.
+"""
+from .models import BaseModel, StubModel, GroqModel, MistralModel, HFModel, MODEL_TYPES
+from .cache import PredictionCache
+from .datasets import load_dataset, load_cenquery_pairs, load_normalized
+from .metrics import normalize_sql, exact_match, string_match_percentage, percentile
+from .execution import ResultStore
+from .runner import run_benchmark_with_metrics, summarize_results, results_filename
+from .scoring import score_frame, score_results, edit_distances
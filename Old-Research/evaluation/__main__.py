@@ -0,0 +1,95 @@
+import os
+import sys
+import argparse
+
+from .models import MODEL_TYPES, StubModel
+from .cache import PredictionCache, CACHE_FILE
+from .datasets import load_dataset, SCHEMA_FORMAT
+from .execution import ResultStore, POOL_SIZE
+from .runner import run_benchmark_with_metrics, summarize_results, results_filename, RESULTS_DIR, WORKERS
+from .scoring import score_results
+
+
+def build_model(spec, dataset, args):
+    """'stub', 'groq:<model>', 'mistral:<model>' or 'hf:<path or repo id>'."""
+    model_type, _, name = spec.partition(":")
+    if model_type not in MODEL_TYPES:
+        raise SystemExit(f"❌ Unknown model type '{model_type}'; choose from {', '.join(MODEL_TYPES)}")
+    if model_type == "stub":
+        answers = {s["question"]: s.get("sql") or s.get("query") for s in dataset}
+        return StubModel(answers, latency_ms=args.stub_latency_ms, miss_rate=args.stub_miss_rate, name=name or "stub")
+    if not name:
+        raise SystemExit(f"❌ '{spec}': give a model name, e.g. {model_type}:<model>")
+    if model_type == "hf":
+        return MODEL_TYPES["hf"](name, use_gpu=not args.cpu, load_in_4bit=not args.no_4bit)
+    return MODEL_TYPES[model_type](name)
+
+
+def report(results_dir, workers):
+    """Scores the predictions in batch (string metrics), then rebuilds summary_metrics.csv."""
+    print()
+    score_results(results_dir, workers)
+    summary = summarize_results(results_dir)
+    print(f"\n📊 Summary ({os.path.join(results_dir, 'summary_metrics.csv')}):")
+    print(summary.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m evaluation",
+                                     description="Run Text-to-SQL models over a dataset and score them.")
+    parser.add_argument("--model", action="append", default=None,
+                        help="stub | groq:<model> | mistral:<model> | hf:<path> (repeatable; default stub).")
+    parser.add_argument("--dataset", action="append", default=None,
+                        help="cenquery | spider | path to a normalized JSON file (repeatable; default cenquery).")
+    parser.add_argument("--max-samples", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--dsn", default=os.getenv("DB_CONNECTION_STRING"),
+                        help="Database for execution accuracy, e.g. duckdb:///census.duckdb "
+                             "(default: $DB_CONNECTION_STRING; omitted = string metrics only).")
+    parser.add_argument("--pool-size", type=int, default=POOL_SIZE)
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    parser.add_argument("--cache", default=CACHE_FILE)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--schema-format", default=SCHEMA_FORMAT)
+    parser.add_argument("--top-k", type=int, default=0, help="Prune CenQuery schemas like the backend (0 = full).")
+    parser.add_argument("--stub-latency-ms", type=float, default=0)
+    parser.add_argument("--stub-miss-rate", type=float, default=0.1)
+    parser.add_argument("--cpu", action="store_true", help="hf: load on CPU.")
+    parser.add_argument("--no-4bit", action="store_true", help="hf: skip 4-bit quantization.")
+    parser.add_argument("--score-only", action="store_true",
+                        help="Skip generation; re-score every results file and rebuild the summary.")
+    parser.add_argument("--score-workers", type=int, default=None, help="Scoring processes (default: CPU count).")
+    args = parser.parse_args()
+
+    sys.stdout.reconfigure(encoding='utf-8')  # type: ignore
+    os.makedirs(args.results_dir, exist_ok=True)
+    if args.score_only:
+        report(args.results_dir, args.score_workers)
+        return
+
+    cache = None if args.no_cache else PredictionCache(args.cache)
+    store = ResultStore(args.dsn, args.pool_size) if args.dsn else None
+    if store is None:
+        print("⚠️  No --dsn / DB_CONNECTION_STRING; execution accuracy is skipped.")
+
+    for dataset_name in args.dataset or ["cenquery"]:
+        dataset = load_dataset(dataset_name, args.schema_format, args.top_k)
+        dataset_name = os.path.splitext(os.path.basename(dataset_name))[0].replace("_normalized", "").replace("_", "-")
+        for spec in args.model or ["stub"]:
+            model = build_model(spec, dataset, args)
+            print(f"\n=== {model.model_type.upper()} model: {model.name} / {dataset_name} "
+                  f"({len(dataset)} samples, {args.max_samples or len(dataset)} tested) ===")
+            df = run_benchmark_with_metrics(model, dataset, args.max_samples, args.workers, cache, store)
+            filename = os.path.join(args.results_dir, results_filename(model, dataset_name))
+            df.to_csv(filename, index=False)
+            print(f"✅ Saved results to {filename}")
+
+    if store is not None:
+        store.dispose()
+    report(args.results_dir, args.score_workers)
+    if cache is not None:
+        print(f"🗂️  Prediction cache: {cache.hits} hits / {cache.misses} misses ({args.cache})")
+
+
+if __name__ == "__main__":
+    main()
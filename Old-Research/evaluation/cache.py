@@ -0,0 +1,55 @@
+import os
+import json
+import hashlib
+import threading
+
+# ==================================================
+# CONFIG
+# ==================================================
+CACHE_FILE = ".prediction_cache.jsonl"
+
+
+def prompt_key(model_name, prompt):
+    return hashlib.sha256(f"{model_name}\x1f{prompt}".encode("utf-8")).hexdigest()
+
+
+class PredictionCache:
+    """
+    Model outputs keyed by (model, prompt hash), so re-running a benchmark only
+    calls the model for new prompts. Append-only JSONL: an interrupted run keeps
+    everything generated so far, and a later line for the same key wins.
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a killed run
+                    self.entries[entry["key"]] = entry
+
+    def get(self, model_name, prompt):
+        entry = self.entries.get(prompt_key(model_name, prompt))
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, model_name, prompt, pred_sql, latency_sec):
+        entry = {"key": prompt_key(model_name, prompt), "model": model_name,
+                 "pred_sql": pred_sql, "latency_sec": latency_sec}
+        with self.lock:
+            self.entries[entry["key"]] = entry
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+        return entry
@@ -0,0 +1,62 @@
+import os
+import sys
+import json
+
+# ==================================================
+# CONFIG
+# ==================================================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_DIR = os.getenv("CENQUERY_TEMPLATE_DIR", os.path.join(BASE_DIR, "..", "New-Template"))
+NORMALIZED_DIR = os.path.join(BASE_DIR, "datasets_normalized")
+
+# The backend's prompt format; any name in schema_cache.SCHEMA_FORMATS works
+SCHEMA_FORMAT = "columns"
+
+
+def _template_modules():
+    if TEMPLATE_DIR not in sys.path:
+        sys.path.append(TEMPLATE_DIR)
+    import generate_training_data
+    import schema_cache
+    import schema_linker
+    return generate_training_data, schema_cache, schema_linker
+
+
+def load_cenquery_pairs(schema_format=SCHEMA_FORMAT, top_k=0):
+    """
+    The curated CenQuery pairs (question.txt/queries.sql plus dataset/) in the
+    normalized sample format. `table_schema` is the schema text the backend
+    would send: every table, optionally pruned to the question's top-k columns.
+    """
+    gen, sc, sl = _template_modules()
+    cache = sc.SchemaCache.from_file(os.path.join(TEMPLATE_DIR, gen.SCHEMA_FILE), sc.get_fragment(schema_format))
+    linker = sl.SchemaLinker(cache.schema_json, top_k=top_k) if top_k else None
+
+    pairs = [(os.path.join(TEMPLATE_DIR, gen.QUESTIONS_FILE), os.path.join(TEMPLATE_DIR, gen.SQL_FILE))]
+    pairs += gen.discover_pairs(os.path.join(TEMPLATE_DIR, gen.DATASET_DIR))
+    samples = []
+    for q_path, s_path in pairs:
+        source = os.path.basename(q_path)
+        for i, (q, s) in enumerate(zip(gen.load_questions(q_path), gen.load_sql_queries(s_path)), 1):
+            schema = cache.render_selection(linker.link(q, cache.schema_json)) if linker else cache.render()
+            samples.append({"id": f"{source}#{i}", "question": q, "sql": s,
+                            "table_schema": schema, "db_id": "cenquery"})
+    return samples
+
+
+def load_normalized(path):
+    """A datasets_normalized/*.json file written by benchmark.ipynb (Spider, WikiSQL)."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    name = os.path.splitext(os.path.basename(path))[0]
+    for i, sample in enumerate(data, 1):
+        sample.setdefault("id", f"{name}#{i}")
+    return data
+
+
+def load_dataset(name, schema_format=SCHEMA_FORMAT, top_k=0):
+    """'cenquery', a datasets_normalized name ('spider'), or a path to a normalized JSON file."""
+    if name == "cenquery":
+        return load_cenquery_pairs(schema_format, top_k)
+    path = name if os.path.exists(name) else os.path.join(NORMALIZED_DIR, f"{name}_normalized.json")
+    return load_normalized(path)
@@ -0,0 +1,70 @@
+import re
+import sys
+import threading
+
+from sqlalchemy import text
+
+from .datasets import TEMPLATE_DIR
+
+if TEMPLATE_DIR not in sys.path:
+    sys.path.append(TEMPLATE_DIR)
+from verify_queries import make_engine  # noqa: E402
+from result_equivalence import ResultSet, results_match  # noqa: E402
+
+# ==================================================
+# CONFIG
+# ==================================================
+POOL_SIZE = 4
+STATEMENT_TIMEOUT_MS = 30000
+
+# Model output is executed, so only read-only statements are sent to the database
+READ_ONLY = re.compile(r"^\s*(\(\s*)*(select|with)\b", re.I)
+
+
+class ResultStore:
+    """
+    Executes queries on a local Postgres/DuckDB (any SQLAlchemy DSN) and
+    memoizes the hashed ResultSet per SQL text: gold queries repeat across
+    samples and every model is scored against the same gold results.
+    """
+
+    def __init__(self, dsn, pool_size=POOL_SIZE, timeout_ms=STATEMENT_TIMEOUT_MS):
+        self.engine = make_engine(dsn, pool_size, timeout_ms)
+        self.results = {}
+        self.lock = threading.Lock()
+
+    def result(self, sql):
+        """(ResultSet or None, error or None)."""
+        key = sql.strip().rstrip(";")
+        if not key:
+            return None, "empty query"
+        if not READ_ONLY.match(key):
+            return None, "not a SELECT query"
+        with self.lock:
+            if key in self.results:
+                return self.results[key]
+        try:
+            with self.engine.connect() as conn:
+                result = conn.execute(text(key))
+                outcome = (ResultSet(result.keys(), result.fetchall()) if result.returns_rows else None, None)
+                conn.rollback()
+        except Exception as e:
+            outcome = (None, str(e).splitlines()[0])
+        with self.lock:
+            self.results[key] = outcome
+        return outcome
+
+    def execution_match(self, pred_sql, gold_sql):
+        """
+        True/False, or None when the gold query itself does not run here. Rows
+        are compared as a bag unless the gold query has ORDER BY; column names
+        and order don't matter.
+        """
+        gold, _ = self.result(gold_sql)
+        if gold is None:
+            return None
+        pred, _ = self.result(pred_sql)
+        return pred is not None and results_match(gold_sql, gold, pred)
+
+    def dispose(self):
+        self.engine.dispose()
@@ -0,0 +1,61 @@
+import re
+
+# ==================================================
+# SQL NORMALIZATION
+# ==================================================
+def normalize_sql(sql):
+    """
+    Canonical SQL text for exact match: parsed and re-printed by sqlglot when it
+    parses (keyword case, quoting, whitespace), else upper-cased and collapsed.
+    """
+    sql = sql.strip().rstrip(";").strip()
+    try:
+        import sqlglot
+        return sqlglot.transpile(sql, read="postgres", write="postgres")[0]
+    except Exception:
+        return re.sub(r"\s+", " ", sql).upper()
+
+
+def exact_match(pred, gold):
+    return normalize_sql(pred) == normalize_sql(gold)
+
+
+# ==================================================
+# STRING SIMILARITY
+# ==================================================
+def levenshtein(a, b):
+    """Edit distance; the Levenshtein package (as in the notebook) when installed."""
+    if a == b:
+        return 0
+    try:
+        import Levenshtein
+        return Levenshtein.distance(a, b)
+    except ImportError:
+        pass
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def string_match_percentage(pred, gold):
+    """The notebook's metric: 1 - edit distance / longer length, on stripped lowercase SQL."""
+    pred, gold = pred.strip().lower(), gold.strip().lower()
+    if not gold:
+        return 100.0 if not pred else 0.0
+    return (1 - levenshtein(pred, gold) / max(len(pred), len(gold))) * 100
+
+
+# ==================================================
+# LATENCY
+# ==================================================
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
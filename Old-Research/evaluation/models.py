@@ -0,0 +1,159 @@
+import os
+import re
+import time
+import hashlib
+
+# ==================================================
+# CONFIG
+# ==================================================
+# Prompt used for every model in benchmark.ipynb
+PROMPT = ("You are an expert SQL generator. Give Query only. No formatting also.\n"
+          "Columns: {table_schema}\nQuestion: {question}\nSQL:")
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+MISTRAL_BASE_URL = "https://api.mistral.ai/v1"
+
+# Returned by the stub for questions it has no answer for
+STUB_FALLBACK_SQL = "SELECT 1"
+
+
+def clean_sql(text):
+    """Strips the markdown code fences chat models add despite the prompt."""
+    text = re.sub(r"^```(?:sql)?|```$", "", text.strip(), flags=re.I | re.M)
+    return text.strip()
+
+
+# ==================================================
+# MODEL ADAPTERS
+# ==================================================
+class BaseModel:
+    """
+    Unified interface for all text-to-SQL models.
+    Each model implements `complete(prompt)`; `generate_sql(question, table_schema)`
+    keeps the notebook's call signature.
+    """
+    model_type = "base"
+    concurrent = True   # safe to call from several threads at once
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def cache_id(self):
+        """Prediction-cache identity; anything that changes the output belongs here."""
+        return self.name
+
+    def build_prompt(self, question, table_schema):
+        return PROMPT.format(table_schema=table_schema, question=question)
+
+    def complete(self, prompt):
+        raise NotImplementedError
+
+    def generate_sql(self, question, table_schema):
+        return self.complete(self.build_prompt(question, table_schema))
+
+
+class StubModel(BaseModel):
+    """
+    Deterministic offline model. Answers with the gold SQL for known questions,
+    except a fixed, hash-selected `miss_rate` share of them which get
+    STUB_FALLBACK_SQL, after sleeping `latency_ms` to stand in for the network.
+    """
+    model_type = "stub"
+
+    def __init__(self, answers, latency_ms=0, miss_rate=0.0, name="stub"):
+        super().__init__(name)
+        self.answers = answers
+        self.latency_ms = latency_ms
+        self.miss_rate = miss_rate
+
+    @property
+    def cache_id(self):
+        return f"{self.name}|latency={self.latency_ms}|miss={self.miss_rate}"
+
+    def complete(self, prompt):
+        question = prompt.rsplit("Question: ", 1)[-1].rsplit("\nSQL:", 1)[0]
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        bucket = int(hashlib.sha256(question.encode("utf-8")).hexdigest()[:8], 16) / 16 ** 8
+        if question not in self.answers or bucket < self.miss_rate:
+            return STUB_FALLBACK_SQL
+        return self.answers[question]
+
+
+class OpenAICompatibleModel(BaseModel):
+    """Chat-completions API (Groq, Mistral); API key read from `api_key_env`."""
+    base_url = None
+    api_key_env = None
+
+    def __init__(self, name):
+        super().__init__(name)
+        from openai import OpenAI
+        self.client = OpenAI(api_key=os.getenv(self.api_key_env), base_url=self.base_url)
+
+    def complete(self, prompt):
+        resp = self.client.chat.completions.create(
+            model=self.name,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0
+        )
+        message = resp.choices[0].message
+        if isinstance(message, list):
+            message = message[0]
+        return clean_sql(message.content or "")
+
+
+class GroqModel(OpenAICompatibleModel):
+    model_type = "groq"
+    base_url = GROQ_BASE_URL
+    api_key_env = "GROQ_API_KEY"
+
+
+class MistralModel(OpenAICompatibleModel):
+    model_type = "mistral"
+    base_url = MISTRAL_BASE_URL
+    api_key_env = "MISTRAL_API_KEY"
+
+
+class HFModel(BaseModel):
+    """
+    Local Hugging Face checkpoint (e.g. defog/sqlcoder-7b-2 or a folder holding
+    it), optionally 4-bit quantized. One generate() at a time.
+    """
+    model_type = "hf"
+    concurrent = False
+
+    def __init__(self, model_path, use_gpu=True, load_in_4bit=True, max_new_tokens=256):
+        super().__init__(model_path)
+        import torch
+        from transformers import AutoTokenizer, AutoModelForCausalLM, BitsAndBytesConfig
+
+        self.torch = torch
+        self.max_new_tokens = max_new_tokens
+        quantization_config = None
+        if load_in_4bit:
+            quantization_config = BitsAndBytesConfig(
+                load_in_4bit=True,
+                bnb_4bit_use_double_quant=True,
+                bnb_4bit_quant_type="nf4",
+                bnb_4bit_compute_dtype=torch.float16
+            )
+        print(f"Loading HF model from {model_path} on {'GPU' if use_gpu else 'CPU'}...")
+        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        self.model = AutoModelForCausalLM.from_pretrained(
+            model_path,
+            device_map="auto" if use_gpu else None,
+            quantization_config=quantization_config
+        )
+        print("✅ Model loaded successfully.")
+
+    def complete(self, prompt):
+        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.model.device)
+        with self.torch.no_grad():
+            outputs = self.model.generate(**inputs, max_new_tokens=self.max_new_tokens, do_sample=False)
+        # Only decode new tokens (skip prompt)
+        gen_tokens = outputs[0][inputs["input_ids"].shape[1]:]
+        return self.tokenizer.decode(gen_tokens, skip_special_tokens=True).strip()
+
+
+MODEL_TYPES = {"stub": StubModel, "groq": GroqModel, "mistral": MistralModel, "hf": HFModel}
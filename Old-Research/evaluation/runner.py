@@ -0,0 +1,141 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from .metrics import percentile
+
+# ==================================================
+# CONFIG
+# ==================================================
+RESULTS_DIR = "results"
+SUMMARY_FILE = "summary_metrics.csv"
+WORKERS = 8   # concurrent model calls; API models are network-bound
+
+
+def results_filename(model, dataset_name):
+    """The notebook's naming: {model_name with / as _}_{dataset}_{model_type}_results.csv."""
+    return f"{model.name.replace('/', '_')}_{dataset_name}_{model.model_type}_results.csv"
+
+
+# ==================================================
+# BENCHMARK
+# ==================================================
+def _predict(model, sample, cache):
+    """(pred_sql, latency_sec, cached, error) for one sample."""
+    prompt = model.build_prompt(sample["question"], sample.get("columns", sample.get("table_schema", [])))
+    if cache is not None:
+        hit = cache.get(model.cache_id, prompt)
+        if hit is not None:
+            return hit["pred_sql"], hit["latency_sec"], True, None
+    start = time.perf_counter()
+    try:
+        pred_sql = model.complete(prompt)
+    except Exception as e:
+        # Not cached, so the next run retries it
+        return "", time.perf_counter() - start, False, str(e).splitlines()[0] if str(e) else type(e).__name__
+    latency = time.perf_counter() - start
+    if cache is not None:
+        cache.put(model.cache_id, prompt, pred_sql, latency)
+    return pred_sql, latency, False, None
+
+
+def run_benchmark_with_metrics(model, dataset, max_samples=None, workers=WORKERS, cache=None, store=None):
+    """
+    Runs a model over a dataset concurrently; returns per-sample predictions with
+    latency and (with a ResultStore) execution match. String metrics are added
+    afterwards in batch by scoring.py. Predictions come from `cache` when the
+    same model has already seen the same prompt; their latency is the
+    originally measured one.
+    """
+    samples = dataset[:max_samples] if max_samples else dataset
+    workers = workers if model.concurrent else 1
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        predictions = list(pool.map(lambda s: _predict(model, s, cache), samples))
+    generate_s = time.perf_counter() - start
+
+    matches = [None] * len(samples)
+    if store is not None:
+        with ThreadPoolExecutor(max_workers=store.engine.pool.size()) as pool:
+            matches = list(pool.map(
+                lambda ps: store.execution_match(ps[0][0], ps[1].get("sql") or ps[1].get("query") or ""),
+                zip(predictions, samples)))
+
+    results = []
+    for sample, (pred_sql, latency, cached, error), match in zip(samples, predictions, matches):
+        gold_sql = sample.get("sql") or sample.get("query") or ""
+        results.append({
+            "id": sample.get("id"),
+            "question": sample["question"],
+            "gold_sql": gold_sql,
+            "pred_sql": pred_sql,
+            "latency_sec": latency,
+            "execution_match": match,
+            "cached": cached,
+            "error": error,
+        })
+    df = pd.DataFrame(results)
+
+    fresh = df.loc[~df["cached"], "latency_sec"].tolist()
+    print(f"   {len(df)} samples in {generate_s:.2f}s on {workers} workers "
+          f"({int(df['cached'].sum())} cached, {int(df['error'].notna().sum())} errors)")
+    if fresh:
+        print(f"   Latency p50 {percentile(fresh, 50):.3f}s, p95 {percentile(fresh, 95):.3f}s (uncached calls)")
+    if store is not None:
+        scored = df["execution_match"].dropna()
+        if len(scored):
+            print(f"   Execution accuracy: {scored.mean():.2%} over {len(scored)} runnable gold queries")
+    return df
+
+
+# ==================================================
+# SUMMARY
+# ==================================================
+def parse_results_filename(filename):
+    """(model_type, model_name, dataset) from a *_results.csv name."""
+    parts = filename[:-len("_results.csv")].split("_")
+    model_type, dataset = parts[-1], parts[-2]
+    # Provider/model names were saved with '/' as '_' (openai_gpt-oss-120b)
+    return model_type, "_".join(parts[:-2]).replace("_", "/", 1), dataset
+
+
+def summarize_results(results_dir=RESULTS_DIR, summary_file=SUMMARY_FILE):
+    """
+    summary_metrics.csv over every scored *_results.csv in `results_dir`: the
+    notebook's averages plus latency percentiles, token Jaccard, exact match and
+    execution accuracy (blank for result files written before execution was
+    measured).
+    """
+    records = []
+    for filename in sorted(os.listdir(results_dir)):
+        if not filename.endswith("_results.csv"):
+            continue
+        df = pd.read_csv(os.path.join(results_dir, filename))
+        if df.empty:
+            print(f"Warning: Results file {filename} is empty.")
+            continue
+        model_type, model_name, dataset = parse_results_filename(filename)
+        latency = df["latency_sec"].tolist()
+        record = {
+            "model_type": model_type,
+            "model_name": model_name,
+            "dataset": dataset,
+            "avg_latency_sec": df["latency_sec"].mean(),
+            "average_string_match_percentage": df["string_match_percentage"].mean(),
+            "samples": len(df),
+            "p50_latency_sec": percentile(latency, 50),
+            "p95_latency_sec": percentile(latency, 95),
+            "p99_latency_sec": percentile(latency, 99),
+            "average_token_jaccard": df["token_jaccard"].mean() if "token_jaccard" in df else None,
+            "exact_match_percentage": df["exact_match"].mean() * 100 if "exact_match" in df else None,
+            "execution_accuracy": None,
+        }
+        if "execution_match" in df and df["execution_match"].notna().any():
+            record["execution_accuracy"] = df["execution_match"].dropna().astype(bool).mean() * 100
+        records.append(record)
+
+    summary = pd.DataFrame(records)
+    summary.to_csv(os.path.join(results_dir, summary_file), index=False)
+    return summary
@@ -0,0 +1,137 @@
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .metrics import normalize_sql
+
+# ==================================================
+# CONFIG
+# ==================================================
+LENGTH_BUCKET = 64     # pairs are batched with others of similar length to limit padding
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+# ==================================================
+# VECTORIZED EDIT DISTANCE
+# ==================================================
+def _encode(strings, width, pad):
+    codes = np.full((len(strings), width), pad, dtype=np.int32)
+    for row, s in enumerate(strings):
+        codes[row, :len(s)] = np.frombuffer(s.encode("utf-32-le"), dtype=np.int32)
+    return codes
+
+
+def _edit_distance_batch(a, b):
+    """
+    Levenshtein distance for every (a[k], b[k]) at once. One DP row per
+    character of the longest `a`; within a row the insertion chain is a
+    running minimum, so each row is a couple of numpy ops over the whole batch.
+    """
+    len_a = np.array([len(s) for s in a])
+    len_b = np.array([len(s) for s in b])
+    n, m = int(len_a.max(initial=0)), int(len_b.max(initial=0))
+    A = _encode(a, n, -1)
+    B = _encode(b, m, -2)   # different pads never match each other
+    steps = np.arange(m + 1)
+    prev = np.broadcast_to(steps, (len(a), m + 1)).copy()
+    rows = np.arange(len(a))
+    out = prev[rows, len_b].copy()   # distance when a[k] is empty
+    for i in range(1, n + 1):
+        cost = A[:, i - 1, None] != B
+        cur = np.empty_like(prev)
+        cur[:, 0] = i
+        np.minimum(prev[:, 1:] + 1, prev[:, :-1] + cost, out=cur[:, 1:])
+        # cur[j] = min(cur[j], cur[j-1] + 1) for all j: a prefix minimum of cur - j
+        cur = np.minimum.accumulate(cur - steps, axis=1) + steps
+        done = len_a == i
+        out[done] = cur[rows[done], len_b[done]]
+        prev = cur
+    return out
+
+
+def edit_distances(a, b):
+    """Levenshtein distances for two equal-length lists of strings, batched by length."""
+    a, b = list(a), list(b)
+    out = np.zeros(len(a), dtype=np.int64)
+    if not a:
+        return out
+    order = np.argsort([max(len(x), len(y)) for x, y in zip(a, b)], kind="stable")
+    for start in range(0, len(order), LENGTH_BUCKET):
+        idx = order[start:start + LENGTH_BUCKET]
+        out[idx] = _edit_distance_batch([a[k] for k in idx], [b[k] for k in idx])
+    return out
+
+
+# ==================================================
+# SCORES
+# ==================================================
+def string_match_percentages(pred, gold):
+    """The notebook's metric for whole columns: 1 - edit distance / longer length, on stripped lowercase SQL."""
+    pred = [str(p).strip().lower() if isinstance(p, str) else "" for p in pred]
+    gold = [str(g).strip().lower() if isinstance(g, str) else "" for g in gold]
+    dist = edit_distances(pred, gold)
+    longest = np.array([max(len(p), len(g)) for p, g in zip(pred, gold)])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = (1 - dist / longest) * 100
+    return np.where(longest == 0, 100.0, scores)
+
+
+def token_jaccard(pred, gold):
+    """|tokens(pred) ∩ tokens(gold)| / |union| on lowercase SQL word and punctuation tokens."""
+    scores = np.empty(len(pred))
+    for k, (p, g) in enumerate(zip(pred, gold)):
+        p = set(TOKEN_RE.findall(p.lower())) if isinstance(p, str) else set()
+        g = set(TOKEN_RE.findall(g.lower())) if isinstance(g, str) else set()
+        union = len(p | g)
+        scores[k] = len(p & g) / union if union else 1.0
+    return scores
+
+
+def exact_matches(pred, gold):
+    """sqlglot-normalized exact match; each distinct SQL text is normalized once."""
+    memo = {}
+
+    def norm(sql):
+        sql = sql if isinstance(sql, str) else ""
+        if sql not in memo:
+            memo[sql] = normalize_sql(sql)
+        return memo[sql]
+
+    return np.array([norm(p) == norm(g) for p, g in zip(pred, gold)])
+
+
+def score_frame(df):
+    """Adds string_match_percentage, token_jaccard and exact_match to a predictions frame."""
+    pred, gold = df["pred_sql"].tolist(), df["gold_sql"].tolist()
+    df = df.copy()
+    df["string_match_percentage"] = string_match_percentages(pred, gold)
+    df["token_jaccard"] = token_jaccard(pred, gold)
+    df["exact_match"] = exact_matches(pred, gold)
+    return df
+
+
+def score_file(path):
+    """Scores one *_results.csv in place; returns (path, rows, seconds)."""
+    start = time.perf_counter()
+    df = pd.read_csv(path, keep_default_na=False, na_values=[""], float_precision="round_trip")
+    df = score_frame(df)
+    df.to_csv(path, index=False)
+    return path, len(df), time.perf_counter() - start
+
+
+def score_results(results_dir, workers=None):
+    """Scores every *_results.csv in `results_dir`, one file per worker process."""
+    paths = sorted(os.path.join(results_dir, f) for f in os.listdir(results_dir) if f.endswith("_results.csv"))
+    if not paths:
+        return []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        done = list(pool.map(score_file, paths))
+    rows = sum(n for _, n, _ in done)
+    print(f"🧮 Scored {rows} predictions in {len(paths)} files in {time.perf_counter() - start:.2f}s "
+          f"(workers={workers or os.cpu_count()})")
+    return done
@@ -1,5 +1,9 @@
 import os
+import json
 import shutil
+import hashlib
+import argparse
+from datetime import datetime
 import pandas as pd
 
 # ==========================================
@@ -7,12 +11,13 @@ import pandas as pd
 # ==========================================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_DIR = os.path.join(BASE_DIR, "unified_outputs")
+MANIFEST_FILE = os.path.join(OUTPUT_DIR, "manifest.json")
 
 SOURCES = {
     "output_normalized_healthcare": [
-        "regions.csv",          
+        "regions.csv",
         "healthcare_stats.csv",
-        "tru.csv"               
+        "tru.csv"
     ],
     "output_normalized_population": [
         "population_stats.csv",
@@ -37,17 +42,82 @@ SOURCES = {
     ]
 }
 
-def consolidate():
+# ==========================================
+# 📋 MANIFEST
+# ==========================================
+def fingerprint(path):
+    """Returns (size, sha256, row_count) in a single read of the file."""
+    h = hashlib.sha256()
+    newlines = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+            newlines += block.count(b"\n")
+    # CSV rows exclude the header line
+    return os.path.getsize(path), h.hexdigest(), max(newlines - 1, 0)
+
+def load_manifest(path=MANIFEST_FILE):
+    """Loads the last manifest, or an empty one if consolidate() has never run."""
+    if not os.path.exists(path):
+        return {"generated_at": None, "files": {}, "changed": []}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def changed_files(path=MANIFEST_FILE):
+    """Files whose content changed in the last consolidate() run."""
+    return set(load_manifest(path).get("changed", []))
+
+def changed_since(consumed, path=MANIFEST_FILE):
+    """
+    Files whose staged hash differs from `consumed` ({filename: sha256}), i.e. what a
+    downstream stage last built from. Survives several consolidate() runs in between.
+    """
+    files = load_manifest(path)["files"]
+    return {name for name, entry in files.items() if consumed.get(name) != entry["sha256"]}
+
+# ==========================================
+# 🔗 STAGING
+# ==========================================
+def _reflink(src, dst):
+    """Copy-on-write clone (Btrfs/XFS); raises OSError where unsupported."""
+    import fcntl
+    FICLONE = 0x40049409
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+def stage_file(src, dst):
+    """
+    Places src at dst without copying bytes where the filesystem allows:
+    reflink first, else a plain copy. Returns the method used. Never a hard
+    link: cleaners rewrite their outputs in place, which would change the
+    staged (committed) file behind the manifest's back.
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        _reflink(src, dst)
+        return "reflink"
+    except (OSError, ImportError):
+        if os.path.exists(dst):
+            os.remove(dst)
+    shutil.copy2(src, dst)
+    return "copy"
+
+def consolidate(force=False):
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
         print(f"📁 Created directory: {OUTPUT_DIR}")
 
     print("-" * 40)
 
+    previous = load_manifest()["files"]
+    files = {}
+    changed = []
     copied_count = 0
-    for folder, files in SOURCES.items():
+    skipped_count = 0
+    for folder, filenames in SOURCES.items():
         src_folder_path = os.path.join(BASE_DIR, folder)
-        
+
         if not os.path.exists(src_folder_path):
             alt_folder = folder.replace("_", " ")
             alt_path = os.path.join(BASE_DIR, alt_folder)
@@ -55,25 +125,61 @@ def consolidate():
                 src_folder_path = alt_path
             else:
                 print(f"⚠️  Warning: Source folder not found: {folder}")
+                # Keep describing what is already staged from this folder
+                files.update({k: v for k, v in previous.items() if v.get("source") == folder})
                 continue
 
-        for filename in files:
+        for filename in filenames:
             src_file = os.path.join(src_folder_path, filename)
             dst_file = os.path.join(OUTPUT_DIR, filename)
 
-            if os.path.exists(src_file):
-                shutil.copy2(src_file, dst_file)
-                print(f"✅ Copied: {filename:<25} (from {os.path.basename(src_folder_path)})")
-                copied_count += 1
-            else:
+            if not os.path.exists(src_file):
                 print(f"❌ Missing: {filename:<25} (in {os.path.basename(src_folder_path)})")
+                continue
+
+            size, digest, rows = fingerprint(src_file)
+            entry = {
+                "source": folder,
+                "size": size,
+                "sha256": digest,
+                "rows": rows,
+            }
+            old = previous.get(filename, {})
+
+            # A hard link left by an older run shares the cleaner's inode; restage to break it
+            if not force and old.get("sha256") == digest and os.path.exists(dst_file) \
+                    and os.path.getsize(dst_file) == size and os.stat(dst_file).st_nlink == 1:
+                entry["staged_by"] = old.get("staged_by", "copy")
+                files[filename] = entry
+                print(f"⏭️  Unchanged: {filename:<22} (from {os.path.basename(src_folder_path)})")
+                skipped_count += 1
+                continue
+
+            entry["staged_by"] = stage_file(src_file, dst_file)
+            files[filename] = entry
+            changed.append(filename)
+            print(f"✅ Staged: {filename:<25} (from {os.path.basename(src_folder_path)}, {entry['staged_by']})")
+            copied_count += 1
 
     readme_path = os.path.join(OUTPUT_DIR, "README.txt")
     with open(readme_path, "w") as f:
         f.write("UNIFIED CENSUS DATA STAGING AREA\n")
-    
+
+    manifest = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "files": files,
+        "changed": changed,
+    }
+    with open(MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4)
+
     print("-" * 40)
-    print(f"🎉 Success! {copied_count} files consolidated into 'unified_outputs/'.")
+    print(f"🎉 Success! {copied_count} files staged, {skipped_count} unchanged in 'unified_outputs/'.")
+    print(f"🧾 Manifest: {MANIFEST_FILE}")
+    return manifest
 
 if __name__ == "__main__":
-    consolidate()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Stage cleaned CSVs into unified_outputs/.")
+    parser.add_argument("--force", action="store_true", help="Re-stage every file even if its hash is unchanged.")
+    args = parser.parse_args()
+    consolidate(force=args.force)
@@ -1,6 +1,15 @@
 import pdfplumber
 import pandas as pd
+import argparse
+import hashlib
+import glob
+import json
 import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from compact_dtypes import to_float_compact, to_category
 
 # ==========================================
 # 🔧 CONFIGURATION
@@ -9,60 +18,194 @@ INPUT_PDF = "../input/Crops.pdf"
 OUTPUT_DIR = "../output_normalized_crops"
 OUTPUT_CSV = os.path.join(OUTPUT_DIR, "crops.csv")
 
+# Raw extract_table() output per (file hash, page), so re-imports skip PDF parsing
+CACHE_DIR = os.path.join(OUTPUT_DIR, ".page_cache")
+
+# Select specific columns based on the bulletin's PDF structure
+TARGET_INDICES = [0, 2, 5, 8, 11, 14]
+CLEAN_HEADERS = [
+    "crop",
+    "normal_area_dafw",
+    "area_sown_2025_26",
+    "area_sown_2024_25",
+    "difference_area",
+    "pct_increase_decrease"
+]
+NUMERIC_COLS = CLEAN_HEADERS[1:]
+
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def extract_crops_data(pdf_path):
-    print(f"📖 Opening PDF: {pdf_path}")
-    
-    with pdfplumber.open(pdf_path) as pdf:
-        page = pdf.pages[0]
-        table = page.extract_table()
-        
-    if not table:
-        print("❌ No table found.")
-        return None
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
 
-    df = pd.DataFrame(table)
-    
-    # Select specific columns based on your PDF structure
-    target_indices = [0, 2, 5, 8, 11, 14]
-    
-    if df.shape[1] <= max(target_indices):
-        print(f"⚠️ Table width ({df.shape[1]}) is smaller than expected.")
-        return None
+def extract_page(task):
+    """
+    Worker: returns (pdf_path, page_no, table, elapsed_ms, cached).
+    Runs in a separate process, so it only touches its own page and cache entry.
+    """
+    pdf_path, file_hash, page_no = task
+    start = time.perf_counter()
+    cache_file = os.path.join(CACHE_DIR, f"{file_hash}_p{page_no}.json")
+
+    if os.path.exists(cache_file):
+        with open(cache_file, encoding="utf-8") as f:
+            table = json.load(f)
+        cached = True
+    else:
+        with pdfplumber.open(pdf_path) as pdf:
+            table = pdf.pages[page_no].extract_table()
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(table, f)
+        os.replace(tmp_file, cache_file)
+        cached = False
+
+    return pdf_path, page_no, table, (time.perf_counter() - start) * 1000, cached
 
-    df_clean = df.iloc[:, target_indices].copy()
+def is_number(value):
+    if value is None:
+        return False
+    try:
+        float(str(value).replace(',', ''))
+        return True
+    except ValueError:
+        return False
 
-    clean_headers = [
-        "crop",
-        "normal_area_dafw",
-        "area_sown_2025_26",
-        "area_sown_2024_25",
-        "difference_area",
-        "pct_increase_decrease"
-    ]
-    df_clean.columns = clean_headers
+def split_header(table):
+    """Splits a page table into (header_rows, data_rows) at the first crop row with a number."""
+    for i, row in enumerate(table):
+        if len(row) <= max(TARGET_INDICES):
+            continue
+        if row[0] and any(is_number(row[j]) for j in TARGET_INDICES[1:]):
+            return table[:i], table[i:]
+    return table, []
+
+def header_signature(header_rows):
+    """
+    Column-wise text of the header block (e.g. '2025-' + '26' -> '2025-26'),
+    used to check that continuation pages share the first page's layout.
+    """
+    signature = []
+    for j in TARGET_INDICES[1:]:
+        parts = [str(r[j]).strip() for r in header_rows if len(r) > j and r[j]]
+        signature.append(re.sub(r'\s+', '', "".join(parts)))
+    return tuple(signature)
+
+def report_date(header_rows):
+    text = " ".join(str(c) for r in header_rows for c in r if c)
+    match = re.search(r'as on (\d{4}-\d{2}-\d{2})', text)
+    return match.group(1) if match else None
+
+def clean_rows(rows):
+    """Applies the column selection and numeric cleaning to stitched data rows."""
+    df = pd.DataFrame(rows)
+    df_clean = df.iloc[:, TARGET_INDICES].copy()
+    df_clean.columns = CLEAN_HEADERS
 
-    # Clean Data Rows
-    df_clean = df_clean.iloc[9:].reset_index(drop=True)
     df_clean = df_clean.replace(r'\n', ' ', regex=True)
     df_clean = df_clean[df_clean['crop'].notna() & (df_clean['crop'] != "")]
-    
+
     # --- FIX: Force Numeric Conversion ---
-    print("🔢 Converting metrics to Numeric (Float)...")
-    numeric_cols = ["normal_area_dafw", "area_sown_2025_26", "area_sown_2024_25", "difference_area", "pct_increase_decrease"]
-    
-    for col in numeric_cols:
-        # Clean up potential commas or spaces in numbers
-        if df_clean[col].dtype == object:
-            df_clean[col] = df_clean[col].astype(str).str.replace(',', '', regex=False)
-        df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0.0)
+    # Clean up potential commas in numbers, then one bulk float conversion
+    df_clean[NUMERIC_COLS] = df_clean[NUMERIC_COLS].replace(',', '', regex=True)
+    df_clean = to_float_compact(df_clean, NUMERIC_COLS, fill=0.0, allow_int=False)
+
+    return df_clean.reset_index(drop=True)
+
+def stitch_pdf(pdf_path, pages):
+    """
+    Joins one bulletin's page tables in page order. The first page defines the
+    header; continuation pages may repeat it (dropped) or start straight with data.
+    """
+    rows = []
+    reference = None
+    date = None
+
+    for page_no, table in pages:
+        if not table:
+            print(f"   ⚠️ {os.path.basename(pdf_path)} p{page_no + 1}: no table found.")
+            continue
+        if len(table[0]) <= max(TARGET_INDICES):
+            print(f"   ⚠️ {os.path.basename(pdf_path)} p{page_no + 1}: table width ({len(table[0])}) is smaller than expected.")
+            continue
 
-    return df_clean
+        header_rows, data_rows = split_header(table)
+        if header_rows:
+            signature = header_signature(header_rows)
+            if reference is None:
+                reference = signature
+                date = report_date(header_rows)
+            elif signature != reference and any(signature):
+                print(f"   ⚠️ {os.path.basename(pdf_path)} p{page_no + 1}: header differs from page 1, skipping.")
+                continue
+        rows.extend(data_rows)
+
+    if not rows:
+        return None
+
+    df = clean_rows(rows)
+    df.insert(0, 'report_date', date)
+    return df
+
+def collect_pdfs(paths):
+    pdfs = []
+    for path in paths:
+        if os.path.isdir(path):
+            pdfs.extend(sorted(glob.glob(os.path.join(path, "*.pdf"))))
+        else:
+            pdfs.append(path)
+    return list(dict.fromkeys(pdfs))
+
+def extract_crops_data(pdf_paths, workers=None):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    start = time.perf_counter()
+
+    tasks = []
+    for pdf_path in pdf_paths:
+        print(f"📖 Opening PDF: {pdf_path}")
+        with pdfplumber.open(pdf_path) as pdf:
+            n_pages = len(pdf.pages)
+        file_hash = file_sha256(pdf_path)
+        tasks.extend((pdf_path, file_hash, p) for p in range(n_pages))
+
+    print(f"⚙️  Extracting {len(tasks)} pages from {len(pdf_paths)} PDF(s)...")
+    by_pdf = {p: [] for p in pdf_paths}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for pdf_path, page_no, table, elapsed_ms, cached in pool.map(extract_page, tasks):
+            by_pdf[pdf_path].append((page_no, table))
+            status = "cache" if cached else "parsed"
+            print(f"   ⏱️  {os.path.basename(pdf_path)} p{page_no + 1}: {elapsed_ms:.1f} ms ({status})")
+
+    frames = []
+    for pdf_path in pdf_paths:
+        df = stitch_pdf(pdf_path, sorted(by_pdf[pdf_path], key=lambda x: x[0]))
+        if df is not None:
+            frames.append(df)
+
+    elapsed = time.perf_counter() - start
+    print(f"📊 {len(tasks)} pages in {elapsed:.2f}s ({len(tasks) / elapsed if elapsed else 0:.1f} pages/s)")
+
+    if not frames:
+        print("❌ No table found.")
+        return None
+
+    df_result = pd.concat(frames, ignore_index=True)
+    # report_date is always the first column, however many bulletins were passed,
+    # so crop_stats has one layout and weekly bulletins stay distinguishable
+    return to_category(df_result, ['report_date', 'crop'])
 
 if __name__ == "__main__":
-    df_result = extract_crops_data(INPUT_PDF)
-    
+    parser = argparse.ArgumentParser(description="Extract crop area tables from DA&FW bulletins.")
+    parser.add_argument("pdfs", nargs="*", default=[INPUT_PDF], help="PDF files or folders of PDFs.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+    args = parser.parse_args()
+
+    df_result = extract_crops_data(collect_pdfs(args.pdfs), args.workers)
+
     if df_result is not None:
         df_result.to_csv(OUTPUT_CSV, index=False)
-        print(f"\n💾 Saved Clean CSV to: {OUTPUT_CSV}")
\ No newline at end of file
+        print(f"\n💾 Saved Clean CSV to: {OUTPUT_CSV}")
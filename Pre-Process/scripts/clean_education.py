@@ -1,7 +1,11 @@
 import pandas as pd
+import argparse
 import re
 import os
 
+from excel_stream import DEFAULT_CHUNK_ROWS, iter_sheet_chunks, append_csv
+from compact_dtypes import MemoryProfile, to_int_compact, to_category
+
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
@@ -11,6 +15,10 @@ TRU_FILE = os.path.join(OUTPUT_DIR, "tru.csv")
 # FIX: Renamed output file
 PCA_STATS_FILE = os.path.join(OUTPUT_DIR, "education_stats.csv")
 
+TRU_MAP = {"Total": 1, "Rural": 2, "Urban": 3}
+CODE_COLUMNS = ['district_code', 'subdistt_code', 'townvillage_code', 'state_code1', 'ward_code', 'eb_code']
+LABEL_COLUMNS = ['level', 'name', 'tru', 'tru_clean']
+
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 def clean_column_name(name):
@@ -23,6 +31,31 @@ def clean_column_name(name):
     s = s.replace('population_female', 'female')
     return s[:60]
 
+def write_tru_lookup():
+    print("   Standardizing TRU...")
+    pd.DataFrame(list(TRU_MAP.items()), columns=['name', 'id'])[['id', 'name']].to_csv(TRU_FILE, index=False)
+
+def normalize_pca(df):
+    """Cleans headers, maps TRU ids, forces numeric metrics and drops code/label columns."""
+    df.columns = [clean_column_name(c) for c in df.columns]
+    
+    if 'state_code' in df.columns:
+        df.rename(columns={'state_code': 'state'}, inplace=True)
+
+    df['tru_clean'] = df['tru'].astype(str).str.title().astype('category')
+    df['tru_id'] = df['tru_clean'].map(TRU_MAP)
+
+    keys = ['state', 'tru_id']
+    metrics = [c for c in df.columns if c not in keys and c not in LABEL_COLUMNS and c not in CODE_COLUMNS]
+    df = to_int_compact(df, metrics)
+
+    cols_to_drop = CODE_COLUMNS + LABEL_COLUMNS
+    df.drop(columns=[c for c in cols_to_drop if c in df.columns], inplace=True, errors='ignore')
+
+    if 'state' in df.columns:
+        df = to_int_compact(df, ['state'])
+    return df
+
 def process_pca_data():
     print(f"📖 Reading: {INPUT_FILE}")
     try:
@@ -34,37 +67,46 @@ def process_pca_data():
             print(f"❌ Error: {e}")
             return
 
-    df.columns = [clean_column_name(c) for c in df.columns]
-    
-    if 'state_code' in df.columns:
-        df.rename(columns={'state_code': 'state'}, inplace=True)
-    
-    print("   Standardizing TRU...")
-    tru_map = {"Total": 1, "Rural": 2, "Urban": 3}
-    pd.DataFrame(list(tru_map.items()), columns=['name', 'id'])[['id', 'name']].to_csv(TRU_FILE, index=False)
-
-    df['tru_clean'] = df['tru'].astype(str).str.title()
-    df['tru_id'] = df['tru_clean'].map(tru_map)
+    profile = MemoryProfile("clean_education.py")
+    profile.record("read", df)
+    write_tru_lookup()
 
     print("🔢 Converting metrics to Numeric (Int)...")
-    keys = ['state', 'tru_id']
-    for col in df.columns:
-        if col not in keys and col not in ['tru', 'tru_clean', 'name', 'level']:
-            if col in ['district_code', 'subdistt_code', 'townvillage_code', 'state_code1', 'ward_code', 'eb_code']: 
-                continue
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-
-    cols_to_drop = ['district_code', 'subdistt_code', 'townvillage_code', 'state_code1', 'ward_code', 'eb_code', 'level', 'name', 'tru', 'tru_clean']
-    df.drop(columns=[c for c in cols_to_drop if c in df.columns], inplace=True, errors='ignore')
-
-    if 'state' in df.columns:
-        df['state'] = df['state'].fillna(0).astype(int)
+    df = normalize_pca(df)
+    profile.record("education_stats", df)
+    profile.save(OUTPUT_DIR)
 
     df.to_csv(PCA_STATS_FILE, index=False)
     print(f"✅ Created '{PCA_STATS_FILE}'")
 
+def process_pca_data_streaming(chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Bounded-memory variant for district / town-village PCA workbooks."""
+    print(f"📖 Streaming: {INPUT_FILE} ({chunk_rows} rows per chunk)")
+    total_rows = 0
+
+    try:
+        for i, chunk in enumerate(iter_sheet_chunks(INPUT_FILE, chunk_rows=chunk_rows, header=True)):
+            df_norm = normalize_pca(chunk)
+            append_csv(df_norm, PCA_STATS_FILE, first_chunk=(i == 0))
+            total_rows += len(df_norm)
+            print(f"   🔄 Chunk {i + 1}: +{len(df_norm)} rows")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return
+
+    write_tru_lookup()
+    print(f"✅ Created '{PCA_STATS_FILE}' ({total_rows} rows, streamed)")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean the Primary Census Abstract (education) table.")
+    parser.add_argument("--stream", action="store_true", help="Read the workbook in row chunks (bounded memory).")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
     if os.path.exists(INPUT_FILE):
-        process_pca_data()
+        if args.stream:
+            process_pca_data_streaming(args.chunk_rows)
+        else:
+            process_pca_data()
     else:
         print(f"❌ File not found: {INPUT_FILE}")
\ No newline at end of file
@@ -2,6 +2,8 @@ import pandas as pd
 import re
 import os
 
+from compact_dtypes import MemoryProfile, to_int_compact, to_float_compact
+
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
@@ -77,9 +79,13 @@ def process_healthcare_data():
         print(f"❌ Error: {e}")
         return
 
+    profile = MemoryProfile("clean_healthcare.py")
+    profile.record("read", df)
+
     # 1. Clean Columns & Deduplicate (CRITICAL FIX)
     df.columns = [clean_column_name(c) for c in df.columns]
-    df = deduplicate_columns(df)
+    # copy() consolidates the per-column blocks left by the reader into one
+    df = deduplicate_columns(df).copy()
     
     # 2. Generate Master Regions Lookup
     print("🗺️  Generating Master Regions Lookup...")
@@ -89,9 +95,10 @@ def process_healthcare_data():
     # 3. Map State IDs
     print("🔄 Mapping Data...")
     state_col = next((c for c in df.columns if 'state' in c or 'india' in c), df.columns[0])
-    df['state'] = df[state_col].apply(get_state_id)
+    # Map each distinct state label once (categorical), not once per row
+    df['state'] = df[state_col].astype('category').map(get_state_id)
     df = df.dropna(subset=['state'])
-    df['state'] = df['state'].astype(int)
+    df = to_int_compact(df, ['state'])
 
     # 4. Map TRU IDs
     tru_map = {"Total": 1, "Rural": 2, "Urban": 3}
@@ -99,16 +106,17 @@ def process_healthcare_data():
     
     area_col = next((c for c in df.columns if 'area' in c or 'urban' in c), None)
     if area_col:
-        df['tru_id'] = df[area_col].astype(str).str.title().map(tru_map).fillna(1).astype(int)
+        df['tru_id'] = df[area_col].astype(str).str.title().map(tru_map)
     else:
         df['tru_id'] = 1
+    df = to_int_compact(df, ['tru_id'], fill=1)
 
     # 5. FORCE NUMERIC CONVERSION
     print("🔢 Converting metrics to Numeric...")
-    for col in df.columns:
-        if col not in ['state', 'tru_id', state_col, area_col]:
-            # Use loc to avoid SettingWithCopyWarning
-            df.loc[:, col] = pd.to_numeric(df[col], errors='coerce')
+    # One bulk conversion over all 100+ indicator columns: integral columns get the
+    # narrowest int, percentages/rates float32 where no printed digit is lost
+    metrics = [c for c in df.columns if c not in ['state', 'tru_id', state_col, area_col]]
+    df = to_float_compact(df, metrics)
 
     # 6. Cleanup & Save
     cols_to_drop = [state_col, area_col] if area_col else [state_col]
@@ -120,6 +128,8 @@ def process_healthcare_data():
         if col in cols: cols.insert(0, cols.pop(cols.index(col)))
     
     df = df[cols]
+    profile.record("healthcare_stats", df)
+    profile.save(OUTPUT_DIR)
 
     df.to_csv(STATS_FILE, index=False)
     print(f"✅ Created '{STATS_FILE}' (Numeric)")
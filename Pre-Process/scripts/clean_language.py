@@ -1,7 +1,11 @@
 import pandas as pd
+import argparse
 import re
 import os
 
+from excel_stream import DEFAULT_CHUNK_ROWS, iter_sheet_chunks, append_csv
+from compact_dtypes import MemoryProfile, to_int_compact, to_category
+
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
@@ -12,6 +16,15 @@ TRU_FILE = os.path.join(OUTPUT_DIR, "tru.csv")
 LANGUAGE_STATS_FILE = os.path.join(OUTPUT_DIR, "language_stats.csv")
 REGIONS_FILE = os.path.join(OUTPUT_DIR, "regions.csv")
 
+SKIP_ROWS = 6
+COLUMN_NAMES = [
+    "table_code", "state_code", "district_code", "sub_district_code", "area_name",
+    "language_code", "language_name",
+    "tot_p", "tot_m", "tot_f", "rur_p", "rur_m", "rur_f", "urb_p", "urb_m", "urb_f"
+]
+# (tru_id, column prefix) for the Total / Rural / Urban blocks
+TRU_BLOCKS = [(1, "tot"), (2, "rur"), (3, "urb")]
+
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 def clean_area_name(text):
@@ -25,23 +38,50 @@ def clean_language_name(text):
     text = re.sub(r'^\d+\s+', '', text)
     return text.strip().title()
 
+def write_tru_lookup():
+    print("   Standardizing TRU...")
+    tru_data = [{'id': 1, 'name': 'Total'}, {'id': 2, 'name': 'Rural'}, {'id': 3, 'name': 'Urban'}]
+    pd.DataFrame(tru_data).to_csv(TRU_FILE, index=False)
+
+def prepare_rows(df):
+    """Drops non-data rows and cleans the name columns of a raw sheet slice."""
+    df = df.dropna(subset=['state_code'])
+    df['area_name'] = df['area_name'].apply(clean_area_name)
+    df['language_name_clean'] = df['language_name'].apply(clean_language_name)
+    return to_category(df, ['area_name', 'language_name', 'language_name_clean'])
+
+def unpivot_language(df):
+    """
+    Wide (tot/rur/urb x p/m/f) -> long rows keyed by tru_id.
+    Output order matches a row-by-row unpivot: Total, Rural, Urban per source row.
+    """
+    parts = []
+    for tru_id, prefix in TRU_BLOCKS:
+        parts.append(pd.DataFrame({
+            'state': df['state_code'],
+            'language_id': df['language_code'],
+            'tru_id': tru_id,
+            'person': df[f'{prefix}_p'],
+            'male': df[f'{prefix}_m'],
+            'female': df[f'{prefix}_f'],
+        }))
+    df_norm = pd.concat(parts).sort_index(kind='stable').reset_index(drop=True)
+
+    # --- FIX: Force Numeric Conversion ---
+    # Keys and counts alike, downcast to the narrowest int width
+    return to_int_compact(df_norm, ['state', 'language_id', 'tru_id', 'person', 'male', 'female'])
+
 def process_language_data():
     print(f"📖 Reading: {INPUT_FILE}")
-    column_names = [
-        "table_code", "state_code", "district_code", "sub_district_code", "area_name",
-        "language_code", "language_name",
-        "tot_p", "tot_m", "tot_f", "rur_p", "rur_m", "rur_f", "urb_p", "urb_m", "urb_f"
-    ]
-
     try:
-        df = pd.read_excel(INPUT_FILE, skiprows=6, header=None, names=column_names, dtype={'state_code': str})
+        df = pd.read_excel(INPUT_FILE, skiprows=SKIP_ROWS, header=None, names=COLUMN_NAMES, dtype={'state_code': str})
     except Exception as e:
         print(f"❌ Error: {e}")
         return
 
-    df = df.dropna(subset=['state_code'])
-    df['area_name'] = df['area_name'].apply(clean_area_name)
-    df['language_name_clean'] = df['language_name'].apply(clean_language_name)
+    profile = MemoryProfile("clean_language.py")
+    profile.record("read", df)
+    df = prepare_rows(df)
 
     languages_df = df[['language_code', 'language_name_clean']].drop_duplicates()
     languages_df.rename(columns={'language_name_clean': 'name', 'language_code': 'id'}, inplace=True)
@@ -50,39 +90,63 @@ def process_language_data():
     regions_df = df[['state_code', 'area_name']].drop_duplicates()
     regions_df.to_csv(REGIONS_FILE, index=False)
 
-    print("   Standardizing TRU...")
-    tru_data = [{'id': 1, 'name': 'Total'}, {'id': 2, 'name': 'Rural'}, {'id': 3, 'name': 'Urban'}]
-    pd.DataFrame(tru_data).to_csv(TRU_FILE, index=False)
+    write_tru_lookup()
 
     print("🔄 Unpivoting Data...")
-    normalized_rows = []
-    for _, row in df.iterrows():
-        base_info = {'state': row['state_code'], 'language_id': row['language_code']}
-        
-        # Get raw values (might be string or int)
-        t_p, t_m, t_f = row['tot_p'], row['tot_m'], row['tot_f']
-        r_p, r_m, r_f = row['rur_p'], row['rur_m'], row['rur_f']
-        u_p, u_m, u_f = row['urb_p'], row['urb_m'], row['urb_f']
-
-        normalized_rows.append({**base_info, 'tru_id': 1, 'person': t_p, 'male': t_m, 'female': t_f})
-        normalized_rows.append({**base_info, 'tru_id': 2, 'person': r_p, 'male': r_m, 'female': r_f})
-        normalized_rows.append({**base_info, 'tru_id': 3, 'person': u_p, 'male': u_m, 'female': u_f})
-
-    df_norm = pd.DataFrame(normalized_rows)
-    
-    # --- FIX: Force Numeric Conversion ---
     print("🔢 Converting metrics to Numeric (Int)...")
-    for c in ['person', 'male', 'female']:
-        df_norm[c] = pd.to_numeric(df_norm[c], errors='coerce').fillna(0).astype(int)
-        
-    # Ensure keys are int
-    df_norm['state'] = pd.to_numeric(df_norm['state'], errors='coerce').fillna(0).astype(int)
+    df_norm = unpivot_language(df)
+
+    profile.record("language_stats", df_norm)
+    profile.save(OUTPUT_DIR)
 
     df_norm.to_csv(LANGUAGE_STATS_FILE, index=False)
     print(f"✅ Created '{LANGUAGE_STATS_FILE}'")
 
+def process_language_data_streaming(chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Bounded-memory variant for district / sub-district workbooks.
+    Reads `chunk_rows` rows at a time, unpivots them and appends to the stats CSV;
+    only the (small) language and region lookups are kept across chunks.
+    """
+    print(f"📖 Streaming: {INPUT_FILE} ({chunk_rows} rows per chunk)")
+    languages, regions = {}, {}
+    total_rows = 0
+
+    try:
+        chunks = iter_sheet_chunks(INPUT_FILE, chunk_rows=chunk_rows, skiprows=SKIP_ROWS,
+                                   names=COLUMN_NAMES, text_columns=['state_code'])
+        for i, chunk in enumerate(chunks):
+            chunk = prepare_rows(chunk)
+
+            for key in zip(chunk['language_code'], chunk['language_name_clean']):
+                languages.setdefault(key, None)
+            for key in zip(chunk['state_code'], chunk['area_name']):
+                regions.setdefault(key, None)
+
+            df_norm = unpivot_language(chunk)
+            append_csv(df_norm, LANGUAGE_STATS_FILE, first_chunk=(i == 0))
+            total_rows += len(df_norm)
+            print(f"   🔄 Chunk {i + 1}: +{len(df_norm)} rows")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return
+
+    pd.DataFrame(list(languages), columns=['id', 'name']).to_csv(LANGUAGES_FILE, index=False)
+    pd.DataFrame(list(regions), columns=['state_code', 'area_name']).to_csv(REGIONS_FILE, index=False)
+    write_tru_lookup()
+
+    print(f"✅ Created '{LANGUAGE_STATS_FILE}' ({total_rows} rows, streamed)")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean the C-16 mother tongue table.")
+    parser.add_argument("--stream", action="store_true", help="Read the workbook in row chunks (bounded memory).")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
     if os.path.exists(INPUT_FILE):
-        process_language_data()
+        if args.stream:
+            process_language_data_streaming(args.chunk_rows)
+        else:
+            process_language_data()
     else:
         print(f"❌ File not found: {INPUT_FILE}")
\ No newline at end of file
@@ -1,7 +1,11 @@
 import pandas as pd
+import argparse
 import re
 import os
 
+from excel_stream import DEFAULT_CHUNK_ROWS, iter_sheet_chunks, append_csv
+from compact_dtypes import MemoryProfile, to_int_compact, to_category
+
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
@@ -12,6 +16,19 @@ REGIONS_FILE = os.path.join(OUTPUT_DIR, "regions.csv")
 AGE_GROUPS_FILE = os.path.join(OUTPUT_DIR, "age_groups.csv")
 OCCUPATION_STATS_FILE = os.path.join(OUTPUT_DIR, "occupation_stats.csv")
 
+SKIP_ROWS = 9
+COLUMN_NAMES = [
+    "table_code", "state_code", "district_code", "area_name", "tru", "age_group",
+    "population_total", "population_male", "population_female",
+    "main_workers_total", "main_workers_male", "main_workers_female",
+    "marginal_workers_total", "marginal_workers_male", "marginal_workers_female",
+    "marg_3_6mo_total", "marg_3_6mo_male", "marg_3_6mo_female",
+    "marg_less_3mo_total", "marg_less_3mo_male", "marg_less_3mo_female",
+    "non_workers_total", "non_workers_male", "non_workers_female",
+    "seeking_work_total", "seeking_work_male", "seeking_work_female"
+]
+TRU_MAP = {"Total": 1, "Rural": 2, "Urban": 3}
+
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 def clean_text(text):
@@ -20,33 +37,47 @@ def clean_text(text):
     text = re.sub(r'\s*\(\d+\)', '', text)
     return text.strip()
 
+def prepare_rows(df):
+    """Drops non-data rows and cleans labels of a raw sheet slice."""
+    df = df.dropna(subset=['state_code'])
+    df['area_name'] = df['area_name'].apply(clean_text)
+    df['age_group'] = df['age_group'].replace('Total', 'All Ages')
+    df['tru_id'] = df['tru'].map(TRU_MAP)
+    return to_category(df, ['area_name', 'age_group', 'tru'])
+
+def normalize_occupation(df, age_ids):
+    """Maps age groups to ids, drops label columns and forces numeric types."""
+    df['age_group_id'] = df['age_group'].map(age_ids)
+
+    cols_to_drop = ['area_name', 'tru', 'age_group', 'district_code', 'table_code']
+    df = df.drop(columns=[c for c in cols_to_drop if c in df.columns])
+
+    df = df.rename(columns={'state_code': 'state'})
+
+    # --- FIX: Force Numeric Conversion ---
+    # Keys and metrics alike are integers, downcast to the narrowest width
+    df = to_int_compact(df, list(df.columns))
+
+    keys = ['state', 'tru_id', 'age_group_id']
+    metrics = [c for c in df.columns if c not in keys]
+    return df[keys + metrics]
+
+def write_tru_lookup():
+    print("   Standardizing TRU...")
+    pd.DataFrame(list(TRU_MAP.items()), columns=['name', 'id'])[['id', 'name']].to_csv(TRU_FILE, index=False)
+
 def process_occupation_data():
     print(f"📖 Reading: {INPUT_FILE}")
-    column_names = [
-        "table_code", "state_code", "district_code", "area_name", "tru", "age_group",
-        "population_total", "population_male", "population_female",
-        "main_workers_total", "main_workers_male", "main_workers_female",
-        "marginal_workers_total", "marginal_workers_male", "marginal_workers_female",
-        "marg_3_6mo_total", "marg_3_6mo_male", "marg_3_6mo_female",
-        "marg_less_3mo_total", "marg_less_3mo_male", "marg_less_3mo_female",
-        "non_workers_total", "non_workers_male", "non_workers_female",
-        "seeking_work_total", "seeking_work_male", "seeking_work_female"
-    ]
-
     try:
-        df = pd.read_excel(INPUT_FILE, skiprows=9, header=None, names=column_names, dtype={'state_code': str})
+        df = pd.read_excel(INPUT_FILE, skiprows=SKIP_ROWS, header=None, names=COLUMN_NAMES, dtype={'state_code': str})
     except Exception as e:
         print(f"❌ Error: {e}")
         return
 
-    df = df.dropna(subset=['state_code'])
-    df['area_name'] = df['area_name'].apply(clean_text)
-    df['age_group'] = df['age_group'].replace('Total', 'All Ages')
-    
-    print("   Standardizing TRU...")
-    tru_map = {"Total": 1, "Rural": 2, "Urban": 3}
-    pd.DataFrame(list(tru_map.items()), columns=['name', 'id'])[['id', 'name']].to_csv(TRU_FILE, index=False)
-    df['tru_id'] = df['tru'].map(tru_map)
+    profile = MemoryProfile("clean_occupation.py")
+    profile.record("read", df)
+    df = prepare_rows(df)
+    write_tru_lookup()
 
     regions_df = df[['state_code', 'district_code', 'area_name']].drop_duplicates()
     regions_df.to_csv(REGIONS_FILE, index=False)
@@ -54,32 +85,61 @@ def process_occupation_data():
     unique_ages = df['age_group'].unique()
     age_df = pd.DataFrame({'id': range(1, len(unique_ages) + 1), 'name': unique_ages})
     age_df.to_csv(AGE_GROUPS_FILE, index=False)
-    df['age_group_id'] = df['age_group'].map(dict(zip(age_df['name'], age_df['id'])))
-
-    cols_to_drop = ['area_name', 'tru', 'age_group', 'district_code', 'table_code']
-    df.drop(columns=[c for c in cols_to_drop if c in df.columns], inplace=True)
 
-    df.rename(columns={'state_code': 'state'}, inplace=True)
-
-    # --- FIX: Force Numeric Conversion ---
     print("🔢 Converting metrics to Numeric (Int)...")
-    for col in df.columns:
-        # Explicitly ignore keys
-        if col not in ['state', 'tru_id', 'age_group_id']:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-        else:
-             # Ensure keys are integers too
-             df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+    df = normalize_occupation(df, dict(zip(age_df['name'], age_df['id'])))
 
-    keys = ['state', 'tru_id', 'age_group_id']
-    metrics = [c for c in df.columns if c not in keys]
-    df = df[keys + metrics]
+    profile.record("occupation_stats", df)
+    profile.save(OUTPUT_DIR)
 
     df.to_csv(OCCUPATION_STATS_FILE, index=False)
     print(f"✅ Created '{OCCUPATION_STATS_FILE}'")
 
+def process_occupation_data_streaming(chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Bounded-memory variant for district-level workbooks.
+    Age-group ids are assigned in first-seen order, exactly as `unique()` does
+    in the full read, so both modes produce the same ids.
+    """
+    print(f"📖 Streaming: {INPUT_FILE} ({chunk_rows} rows per chunk)")
+    age_ids, regions = {}, {}
+    total_rows = 0
+
+    try:
+        chunks = iter_sheet_chunks(INPUT_FILE, chunk_rows=chunk_rows, skiprows=SKIP_ROWS,
+                                   names=COLUMN_NAMES, text_columns=['state_code'])
+        for i, chunk in enumerate(chunks):
+            chunk = prepare_rows(chunk)
+
+            for key in zip(chunk['state_code'], chunk['district_code'], chunk['area_name']):
+                regions.setdefault(key, None)
+            for name in chunk['age_group']:
+                age_ids.setdefault(name, len(age_ids) + 1)
+
+            df_norm = normalize_occupation(chunk, age_ids)
+            append_csv(df_norm, OCCUPATION_STATS_FILE, first_chunk=(i == 0))
+            total_rows += len(df_norm)
+            print(f"   🔄 Chunk {i + 1}: +{len(df_norm)} rows")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return
+
+    write_tru_lookup()
+    pd.DataFrame(list(regions), columns=['state_code', 'district_code', 'area_name']).to_csv(REGIONS_FILE, index=False)
+    pd.DataFrame({'id': list(age_ids.values()), 'name': list(age_ids)}).to_csv(AGE_GROUPS_FILE, index=False)
+
+    print(f"✅ Created '{OCCUPATION_STATS_FILE}' ({total_rows} rows, streamed)")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean the B-1 workers by age table.")
+    parser.add_argument("--stream", action="store_true", help="Read the workbook in row chunks (bounded memory).")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
     if os.path.exists(INPUT_FILE):
-        process_occupation_data()
+        if args.stream:
+            process_occupation_data_streaming(args.chunk_rows)
+        else:
+            process_occupation_data()
     else:
         print(f"❌ File not found: {INPUT_FILE}")
\ No newline at end of file
@@ -1,7 +1,11 @@
 import pandas as pd
+import argparse
 import re
 import os
 
+from excel_stream import DEFAULT_CHUNK_ROWS, iter_sheet_chunks, append_csv
+from compact_dtypes import MemoryProfile, to_int_compact, to_category
+
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
@@ -18,17 +22,8 @@ def clean_column_name(name):
     s = re.sub(r'[^a-z0-9_]', '', s)
     return s[:60]
 
-def process_population_data():
-    print(f"📖 Reading: {INPUT_FILE}")
-    try:
-        df = pd.read_excel(INPUT_FILE)
-    except Exception:
-        try:
-            df = pd.read_csv(INPUT_FILE)
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            return
-
+def normalize_population(df):
+    """Cleans a raw (wide) slice and unpivots it to one row per state/age/tru_id."""
     df.columns = [clean_column_name(c) for c in df.columns]
     
     if 'table' in df.columns:
@@ -37,13 +32,9 @@ def process_population_data():
         df['age'] = df['age'].astype(str).str.replace('.0', '', regex=False)
 
     # --- FIX: Force Numeric on Raw Data ---
-    print("🔢 Converting raw metrics to Numeric...")
     pop_cols = [c for c in df.columns if 'persons' in c or 'males' in c or 'females' in c]
-    for col in pop_cols:
-        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+    df = to_int_compact(df, pop_cols)
 
-    print("🔄 Unpivoting Data (Wide -> Long)...")
-    
     # Total (1)
     df_tot = df[['state', 'age', 'total_persons', 'total_males', 'total_females']].copy()
     df_tot.columns = ['state', 'age', 'persons', 'males', 'females']
@@ -60,15 +51,68 @@ def process_population_data():
     df_urb['tru_id'] = 3
 
     df_norm = pd.concat([df_tot, df_rur, df_urb], ignore_index=True)
-    df_norm['state'] = df_norm['state'].fillna(0).astype(int)
+    df_norm = to_int_compact(df_norm, ['state', 'tru_id'])
+    # ~100 distinct ages repeated per state and TRU
+    df_norm = to_category(df_norm, ['age'])
     
+    return df_norm[['state', 'tru_id', 'age', 'persons', 'males', 'females']]
+
+def process_population_data():
+    print(f"📖 Reading: {INPUT_FILE}")
+    try:
+        df = pd.read_excel(INPUT_FILE)
+    except Exception:
+        try:
+            df = pd.read_csv(INPUT_FILE)
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            return
+
+    profile = MemoryProfile("clean_population.py")
+    profile.record("read", df)
+
+    print("🔢 Converting raw metrics to Numeric...")
+    print("🔄 Unpivoting Data (Wide -> Long)...")
+    df_norm = normalize_population(df)
+    profile.record("population_stats", df_norm)
+    profile.save(OUTPUT_DIR)
+
     # Save
-    df_norm = df_norm[['state', 'tru_id', 'age', 'persons', 'males', 'females']]
     df_norm.to_csv(OUTPUT_CSV, index=False)
     print(f"✅ Created '{OUTPUT_CSV}' ({len(df_norm)} rows)")
 
+def process_population_data_streaming(chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Bounded-memory variant for district / sub-district workbooks.
+    Each chunk is unpivoted on its own, so Total/Rural/Urban rows are grouped
+    per chunk rather than across the whole file; the row set is identical.
+    """
+    print(f"📖 Streaming: {INPUT_FILE} ({chunk_rows} rows per chunk)")
+    total_rows = 0
+
+    try:
+        chunks = iter_sheet_chunks(INPUT_FILE, chunk_rows=chunk_rows, header=True)
+        for i, chunk in enumerate(chunks):
+            df_norm = normalize_population(chunk)
+            append_csv(df_norm, OUTPUT_CSV, first_chunk=(i == 0))
+            total_rows += len(df_norm)
+            print(f"   🔄 Chunk {i + 1}: +{len(df_norm)} rows")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return
+
+    print(f"✅ Created '{OUTPUT_CSV}' ({total_rows} rows, streamed)")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean the C-13 single-year age table.")
+    parser.add_argument("--stream", action="store_true", help="Read the workbook in row chunks (bounded memory).")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
     if os.path.exists(INPUT_FILE):
-        process_population_data()
+        if args.stream:
+            process_population_data_streaming(args.chunk_rows)
+        else:
+            process_population_data()
     else:
         print(f"❌ File not found: {INPUT_FILE}")
\ No newline at end of file
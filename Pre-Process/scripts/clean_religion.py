@@ -1,7 +1,11 @@
 import pandas as pd
+import argparse
 import re
 import os
 
+from excel_stream import DEFAULT_CHUNK_ROWS, iter_sheet_chunks, append_csv
+from compact_dtypes import MemoryProfile, to_int_compact, to_category
+
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
@@ -11,6 +15,9 @@ RELIGIONS_FILE = os.path.join(OUTPUT_DIR, "religions.csv")
 TRU_FILE = os.path.join(OUTPUT_DIR, "tru.csv")
 STATS_FILE = os.path.join(OUTPUT_DIR, "religion_stats.csv")
 
+TRU_MAP = {"Total": 1, "Rural": 2, "Urban": 3}
+LABEL_COLUMNS = ['religion', 'tru', 'district', 'subdistt', 'townvillage', 'name']
+
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 def clean_column_name(name):
@@ -20,6 +27,29 @@ def clean_column_name(name):
     s = re.sub(r'[^a-z0-9_]', '', s)
     return s[:60]
 
+def write_tru_lookup():
+    print("   Standardizing TRU...")
+    pd.DataFrame(list(TRU_MAP.items()), columns=['name', 'id'])[['id', 'name']].to_csv(TRU_FILE, index=False)
+
+def normalize_religion(df, religion_ids):
+    """Maps TRU/religion ids, forces numeric metrics and drops label columns."""
+    # Categoricals: the id maps below run once per distinct label, not per row
+    df = to_category(df, ['religion', 'tru'])
+    df['tru_id'] = df['tru'].map(TRU_MAP)
+    df['religion_id'] = df['religion'].map(religion_ids)
+
+    # --- FIX: Force Numeric Conversion ---
+    # One bulk conversion for keys and metrics, downcast to the narrowest int width
+    keys = ['state', 'tru_id', 'religion_id']
+    df.drop(columns=[c for c in LABEL_COLUMNS if c in df.columns], inplace=True)
+    df = to_int_compact(df, list(df.columns))
+
+    cols = list(df.columns)
+    for col in reversed(keys):
+        if col in cols:
+            cols.insert(0, cols.pop(cols.index(col)))
+    return df[cols]
+
 def process_religion_data():
     print(f"📖 Reading: {INPUT_FILE}")
     try:
@@ -32,44 +62,62 @@ def process_religion_data():
             return
 
     df.columns = [clean_column_name(c) for c in df.columns]
+    profile = MemoryProfile("clean_religion.py")
+    profile.record("read", df)
     
-    print("   Standardizing TRU...")
-    tru_map = {"Total": 1, "Rural": 2, "Urban": 3}
-    pd.DataFrame(list(tru_map.items()), columns=['name', 'id'])[['id', 'name']].to_csv(TRU_FILE, index=False)
-    df['tru_id'] = df['tru'].map(tru_map)
+    write_tru_lookup()
 
     print("   Extracting Religions...")
     unique_rel = df['religion'].unique()
     rel_df = pd.DataFrame({'id': range(1, len(unique_rel) + 1), 'religion_name': unique_rel})
     rel_df.to_csv(RELIGIONS_FILE, index=False)
     
-    df['religion_id'] = df['religion'].map(dict(zip(rel_df['religion_name'], rel_df['id'])))
-
-    # --- FIX: Force Numeric Conversion ---
     print("🔢 Converting metrics to Numeric (Int)...")
-    keys = ['state', 'tru_id', 'religion_id']
-    for col in df.columns:
-        if col not in keys and col not in ['religion', 'tru', 'district', 'subdistt', 'townvillage', 'name']:
-             df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
-
-    cols_to_drop = ['religion', 'tru', 'district', 'subdistt', 'townvillage', 'name']
-    df.drop(columns=[c for c in cols_to_drop if c in df.columns], inplace=True)
-    
-    if 'state' in df.columns:
-        df['state'] = df['state'].fillna(0).astype(int)
-
-    cols = list(df.columns)
-    priority = ['state', 'tru_id', 'religion_id']
-    for col in reversed(priority):
-        if col in cols:
-            cols.insert(0, cols.pop(cols.index(col)))
-    df = df[cols]
+    df = normalize_religion(df, dict(zip(rel_df['religion_name'], rel_df['id'])))
+    profile.record("religion_stats", df)
+    profile.save(OUTPUT_DIR)
 
     df.to_csv(STATS_FILE, index=False)
     print(f"✅ Created '{STATS_FILE}'")
 
+def process_religion_data_streaming(chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Bounded-memory variant for district / town-village workbooks.
+    Religion ids are assigned in first-seen order, matching `unique()` in the full read.
+    """
+    print(f"📖 Streaming: {INPUT_FILE} ({chunk_rows} rows per chunk)")
+    religion_ids = {}
+    total_rows = 0
+
+    try:
+        for i, chunk in enumerate(iter_sheet_chunks(INPUT_FILE, chunk_rows=chunk_rows, header=True)):
+            chunk.columns = [clean_column_name(c) for c in chunk.columns]
+            for name in chunk['religion']:
+                religion_ids.setdefault(name, len(religion_ids) + 1)
+
+            df_norm = normalize_religion(chunk, religion_ids)
+            append_csv(df_norm, STATS_FILE, first_chunk=(i == 0))
+            total_rows += len(df_norm)
+            print(f"   🔄 Chunk {i + 1}: +{len(df_norm)} rows")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return
+
+    write_tru_lookup()
+    pd.DataFrame({'id': list(religion_ids.values()), 'religion_name': list(religion_ids)}).to_csv(RELIGIONS_FILE, index=False)
+
+    print(f"✅ Created '{STATS_FILE}' ({total_rows} rows, streamed)")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean the C-01 religious community table.")
+    parser.add_argument("--stream", action="store_true", help="Read the workbook in row chunks (bounded memory).")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
     if os.path.exists(INPUT_FILE):
-        process_religion_data()
+        if args.stream:
+            process_religion_data_streaming(args.chunk_rows)
+        else:
+            process_religion_data()
     else:
         print(f"❌ File not found: {INPUT_FILE}")
\ No newline at end of file
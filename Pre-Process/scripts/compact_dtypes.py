@@ -0,0 +1,111 @@
+import os
+import json
+import resource
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 🔧 CONFIGURATION
+# ==========================================
+# Per-script memory profiles land next to the script's outputs
+MEMORY_REPORT_NAME = "memory_profile.json"
+
+
+def _plain(frame):
+    """Categorical columns (e.g. ids mapped from categorical labels) back to plain values."""
+    cats = frame.select_dtypes('category').columns
+    if len(cats):
+        frame = frame.astype({c: object for c in cats})
+    return frame
+
+
+def to_int_compact(df, cols, fill=0):
+    """Bulk numeric conversion + NaN fill, then the narrowest integer width per column."""
+    cols = [c for c in cols if c in df.columns]
+    if not cols:
+        return df
+    converted = _plain(df[cols]).apply(pd.to_numeric, errors='coerce').fillna(fill)
+    compact = {c: pd.to_numeric(converted[c].astype(np.int64), downcast='integer') for c in cols}
+    # One block assignment instead of 100+ single-column writes
+    df[cols] = pd.DataFrame(compact, index=df.index)
+    return df
+
+
+def fits_float32(s):
+    """True if every value prints back identically after a float32 round trip."""
+    values = s.dropna()
+    if values.empty:
+        return True
+    back = values.astype(np.float32).astype(str).astype(np.float64)
+    return bool((back == values).all())
+
+
+def to_float_compact(df, cols, fill=None, allow_int=True):
+    """
+    Bulk numeric conversion. Integral columns become the narrowest int (unless
+    `allow_int` is False), other columns float32 when that loses no printed
+    precision, else float64.
+    """
+    cols = [c for c in cols if c in df.columns]
+    if not cols:
+        return df
+    converted = _plain(df[cols]).apply(pd.to_numeric, errors='coerce')
+    if fill is not None:
+        converted = converted.fillna(fill)
+    compact = {}
+    for col in cols:
+        s = converted[col]
+        if not allow_int:
+            s = s.astype(np.float64)
+        if pd.api.types.is_integer_dtype(s):
+            compact[col] = pd.to_numeric(s, downcast='integer')
+        elif fits_float32(s):
+            compact[col] = s.astype(np.float32)
+        else:
+            compact[col] = s
+    df[cols] = pd.DataFrame(compact, index=df.index)
+    return df
+
+
+def to_category(df, cols):
+    """Repeated labels (state names, TRU, religion/language names) as categoricals."""
+    for col in cols:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def frame_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MemoryProfile:
+    """Collects before/after frame sizes for one cleaning script and writes them as JSON."""
+
+    def __init__(self, script):
+        self.script = script
+        self.entries = []
+
+    def record(self, stage, df):
+        mb = frame_mb(df)
+        self.entries.append({"stage": stage, "rows": len(df), "columns": df.shape[1], "frame_mb": round(mb, 3)})
+        print(f"   🧠 {stage:<22} {mb:8.2f} MB ({len(df)} rows)")
+
+    def save(self, output_dir):
+        report = {
+            "script": self.script,
+            "stages": self.entries,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+        if len(self.entries) >= 2:
+            first, last = self.entries[0]["frame_mb"], self.entries[-1]["frame_mb"]
+            report["reduction_pct"] = round(100 * (1 - last / first), 1) if first else 0.0
+        with open(os.path.join(output_dir, MEMORY_REPORT_NAME), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+        print(f"   🧠 Peak RSS {report['peak_rss_mb']} MB")
+        return report
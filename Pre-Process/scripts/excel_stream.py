@@ -0,0 +1,127 @@
+import os
+import pandas as pd
+
+# ==========================================
+# 🔧 CONFIGURATION
+# ==========================================
+DEFAULT_CHUNK_ROWS = 5000
+
+
+def _normalize_xls_value(value):
+    """Mirror pandas' xlrd handling: '' -> None, integral floats -> int."""
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def iter_sheet_rows(path, skiprows=0, sheet_index=0):
+    """
+    Yields raw row tuples from the first (or given) sheet without building a DataFrame.
+
+    .xlsx files are read with openpyxl in read-only mode, so only the current row
+    is held in memory. .xls (BIFF) files are read with xlrd on demand; the format
+    itself caps a sheet at 65,536 rows so the decoded sheet stays small.
+    .csv files are read line by line.
+    """
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == ".xlsx":
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            ws = wb.worksheets[sheet_index]
+            for i, row in enumerate(ws.iter_rows(values_only=True)):
+                if i >= skiprows:
+                    yield row
+        finally:
+            wb.close()
+
+    elif ext == ".xls":
+        import xlrd
+        book = xlrd.open_workbook(path, on_demand=True)
+        try:
+            sheet = book.sheet_by_index(sheet_index)
+            for r in range(skiprows, sheet.nrows):
+                yield tuple(_normalize_xls_value(v) for v in sheet.row_values(r))
+            book.unload_sheet(sheet_index)
+        finally:
+            book.release_resources()
+
+    elif ext == ".csv":
+        import csv
+        with open(path, newline="", encoding="utf-8") as f:
+            for i, row in enumerate(csv.reader(f)):
+                if i >= skiprows:
+                    yield tuple(v if v != "" else None for v in row)
+
+    else:
+        raise ValueError(f"Unsupported file type for streaming: {path}")
+
+
+def _mangle_duplicate_names(names):
+    """Renames repeated headers to 'x.1', 'x.2', ... like pd.read_excel."""
+    seen = {}
+    out = []
+    for name in names:
+        count = seen.get(name, 0)
+        out.append(f"{name}.{count}" if count else name)
+        seen[name] = count + 1
+    return out
+
+
+def _infer_numeric(df, text_columns):
+    """Converts all-numeric text columns (e.g. '000') the way pd.read_excel does."""
+    for col in df.columns:
+        if col in text_columns or pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        try:
+            df[col] = pd.to_numeric(df[col])
+        except (ValueError, TypeError):
+            pass
+    return df
+
+
+def iter_sheet_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS, skiprows=0, names=None, header=False, text_columns=()):
+    """
+    Yields DataFrames of at most `chunk_rows` rows.
+
+    Either pass `names` (like `pd.read_excel(header=None, names=...)`) or set
+    `header=True` to take column names from the first row after `skiprows`.
+    Rows are padded/truncated to the number of columns. `text_columns` are kept
+    as strings, like `dtype={col: str}` in the full read.
+    """
+    rows = iter_sheet_rows(path, skiprows=skiprows)
+
+    if header:
+        first = next(rows, None)
+        if first is None:
+            return
+        names = _mangle_duplicate_names([str(c) if c is not None else "" for c in first])
+    if names is None:
+        raise ValueError("Either `names` or `header=True` is required.")
+
+    width = len(names)
+    buffer = []
+    for row in rows:
+        row = tuple(row[:width]) + (None,) * (width - len(row))
+        buffer.append(row)
+        if len(buffer) >= chunk_rows:
+            yield _to_frame(buffer, names, text_columns)
+            buffer = []
+    if buffer:
+        yield _to_frame(buffer, names, text_columns)
+
+
+def _to_frame(rows, names, text_columns):
+    df = pd.DataFrame(rows, columns=names)
+    for col in text_columns:
+        if col in df.columns:
+            df[col] = df[col].map(lambda v: v if v is None else str(v))
+    return _infer_numeric(df, text_columns)
+
+
+def append_csv(df, path, first_chunk):
+    """Writes the header with the first chunk and appends every later chunk."""
+    df.to_csv(path, mode="w" if first_chunk else "a", header=first_chunk, index=False)
@@ -1,15 +1,21 @@
 import os
+import json
+import argparse
 import pandas as pd
 from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
 from sqlalchemy.pool import NullPool
 
+from consolidate_outputs import load_manifest, changed_since
+
 load_dotenv()
 
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
 INPUT_DIR = "unified_outputs"
+# sha256 of each file as last uploaded, compared against the consolidate manifest
+UPLOAD_STATE_FILE = os.path.join(INPUT_DIR, ".upload_state.json")
 
 USER = os.getenv("user")
 PASSWORD = os.getenv("password")
@@ -64,6 +70,34 @@ def clean_database(engine):
             print(f"   🗑️  Dropped {table}")
     print("✨ Database is clean.\n")
 
+def affected_tables(changed):
+    """Tables to rebuild: changed files plus facts whose foreign keys point at a changed lookup."""
+    tables = {t for f, t, _ in UPLOAD_SEQUENCE if f in changed}
+    for table_name, fks in FOREIGN_KEYS.items():
+        if any(ref.split('(')[0] in tables for _, ref in fks):
+            tables.add(table_name)
+    return tables
+
+def drop_tables(engine, tables):
+    print(f"\n🧹 Dropping {len(tables)} affected table(s)...")
+    with engine.begin() as conn:
+        for table in tables:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table} CASCADE;"))
+            print(f"   🗑️  Dropped {table}")
+
+def load_upload_state():
+    if not os.path.exists(UPLOAD_STATE_FILE):
+        return {}
+    with open(UPLOAD_STATE_FILE, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_upload_state(uploaded):
+    state = load_upload_state()
+    files = load_manifest(os.path.join(INPUT_DIR, "manifest.json"))["files"]
+    state.update({f: files[f]["sha256"] for f in uploaded if f in files})
+    with open(UPLOAD_STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4)
+
 def enable_rls(table_name, engine):
     try:
         with engine.begin() as conn:
@@ -109,7 +143,7 @@ def upload_file(filename, table_name, pk_columns, engine):
     
     if not os.path.exists(file_path):
         print(f"⏭️  Skipping {filename} (File not found)")
-        return
+        return False
 
     print(f"📤 Uploading: {filename} -> Table: {table_name}")
     
@@ -127,11 +161,18 @@ def upload_file(filename, table_name, pk_columns, engine):
         add_foreign_keys(table_name, engine)
         enable_rls(table_name, engine)
         print("") 
+        return True
 
     except Exception as e:
         print(f"   ❌ FAILED: {e}")
+        return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upload unified_outputs/ to Postgres.")
+    parser.add_argument("--changed-only", action="store_true",
+                        help="Only rebuild tables whose CSV hash changed since the last upload (needs manifest.json).")
+    args = parser.parse_args()
+
     print("🚀 Starting Unified Database Upload...")
     
     if not os.path.exists(INPUT_DIR):
@@ -144,13 +185,23 @@ if __name__ == "__main__":
             conn.execute(text("SELECT 1"))
         print("✅ Database Connection Successful.")
         
-        clean_database(engine)
+        if args.changed_only:
+            changed = changed_since(load_upload_state(), os.path.join(INPUT_DIR, "manifest.json"))
+            tables = affected_tables(changed)
+            if not tables:
+                print("✨ Nothing changed since the last upload.")
+                exit()
+            drop_tables(engine, tables)
+        else:
+            clean_database(engine)
+            tables = {t for _, t, _ in UPLOAD_SEQUENCE}
         
         processed_files = set()
         for filename, table_name, pk_cols in UPLOAD_SEQUENCE:
-            if filename not in processed_files:
-                upload_file(filename, table_name, pk_cols, engine)
-                processed_files.add(filename)
+            if table_name in tables and filename not in processed_files:
+                if upload_file(filename, table_name, pk_cols, engine):
+                    processed_files.add(filename)
+        save_upload_state(processed_files)
             
         print("🎉 All tasks completed successfully!")
 
@@ -0,0 +1,186 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from upload_unified_data import UPLOAD_SEQUENCE, FOREIGN_KEYS
+
+# ==========================================
+# 🔧 CONFIGURATION
+# ==========================================
+INPUT_DIR = "unified_outputs"
+REPORT_FILE = os.path.join(INPUT_DIR, "validation_report.json")
+
+# Rows sharing these keys must satisfy Total (tru_id 1) == Rural (2) + Urban (3)
+TRU_KEYS = {
+    "population_stats": ["state", "age"],
+    "religion_stats":   ["state", "religion_id"],
+    "occupation_stats": ["state", "age_group_id"],
+    "language_stats":   ["state", "language_id"],
+}
+TRU_SIGN = {1: 1, 2: -1, 3: -1}
+
+# (total, male, female) column name templates; {} is the shared part of the name
+SEX_PATTERNS = [
+    ("{}_p", "{}_m", "{}_f"),
+    ("p_{}", "m_{}", "f_{}"),
+    ("{}_person", "{}_male", "{}_female"),
+    ("{}_total", "{}_male", "{}_female"),
+]
+SEX_EXACT = [("person", "male", "female"), ("persons", "males", "females")]
+
+MAX_SAMPLES = 5
+
+# ==========================================
+# 🔍 CHECKS
+# ==========================================
+def sex_triplets(columns):
+    """Finds (total, male, female) column triplets by naming convention."""
+    cols = set(columns)
+    found = [t for t in SEX_EXACT if set(t) <= cols]
+    for total_t, male_t, female_t in SEX_PATTERNS:
+        regex = re.compile("^" + re.escape(total_t).replace(r"\{\}", "(.+)") + "$")
+        for col in columns:
+            m = regex.match(col)
+            if not m:
+                continue
+            triplet = (col, male_t.format(m.group(1)), female_t.format(m.group(1)))
+            if triplet[1] in cols and triplet[2] in cols and triplet not in found:
+                found.append(triplet)
+    return found
+
+def _result(table, check, rows_checked, bad_mask, df, sample_cols, start, detail=None):
+    bad = int(bad_mask.sum())
+    result = {
+        "table": table,
+        "check": check,
+        "rows_checked": int(rows_checked),
+        "violations": bad,
+        "passed": bad == 0,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+    if detail:
+        result["detail"] = detail
+    if bad:
+        result["samples"] = json.loads(df.loc[bad_mask, sample_cols].head(MAX_SAMPLES).to_json(orient="records"))
+    return result
+
+def check_sex_sums(table, df):
+    """total == male + female for every triplet, all triplets in one matrix operation."""
+    triplets = sex_triplets(list(df.columns))
+    if not triplets:
+        return []
+    start = time.perf_counter()
+    totals = df[[t for t, _, _ in triplets]].to_numpy(dtype=np.int64)
+    males = df[[m for _, m, _ in triplets]].to_numpy(dtype=np.int64)
+    females = df[[f for _, _, f in triplets]].to_numpy(dtype=np.int64)
+    mismatch = totals != males + females
+
+    results = []
+    keys = [c for c in df.columns if c in ("state", "tru_id") or c.endswith("_id") or c == "age"]
+    for j, (total, male, female) in enumerate(triplets):
+        bad_mask = pd.Series(mismatch[:, j], index=df.index)
+        results.append(_result(table, f"{male} + {female} == {total}", len(df), bad_mask, df,
+                               keys + [total, male, female], start))
+    return results
+
+def check_tru_totals(table, df):
+    """
+    Total == Rural + Urban per key group: each metric is summed with sign +1 for
+    Total and -1 for Rural/Urban in a single groupby; any non-zero residual fails.
+    """
+    keys = TRU_KEYS.get(table)
+    if not keys or "tru_id" not in df.columns:
+        return []
+    start = time.perf_counter()
+    metrics = [c for c in df.columns if c not in keys and c != "tru_id" and not c.endswith("_id")
+               and pd.api.types.is_numeric_dtype(df[c])]
+    sign = df["tru_id"].map(TRU_SIGN).fillna(0).to_numpy(dtype=np.int64)
+    signed = pd.DataFrame(df[metrics].to_numpy(dtype=np.int64) * sign[:, None], columns=metrics)
+    for k in keys:
+        signed[k] = df[k].to_numpy()
+    residual = signed.groupby(keys, sort=False)[metrics].sum()
+
+    bad_cells = residual.to_numpy() != 0
+    bad_groups = residual[bad_cells.any(axis=1)].reset_index()
+    bad_mask = pd.Series(True, index=bad_groups.index)
+    failing = [m for m, bad in zip(metrics, bad_cells.any(axis=0)) if bad]
+    return [_result(table, "rural + urban == total", len(residual), bad_mask, bad_groups,
+                    keys + failing[:5], start, detail={"metrics_failing": failing,
+                                         "samples_show": "total - (rural + urban)"})]
+
+def check_foreign_keys(table, df, lookups):
+    """Every fact key must exist in its lookup table (vectorized isin)."""
+    results = []
+    for fk_col, ref_def in FOREIGN_KEYS.get(table, []):
+        ref_table, ref_col = ref_def.replace(')', '').split('(')
+        if fk_col not in df.columns or ref_table not in lookups:
+            continue
+        start = time.perf_counter()
+        valid = lookups[ref_table][ref_col].to_numpy()
+        bad_mask = pd.Series(~np.isin(df[fk_col].to_numpy(), valid), index=df.index)
+        results.append(_result(table, f"{fk_col} -> {ref_def}", len(df), bad_mask, df, [fk_col], start))
+    return results
+
+# ==========================================
+# 🚀 RUNNER
+# ==========================================
+def load_tables(input_dir):
+    tables = {}
+    for filename, table_name, _ in UPLOAD_SEQUENCE:
+        path = os.path.join(input_dir, filename)
+        if os.path.exists(path):
+            df = pd.read_csv(path)
+            df.columns = df.columns.str.lower()
+            tables[table_name] = df
+    return tables
+
+def validate(input_dir=INPUT_DIR):
+    start = time.perf_counter()
+    tables = load_tables(input_dir)
+    lookups = {t: df for t, df in tables.items() if not t.endswith("_stats")}
+
+    checks = []
+    for table, df in tables.items():
+        if table in lookups:
+            continue
+        checks.extend(check_foreign_keys(table, df, lookups))
+        checks.extend(check_sex_sums(table, df))
+        checks.extend(check_tru_totals(table, df))
+
+    failed = [c for c in checks if not c["passed"]]
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "input_dir": os.path.abspath(input_dir),
+        "tables": {t: len(df) for t, df in tables.items()},
+        "checks_run": len(checks),
+        "checks_failed": len(failed),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        "checks": checks,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consistency checks over unified_outputs/.")
+    parser.add_argument("--input-dir", default=INPUT_DIR)
+    parser.add_argument("--report", default=REPORT_FILE)
+    args = parser.parse_args()
+
+    print(f"🚀 Validating tables in '{args.input_dir}'...")
+    report = validate(args.input_dir)
+
+    for c in report["checks"]:
+        icon = "✅" if c["passed"] else "❌"
+        print(f"{icon} {c['table']:<18} {c['check']:<55} {c['violations']:>6} / {c['rows_checked']}")
+
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+
+    print("-" * 40)
+    print(f"📊 {report['checks_run']} checks, {report['checks_failed']} failed in {report['elapsed_ms']:.0f} ms")
+    print(f"🧾 Report: {args.report}")
+    sys.exit(1 if report["checks_failed"] else 0)
@@ -1,42 +1,213 @@
 import os
+import re
 import glob
+import gzip
+import json
+import random
+import hashlib
+import argparse
+import tempfile
 
 # ==========================================
 # 🔧 CONFIGURATION
 # ==========================================
 INPUT_DIR = "training_data_final"
-OUTPUT_FILE = "consolidated_train.jsonl"
+OUTPUT_DIR = "consolidated"       # merge_summary.json, temp buckets, and --shards output
+SPLIT_FILE = "consolidated_{split}.jsonl"    # default output, one uncompressed file per split
+OUTPUT_FILE = SPLIT_FILE.format(split="train")  # what the Colab notebook trains on
 
-def consolidate_jsonl():
-    print(f"🚀 Consolidating JSONL files from {INPUT_DIR}...")
-    
-    if not os.path.exists(INPUT_DIR):
-        print(f"❌ Error: Directory '{INPUT_DIR}' not found.")
+SEED = 42
+SPLITS = {"train": 0.90, "validation": 0.05, "test": 0.05}
+TEMP_BUCKETS = 16          # external shuffle: each bucket holds ~1/16 of a split in memory
+MAX_SHARD_MB = 50          # compressed size per output shard
+
+QUESTION_RE = re.compile(r"following question:\s*`(.*?)`", re.S)
+SQL_MARKER = "### SQL"
+
+# ==========================================
+# 🔑 RECORD KEYS
+# ==========================================
+def normalize(s):
+    return " ".join(s.lower().split()).rstrip(";").strip()
+
+def parse_record(line):
+    """Returns (question, sql) from a generator record, or None if the line is malformed."""
+    try:
+        text = json.loads(line)["text"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    m = QUESTION_RE.search(text)
+    if not m or SQL_MARKER not in text:
+        return None
+    return m.group(1), text.split(SQL_MARKER, 1)[1]
+
+def record_key(question, sql):
+    """Identity of a training pair: the schema text is ignored, so re-generated files still dedupe."""
+    return hashlib.sha256(f"{normalize(question)}\x1f{normalize(sql)}".encode("utf-8")).digest()
+
+def split_for(key):
+    """Split from the key hash alone: stable across runs, file order and newly added files."""
+    point = int.from_bytes(key[-4:], "big") / 2 ** 32
+    edge = 0.0
+    for name, ratio in SPLITS.items():
+        edge += ratio
+        if point < edge:
+            return name
+    return name
+
+# ==========================================
+# 📦 SHARD WRITER
+# ==========================================
+class ShardWriter:
+    """Gzip JSONL shards of at most `max_bytes` compressed; mtime=0 keeps bytes reproducible."""
+
+    def __init__(self, output_dir, prefix, max_bytes):
+        self.output_dir, self.prefix, self.max_bytes = output_dir, prefix, max_bytes
+        self.shards = []
+        self.raw = self.gz = None
+
+    def _open(self):
+        name = f"{self.prefix}-{len(self.shards):05d}.jsonl.gz"
+        self.raw = open(os.path.join(self.output_dir, name), "wb")
+        self.gz = gzip.GzipFile(filename="", mode="wb", fileobj=self.raw, mtime=0)
+        self.shards.append({"file": name, "records": 0})
+
+    def write(self, line):
+        if self.gz is None or self.raw.tell() >= self.max_bytes:
+            self.close()
+            self._open()
+        self.gz.write(line.encode("utf-8"))
+        self.shards[-1]["records"] += 1
+
+    def close(self):
+        if self.gz is not None:
+            self.gz.close()
+            self.raw.close()
+            path = os.path.join(self.output_dir, self.shards[-1]["file"])
+            with open(path, "rb") as f:
+                self.shards[-1]["sha256"] = hashlib.sha256(f.read()).hexdigest()
+            self.shards[-1]["bytes"] = os.path.getsize(path)
+            self.raw = self.gz = None
+
+class SplitFileWriter:
+    """One plain JSONL file per split, the format the Colab notebook uploads."""
+
+    def __init__(self, path):
+        self.path = path
+        self.f = open(path, "w", encoding="utf-8")
+        self.shards = [{"file": path, "records": 0}]
+
+    def write(self, line):
+        self.f.write(line)
+        self.shards[-1]["records"] += 1
+
+    def close(self):
+        self.f.close()
+        self.shards[-1]["bytes"] = os.path.getsize(self.path)
+
+# ==========================================
+# 🚀 MERGE
+# ==========================================
+def consolidate_jsonl(input_dir=INPUT_DIR, output_dir=OUTPUT_DIR, seed=SEED,
+                      buckets=TEMP_BUCKETS, max_shard_mb=MAX_SHARD_MB, sharded=False):
+    print(f"🚀 Consolidating JSONL files from {input_dir}...")
+
+    if not os.path.exists(input_dir):
+        print(f"❌ Error: Directory '{input_dir}' not found.")
         return
 
-    files = glob.glob(os.path.join(INPUT_DIR, "train_*.jsonl"))
-    
+    files = sorted(glob.glob(os.path.join(input_dir, "train_*.jsonl")))
+
     if not files:
         print("⚠️  No JSONL files found. Have your team run the generator script first?")
         return
 
-    total_lines = 0
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as outfile:
+    os.makedirs(output_dir, exist_ok=True)
+    if sharded:
+        for old in glob.glob(os.path.join(output_dir, "*.jsonl.gz")):
+            os.remove(old)
+
+    rng = random.Random(seed)
+    seen = set()                # 32-byte digests only; records are streamed to disk
+    summary = {}
+
+    with tempfile.TemporaryDirectory(prefix="merge_", dir=output_dir) as tmp:
+        # Pass 1: stream, validate, dedupe, and scatter into random temp buckets per split
+        temp = {(s, b): open(os.path.join(tmp, f"{s}_{b}.jsonl"), "w", encoding="utf-8")
+                for s in SPLITS for b in range(buckets)}
         for file_path in files:
-            print(f"   📄 Processing {os.path.basename(file_path)}...")
+            source = os.path.basename(file_path)
+            stats = summary[source] = {"read": 0, "invalid": 0, "duplicates": 0, **{s: 0 for s in SPLITS}}
+            print(f"   📄 Processing {source}...")
             try:
                 with open(file_path, 'r', encoding='utf-8') as infile:
                     for line in infile:
-                        if line.strip(): 
-                            outfile.write(line)
-                            total_lines += 1
+                        if not line.strip():
+                            continue
+                        stats["read"] += 1
+                        parsed = parse_record(line)
+                        if parsed is None:
+                            stats["invalid"] += 1
+                            continue
+                        key = record_key(*parsed)
+                        if key in seen:
+                            stats["duplicates"] += 1
+                            continue
+                        seen.add(key)
+                        split = split_for(key)
+                        stats[split] += 1
+                        temp[(split, rng.randrange(buckets))].write(line.rstrip("\n") + "\n")
             except Exception as e:
                 print(f"   ❌ Error reading {file_path}: {e}")
+        for f in temp.values():
+            f.close()
 
+        # Pass 2: shuffle one bucket at a time and append to the split's file or shards
+        shards = {}
+        for split in SPLITS:
+            if sharded:
+                writer = ShardWriter(output_dir, split, max_shard_mb * 1024 ** 2)
+            else:
+                writer = SplitFileWriter(SPLIT_FILE.format(split=split))
+            for b in range(buckets):
+                with open(os.path.join(tmp, f"{split}_{b}.jsonl"), encoding="utf-8") as f:
+                    lines = f.readlines()
+                rng.shuffle(lines)
+                for line in lines:
+                    writer.write(line)
+            writer.close()
+            shards[split] = writer.shards
+
+    totals = {s: sum(stats[s] for stats in summary.values()) for s in SPLITS}
+    report = {"seed": seed, "splits": SPLITS, "sources": summary, "totals": totals, "shards": shards}
+    with open(os.path.join(output_dir, "merge_summary.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=4)
+
+    print("--------------------------------------------------")
+    print(f"   {'source':<32} {'read':>6} {'invalid':>8} {'dupes':>6} " + " ".join(f"{s:>10}" for s in SPLITS))
+    for source, stats in summary.items():
+        print(f"   {source:<32} {stats['read']:>6} {stats['invalid']:>8} {stats['duplicates']:>6} "
+              + " ".join(f"{stats[s]:>10}" for s in SPLITS))
     print("--------------------------------------------------")
-    print(f"✅ Success! Merged {len(files)} files into '{OUTPUT_FILE}'.")
-    print(f"📊 Total Training Examples: {total_lines}")
+    if sharded:
+        print(f"✅ Success! Merged {len(files)} files into '{output_dir}/'.")
+        for split in SPLITS:
+            print(f"📊 {split:<10} {totals[split]:>6} examples in {len(shards[split])} shard(s)")
+    else:
+        print(f"✅ Success! Merged {len(files)} files; the notebook's train split is '{OUTPUT_FILE}'.")
+        for split in SPLITS:
+            print(f"📊 {split:<10} {totals[split]:>6} examples in '{SPLIT_FILE.format(split=split)}'")
     print("--------------------------------------------------")
+    return report
 
 if __name__ == "__main__":
-    consolidate_jsonl()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Dedupe, shuffle and split train_*.jsonl into one file per split.")
+    parser.add_argument("--input-dir", default=INPUT_DIR)
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--buckets", type=int, default=TEMP_BUCKETS)
+    parser.add_argument("--max-shard-mb", type=float, default=MAX_SHARD_MB)
+    parser.add_argument("--shards", action="store_true",
+                        help="Write size-capped gzip shards to --output-dir instead of consolidated_<split>.jsonl.")
+    args = parser.parse_args()
+    consolidate_jsonl(args.input_dir, args.output_dir, args.seed, args.buckets, args.max_shard_mb, args.shards)